@@ -12,5 +12,7 @@ export interface Task {
   project: Project;
   assigned_to: User[];
   comments: Comment[] | null;
+  comment_count: number;
+  last_comment_at: string | null;
   count: number
 }
\ No newline at end of file
@@ -1,7 +1,8 @@
-import { Component } from '@angular/core';
+import { Component, OnInit } from '@angular/core';
 import { AuthService } from '../../services/auth.service';
 import { Router } from '@angular/router';
 import { CommonModule } from '@angular/common';
+import { TaskService } from '../../services/task.service';
 
 @Component({
   selector: 'app-dashboard',
@@ -11,13 +12,26 @@ import { CommonModule } from '@angular/common';
   styleUrl: './dashboard.component.css',
 
 })
-export class DashboardComponent {
+export class DashboardComponent implements OnInit {
   user: any;
+  stats: any;
 
-  constructor(private authService: AuthService, private router: Router) {
+  constructor(private authService: AuthService, private taskService: TaskService, private router: Router) {
     this.user = this.authService.getCurrentUser();
   }
 
+  ngOnInit(): void {
+    this.taskService.getDashboardStats().subscribe({
+      next: (stats) => this.stats = stats,
+      error: (err) => console.error('Error fetching dashboard stats:', err)
+    });
+  }
+
+  openTasks(): number {
+    const byStatus = this.stats?.totals?.by_status || {};
+    return (byStatus['ToDo'] || 0) + (byStatus['InProgress'] || 0);
+  }
+
   myTasks(): void {
     this.router.navigate(['/tasks']);
   }
@@ -1,4 +1,4 @@
-import { Component, Inject, OnInit } from '@angular/core';
+import { Component, Inject, OnDestroy, OnInit } from '@angular/core';
 import { MAT_DIALOG_DATA, MatDialogRef } from '@angular/material/dialog';
 import { FormBuilder, FormGroup, Validators, ReactiveFormsModule } from '@angular/forms';
 import { Task } from '../../models/task.model';
@@ -11,6 +11,8 @@ import { MatIconModule } from '@angular/material/icon';
 import { CommonModule } from '@angular/common';
 import { MatDialogModule } from '@angular/material/dialog';
 import { AuthService } from '../../services/auth.service';
+import { EventsService } from '../../services/events.service';
+import { Subscription } from 'rxjs';
 
 @Component({
   selector: 'app-task-details',
@@ -27,17 +29,19 @@ import { AuthService } from '../../services/auth.service';
   templateUrl: './task-details.component.html',
   styleUrls: ['./task-details.component.css']
 })
-export class TaskDetailsComponent implements OnInit {
+export class TaskDetailsComponent implements OnInit, OnDestroy {
   task: Task;
   comments: Comment[] = [];
   commentForm: FormGroup;
   editingCommentId: number | null = null;
   currentUser: any;
+  private changes?: Subscription;
 
   constructor(
     private fb: FormBuilder,
     private commentService: CommentService,
     private authService: AuthService,
+    private eventsService: EventsService,
     public dialogRef: MatDialogRef<TaskDetailsComponent>,
     @Inject(MAT_DIALOG_DATA) public data: { task: Task }
   ) {
@@ -50,6 +54,19 @@ export class TaskDetailsComponent implements OnInit {
   ngOnInit(): void {
     this.fetchComments();
     this.fetchCurrentUser();
+
+    // Refresh the comments when someone else changes them instead of polling
+    this.changes = this.eventsService.changes().subscribe(event => {
+      if ((event.type === 'comment' && event.task_id === this.task.id) || event.type === 'resync') {
+        this.fetchComments();
+      } else if (event.type === 'task' && event.action === 'deleted' && event.id === this.task.id) {
+        this.dialogRef.close();
+      }
+    });
+  }
+
+  ngOnDestroy(): void {
+    this.changes?.unsubscribe();
   }
 
   fetchComments(): void {
@@ -1,4 +1,4 @@
-import { Component, OnInit, TemplateRef, ViewChild, AfterViewInit } from '@angular/core';
+import { Component, OnInit, OnDestroy, TemplateRef, ViewChild, AfterViewInit } from '@angular/core';
 import { FormBuilder } from '@angular/forms';
 import { MatTableDataSource } from '@angular/material/table';
 import { MatPaginator } from '@angular/material/paginator';
@@ -17,10 +17,11 @@ import { Task } from '../../../models/task.model';
 import { CommentService } from '../../../services/comment.service';
 import { MatCardModule } from '@angular/material/card';
 import { AuthService } from '../../../services/auth.service';
-import { forkJoin, map } from 'rxjs';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { TaskDetailsComponent } from '../../task-details/task-details.component';
 import { MatDialog } from '@angular/material/dialog';
+import { EventsService } from '../../../services/events.service';
+import { debounceTime, filter, Subscription } from 'rxjs';
 
 @Component({
   selector: 'app-tasks',
@@ -43,7 +44,7 @@ import { MatDialog } from '@angular/material/dialog';
     CommonModule
   ]
 })
-export class MyTasksComponent implements OnInit, AfterViewInit {
+export class MyTasksComponent implements OnInit, OnDestroy, AfterViewInit {
   projectId!: number;
   tasks: Task[] = [];
   users: any[] = []; // List of unique users
@@ -55,6 +56,7 @@ export class MyTasksComponent implements OnInit, AfterViewInit {
   projectName: string = '';
   selectedTask: Task = {} as Task;
   isAdmin: boolean = false;
+  private changes: Subscription[] = [];
 
   // Filters object
   filters: { status?: string; due_date?: string; user_id?: string } = {
@@ -72,13 +74,37 @@ export class MyTasksComponent implements OnInit, AfterViewInit {
     private commentService: CommentService,
     private authService: AuthService,
     private snackBar: MatSnackBar,
-    private dialog: MatDialog
+    private dialog: MatDialog,
+    private eventsService: EventsService
   ) {
     this.isAdmin = this.authService.getCurrentUser()?.is_admin || false;
   }
 
   ngOnInit(): void {
     this.applyFilters(); // Apply default filters
+
+    // Task changes reload the list (batched, a bulk edit sends many events);
+    // new or deleted comments only refresh that row's count.
+    const changes = this.eventsService.changes();
+    this.changes.push(
+      changes.pipe(filter(event => event.type === 'task' || event.type === 'resync'), debounceTime(500))
+        .subscribe(() => this.applyFilters()),
+      changes.pipe(filter(event => event.type === 'comment' && event.action !== 'updated'))
+        .subscribe(event => this.refreshCommentCount(event.task_id!))
+    );
+  }
+
+  ngOnDestroy(): void {
+    this.changes.forEach(subscription => subscription.unsubscribe());
+  }
+
+  refreshCommentCount(taskId: number): void {
+    const task = this.tasks.find(t => t.id === taskId);
+    if (!task) return;
+    this.commentService.getCommentCounts([taskId]).subscribe(counts => {
+      task.comment_count = counts[0]?.comment_count ?? 0;
+      (task as any).count = task.comment_count;
+    });
   }
 
   ngAfterViewInit(): void {
@@ -90,33 +116,22 @@ export class MyTasksComponent implements OnInit, AfterViewInit {
     this.taskService.getTasksByUserOrAll(filters).subscribe((tasks: Task[]) => {
       console.log('Tasks fetched:', tasks);
       if (tasks.length > 0) {
-        const taskRequests = tasks.map(task =>
-          this.commentService.getCommentCount(task.id).pipe(
-            map(count => ({ ...task, count: count.comment_count }))
-        ));
-
-        forkJoin(taskRequests).subscribe({
-          next: (updatedTasks) => {
-            this.tasks = updatedTasks.map(task => ({
-              ...task,
-              user_names: task.assigned_to?.map(user => user.username).join(', ') || 'N/A',
-              project_name: task.project?.name || 'N/A'
-            }));
-
-            this.dataSource.data = this.tasks;
-            console.log('Updated tasks:', this.tasks);
-
-            this.extractFilterValues(this.tasks);
-
-            if (this.paginator) {
-              this.dataSource.paginator = this.paginator;
-            }
-          },
-          error: (err) => {
-            console.error('Error fetching comment counts:', err);
-            this.showNotification('Failed to fetch comment counts. Please try again.', 'Retry');
-          }
-        });
+        // Comment counts come with each task, no per-row count request needed
+        this.tasks = tasks.map(task => ({
+          ...task,
+          count: task.comment_count,
+          user_names: task.assigned_to?.map(user => user.username).join(', ') || 'N/A',
+          project_name: task.project?.name || 'N/A'
+        }));
+
+        this.dataSource.data = this.tasks;
+        console.log('Updated tasks:', this.tasks);
+
+        this.extractFilterValues(this.tasks);
+
+        if (this.paginator) {
+          this.dataSource.paginator = this.paginator;
+        }
       } else {
         this.tasks = [];
         this.dataSource.data = [];
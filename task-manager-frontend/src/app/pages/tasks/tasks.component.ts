@@ -22,7 +22,7 @@ import { CommentService } from '../../services/comment.service';
 import { MatCardModule } from '@angular/material/card';
 import { TaskDetailsComponent } from '../task-details/task-details.component';
 import { AuthService } from '../../services/auth.service';
-import { forkJoin, map, Observable } from 'rxjs';
+import { Observable } from 'rxjs';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 
 @Component({
@@ -96,21 +96,15 @@ export class TasksComponent implements OnInit {
   fetchTasksByProject(): void {
     if (this.projectId) {
       this.taskService.getTasksByProject(this.projectId).subscribe((tasks: Task[]) => {
-        const taskRequests = tasks.map(task =>
-          this.commentService.getCommentCount(task.id).pipe(
-            map(count => ({ ...task, count: count.comment_count }))
-          )
-        );
-  
-        forkJoin(taskRequests).subscribe(updatedTasks => {
-          this.tasks = updatedTasks.map(task => ({
-            ...task,
-            project_name: task.project?.name || 'N/A'
-          }));
-  
-          this.dataSource.data = this.tasks;
-          this.dataSource.paginator = this.paginator;
-        });
+        // Comment counts come with each task, no per-row count request needed
+        this.tasks = tasks.map(task => ({
+          ...task,
+          count: task.comment_count,
+          project_name: task.project?.name || 'N/A'
+        }));
+
+        this.dataSource.data = this.tasks;
+        this.dataSource.paginator = this.paginator;
       });
     }
   }
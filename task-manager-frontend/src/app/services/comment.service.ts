@@ -13,13 +13,17 @@ export class CommentService {
   constructor(private http: HttpClient) {}
 
   getCommentsByTask(taskId: number): Observable<Comment[]> {
-    return this.http.get<Comment[]>(`${this.apiUrl}?task=${taskId}`);
+    return this.http.get<Comment[]>(`${this.apiUrl}?task=${taskId}&paginate=false`);
   }
 
   getCommentCount(taskId: number): Observable<any> {
     return this.http.get<number>(`${this.apiUrl}count/?task_id=${taskId}`);
   }
 
+  getCommentCounts(taskIds: number[]): Observable<{ task_id: number; comment_count: number; last_comment_at: string | null }[]> {
+    return this.http.get<any[]>(`${this.apiUrl}counts/?task_ids=${taskIds.join(',')}`);
+  }
+
   createComment(commentData: any): Observable<Comment> {
     return this.http.post<Comment>(this.apiUrl, commentData);
   }
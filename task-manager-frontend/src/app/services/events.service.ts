@@ -0,0 +1,40 @@
+import { Injectable, NgZone } from '@angular/core';
+import { Observable, share } from 'rxjs';
+import { environment } from '../../environments/environment';
+
+export interface ChangeEvent {
+  type: 'task' | 'comment' | 'project' | 'resync';
+  action?: 'created' | 'updated' | 'deleted' | 'bulk_created' | 'bulk_updated';
+  id?: number;
+  ids?: number[];
+  task_id?: number;
+  project_id?: number;
+  status?: string;
+}
+
+@Injectable({
+  providedIn: 'root'
+})
+export class EventsService {
+  private url = `${environment.apiUrl}events/`;
+  private events$: Observable<ChangeEvent>;
+
+  constructor(private zone: NgZone) {
+    // One EventSource shared by every subscriber, opened on first use and
+    // closed when the last one unsubscribes.
+    this.events$ = new Observable<ChangeEvent>(subscriber => {
+      const token = localStorage.getItem('access_token');
+      const source = new EventSource(`${this.url}?access_token=${token}`);
+      const forward = (message: MessageEvent) => {
+        const data = JSON.parse(message.data || '{}');
+        this.zone.run(() => subscriber.next({ ...data, type: message.type }));
+      };
+      ['task', 'comment', 'project', 'resync'].forEach(type => source.addEventListener(type, forward as EventListener));
+      return () => source.close();
+    }).pipe(share());
+  }
+
+  changes(): Observable<ChangeEvent> {
+    return this.events$;
+  }
+}
@@ -12,8 +12,14 @@ export class TaskService {
 
   constructor(private http: HttpClient) {}
 
+  getDashboardStats(): Observable<any> {
+    return this.http.get<any>(`${environment.apiUrl}dashboard/stats/`);
+  }
+
+  // `paginate=false` keeps the plain list response until the pages read the
+  // cursor-paginated `{ next, previous, results }` shape.
   getAllTasks(): Observable<Task[]> {
-    return this.http.get<Task[]>(this.apiUrl);
+    return this.http.get<Task[]>(`${this.apiUrl}?paginate=false`);
   }
 
   getTasksByProject(projectId: number): Observable<any[]> {
@@ -21,7 +27,7 @@ export class TaskService {
   }
 
   getTasksByUserOrAll(filters: { status?: string; due_date?: string; user_id?: string }): Observable<any> {
-    let params = new HttpParams();
+    let params = new HttpParams().set('paginate', 'false');
     
     if (filters.status) {
       params = params.set('status', filters.status);
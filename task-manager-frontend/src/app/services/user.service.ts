@@ -12,7 +12,7 @@ export class UserService {
   constructor(private http: HttpClient) {}
 
   getAllUsers(activeOnly: boolean = true): Observable<any[]> {
-    return this.http.get<any[]>(`${this.apiUrl}?all=${!activeOnly}`);
+    return this.http.get<any[]>(`${this.apiUrl}?all=${!activeOnly}&paginate=false`);
   }
   
 
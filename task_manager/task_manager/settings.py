@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
+from .databases import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +48,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Request counters and latency histograms for /metrics, see METRICS below
+    'tasks.metrics.MetricsMiddleware',
+    # Read replica routing, only active with DATABASE_REPLICA_URLS set
+    'tasks.routing.ReplicaRoutingMiddleware',
+    # Opt-in, see INSTRUMENTATION below
+    'tasks.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,9 +79,12 @@ CORS_ALLOW_METHODS = [
 CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
-    "x-requested-with"
+    "x-requested-with",
+    "if-none-match"
 ]
 
+CORS_EXPOSE_HEADERS = ["etag"]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -91,6 +103,68 @@ SIMPLE_JWT = {
     'TOKEN_BLACKLIST_ENABLED': True,
 }
 
+# Token-backed users for read-only requests (tasks/authentication.py). The
+# is_active/is_admin status cache is per process, so another worker may take
+# up to STATUS_TTL seconds to notice a deactivation.
+STATELESS_JWT = {
+    'ENABLED': os.environ.get('STATELESS_JWT_READS', 'false').lower() == 'true',
+    'STATUS_TTL': int(os.environ.get('STATELESS_JWT_STATUS_TTL', 30)),
+}
+
+# Refresh token blacklist checks through a per-process Bloom filter and LRU
+# (tasks/revocation.py). Another process's blacklisting is seen at once with
+# a shared cache (REDIS_URL), otherwise within SYNC_INTERVAL seconds. Run
+# `python manage.py purge_expired_tokens` from cron to keep the tables small.
+TOKEN_BLACKLIST_CACHE = {
+    'ENABLED': os.environ.get('TOKEN_BLACKLIST_CACHE', 'false').lower() == 'true',
+    'CAPACITY': int(os.environ.get('TOKEN_BLACKLIST_FILTER_CAPACITY', 1_000_000)),
+    'ERROR_RATE': float(os.environ.get('TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.01)),
+    'SYNC_INTERVAL': int(os.environ.get('TOKEN_BLACKLIST_SYNC_INTERVAL', 5)),
+}
+
+# Change feed at /api/events/ (tasks/events.py). The in-process broker only
+# reaches clients connected to the same process as the writer.
+EVENTS = {
+    'BACKEND': os.environ.get('EVENTS_BACKEND', 'tasks.events.InProcessBroker'),
+    'QUEUE_SIZE': 256,
+    'HEARTBEAT': 15,
+}
+
+# Per-request timing and SQL instrumentation (tasks/instrumentation.py):
+# Server-Timing headers plus request, slow-request and N+1 log lines.
+INSTRUMENTATION = {
+    'ENABLED': os.environ.get('REQUEST_INSTRUMENTATION', 'false').lower() == 'true',
+    'SERVER_TIMING': True,
+    'LOG_REQUESTS': os.environ.get('REQUEST_INSTRUMENTATION_LOG', 'true').lower() == 'true',
+    'N_PLUS_ONE_THRESHOLD': int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10)),
+    'SLOW_REQUEST_MS': int(os.environ.get('SLOW_REQUEST_MS', 500)),
+    'SLOW_SAMPLE_RATE': float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', 1.0)),
+}
+
+# Prometheus metrics at /metrics (tasks/metrics.py). Set METRICS_MULTIPROCESS_DIR
+# to a directory shared by the worker processes so any of them reports the
+# totals of all. /metrics is only served with METRICS_TOKEN set, which scrapers
+# send as a bearer token (or with DEBUG on, where no token is needed).
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'true').lower() == 'true',
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_MULTIPROCESS_DIR'),
+    'FLUSH_INTERVAL': int(os.environ.get('METRICS_FLUSH_INTERVAL', 5)),
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tasks.requests': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'tasks.slow_requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'tasks.n_plus_one': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 AUTH_USER_MODEL = 'tasks.User'
 
 ROOT_URLCONF = 'task_manager.urls'
@@ -117,11 +191,72 @@ WSGI_APPLICATION = 'task_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from DATABASE_URL, DATABASE_REPLICA_URLS and the DB_* variables
+# described in task_manager/databases.py; defaults to db.sqlite3.
+
+DATABASES = database_settings(BASE_DIR)
+
+# Replicas serve the list and retrieve actions of the task, project and
+# comment viewsets; a user who wrote reads from the primary for
+# STICKY_SECONDS (tasks/routing.py).
+DATABASE_ROUTERS = ['tasks.routing.ReplicaRouter']
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)),
+}
+
+# Group commit of comment inserts through one writer thread per process
+# (tasks/coalescing.py), for SQLite installs with many concurrent writers.
+WRITE_COALESCING = {
+    'ENABLED': os.environ.get('COMMENT_WRITE_COALESCING', 'false').lower() == 'true',
+    'MAX_BATCH': int(os.environ.get('COMMENT_WRITE_MAX_BATCH', 100)),
+    'MAX_DELAY_MS': float(os.environ.get('COMMENT_WRITE_MAX_DELAY_MS', 0)),
+}
+
+# Background jobs (tasks/jobs.py): search indexing, rollup recomputes after
+# bulk changes and exports. Off by default, which runs that work inline;
+# when on, run `python manage.py run_worker` alongside the web processes.
+JOBS = {
+    'ENABLED': os.environ.get('JOBS_ENABLED', 'false').lower() == 'true',
+    'MAX_ATTEMPTS': int(os.environ.get('JOBS_MAX_ATTEMPTS', 5)),
+    'RETRY_DELAY': float(os.environ.get('JOBS_RETRY_DELAY', 5)),
+    'STALE_AFTER': int(os.environ.get('JOBS_STALE_AFTER', 600)),
+    'HEARTBEAT_INTERVAL': float(os.environ.get('JOBS_HEARTBEAT_INTERVAL', 60)),
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The local-memory cache evicts least-recently-used entries once MAX_ENTRIES
+# is reached. It is private to each process, and the response cache and ETag
+# versions live in it, so runs with more than one worker must set REDIS_URL
+# (configure Redis with an allkeys-lru maxmemory-policy for the same
+# eviction; needs the `redis` package).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'TIMEOUT': 300,
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'task-manager',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# API response cache and ETags (tasks/caching.py)
+RESPONSE_CACHE = {
+    'ENABLED': os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true',
+    'ETAGS': os.environ.get('RESPONSE_ETAGS_ENABLED', 'true').lower() == 'true',
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
 }
 
 
@@ -143,6 +278,49 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing cost and the hasher new hashes are made with
+# (tasks/hashers.py). With PASSWORD_HASHER=scrypt, users move from PBKDF2 to
+# scrypt as they log in; the PBKDF2 hashers stay to verify the rest.
+PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 0)) or None,
+    'SCRYPT_WORK_FACTOR': int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 0)) or None,
+    'SCRYPT_PARALLELISM': int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', 0)) or None,
+}
+PASSWORD_HASHERS = [
+    'tasks.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'tasks.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+if os.environ.get('PASSWORD_HASHER', 'pbkdf2').lower() == 'scrypt':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(2))
+
+# Logins (tasks/logins.py): password verification in LOGIN_HASH_PROCESSES
+# worker processes per web process (0 verifies in the request thread), and
+# a per-account token bucket of LOGIN_BURST attempts refilled at
+# LOGIN_RATE_PER_MINUTE. Buckets are per process.
+AUTHENTICATION_BACKENDS = ['tasks.logins.PooledModelBackend']
+LOGIN = {
+    'HASH_PROCESSES': int(os.environ.get('LOGIN_HASH_PROCESSES', 0)),
+    'MAX_PENDING': int(os.environ.get('LOGIN_MAX_PENDING', 64)),
+    'RATE': float(os.environ.get('LOGIN_RATE_PER_MINUTE', 10)) / 60,
+    'BURST': int(os.environ.get('LOGIN_BURST', 10)),
+}
+
+# Bulk user import (tasks/provisioning.py): POST /api/users/import/ hashes
+# passwords in USER_IMPORT_HASH_PROCESSES processes (0 hashes in the request
+# thread); the import_users command takes --processes instead. Without the
+# job queue the request imports at most USER_IMPORT_MAX_REQUEST_ROWS rows;
+# with it, bodies are kept in USER_IMPORT_DIR (default: the system temporary
+# directory) until a worker imports them.
+PROVISIONING = {
+    'HASH_PROCESSES': int(os.environ.get('USER_IMPORT_HASH_PROCESSES', 0)),
+    'BATCH_SIZE': int(os.environ.get('USER_IMPORT_BATCH_SIZE', 500)),
+    'MAX_REQUEST_ROWS': int(os.environ.get('USER_IMPORT_MAX_REQUEST_ROWS', 50)),
+    'IMPORT_DIR': os.environ.get('USER_IMPORT_DIR'),
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
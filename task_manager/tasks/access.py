@@ -0,0 +1,120 @@
+"""
+Maintenance of the ProjectAccess and TaskAccess visibility tables that
+tasks/visibility.py reads.
+
+- The signal receivers grant and revoke rows as project members, project
+  creators and task assignees change.
+- Bulk task operations rebuild the rows of the tasks they touched, and
+  the bulk user import grants the memberships it adds.
+- `rebuild()` recomputes everything; the rebuild_access_index command runs
+  it, and so must anything that loads data without signals.
+"""
+from django.db import transaction
+
+from .models import Project, ProjectAccess, Task, TaskAccess
+
+ProjectMember = Project.assigned_users.through
+TaskAssignee = Task.assigned_to.through
+
+
+def grant_projects(user_ids, project_ids, reason=ProjectAccess.MEMBER):
+    ProjectAccess.objects.bulk_create(
+        [
+            ProjectAccess(user_id=user_id, project_id=project_id, reason=reason)
+            for user_id in user_ids for project_id in project_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def members_added(memberships):
+    """
+    Grant the (user_id, project_id) pairs of `memberships`, added to the
+    membership table in bulk.
+    """
+    ProjectAccess.objects.bulk_create(
+        [
+            ProjectAccess(user_id=user_id, project_id=project_id, reason=ProjectAccess.MEMBER)
+            for user_id, project_id in memberships
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def revoke_projects(user_ids, project_ids, reason=ProjectAccess.MEMBER):
+    ProjectAccess.objects.filter(user_id__in=user_ids, project_id__in=project_ids, reason=reason).delete()
+
+
+def project_saved(project, created):
+    """
+    Keep the creator row in step with `created_by`.
+    """
+    if not created:
+        ProjectAccess.objects.filter(project_id=project.pk, reason=ProjectAccess.CREATOR).exclude(
+            user_id=project.created_by_id
+        ).delete()
+    grant_projects([project.created_by_id], [project.pk], ProjectAccess.CREATOR)
+
+
+def grant_tasks(user_ids, task_ids):
+    TaskAccess.objects.bulk_create(
+        [TaskAccess(user_id=user_id, task_id=task_id) for user_id in user_ids for task_id in task_ids],
+        ignore_conflicts=True,
+    )
+
+
+def revoke_tasks(user_ids, task_ids):
+    TaskAccess.objects.filter(user_id__in=user_ids, task_id__in=task_ids).delete()
+
+
+def tasks_changed_in_bulk(task_ids):
+    with transaction.atomic():
+        TaskAccess.objects.filter(task_id__in=task_ids).delete()
+        TaskAccess.objects.bulk_create(task_rows(task_ids), batch_size=1000)
+
+
+def project_rows():
+    members = [
+        ProjectAccess(user_id=user_id, project_id=project_id, reason=ProjectAccess.MEMBER)
+        for project_id, user_id in ProjectMember.objects.values_list('project_id', 'user_id')
+    ]
+    creators = [
+        ProjectAccess(user_id=user_id, project_id=project_id, reason=ProjectAccess.CREATOR)
+        for project_id, user_id in Project.objects.values_list('id', 'created_by_id')
+    ]
+    return members + creators
+
+
+def task_rows(task_ids=None):
+    links = TaskAssignee.objects.all() if task_ids is None else TaskAssignee.objects.filter(task_id__in=task_ids)
+    return [TaskAccess(user_id=user_id, task_id=task_id) for task_id, user_id in links.values_list('task_id', 'user_id')]
+
+
+def rebuild():
+    """
+    Recompute both tables from the membership, creator and assignment data.
+    Returns the number of rows written.
+    """
+    with transaction.atomic():
+        ProjectAccess.objects.all().delete()
+        TaskAccess.objects.all().delete()
+        projects = ProjectAccess.objects.bulk_create(project_rows(), batch_size=1000)
+        tasks = TaskAccess.objects.bulk_create(task_rows(), batch_size=1000)
+    return len(projects) + len(tasks)
+
+
+def drift():
+    """
+    Rows missing from (`missing`) or left over in (`stale`) each table, as
+    {'projects': {'missing': set, 'stale': set}, 'tasks': {...}} of
+    (user_id, object_id[, reason]) tuples.
+    """
+    expected_projects = {(row.user_id, row.project_id, row.reason) for row in project_rows()}
+    stored_projects = set(ProjectAccess.objects.values_list('user_id', 'project_id', 'reason'))
+    expected_tasks = {(row.user_id, row.task_id) for row in task_rows()}
+    stored_tasks = set(TaskAccess.objects.values_list('user_id', 'task_id'))
+    return {
+        'projects': {'missing': expected_projects - stored_projects, 'stale': stored_projects - expected_projects},
+        'tasks': {'missing': expected_tasks - stored_tasks, 'stale': stored_tasks - expected_tasks},
+    }
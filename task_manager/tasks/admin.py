@@ -1,6 +1,20 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Project, Task, Comment
+from . import search
+
+
+class FullTextSearchMixin:
+    """
+    Answers the admin search box from the full-text index instead of
+    `ILIKE '%term%'` scans over `search_fields`.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search.parse_terms(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=search.matching_object_ids(self.search_kind, search_term)), False
 
 # Custom UserAdmin to display custom fields
 class CustomUserAdmin(UserAdmin):
@@ -17,25 +31,28 @@ class CustomUserAdmin(UserAdmin):
 admin.site.register(User, CustomUserAdmin)
 
 # Register Project model
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('name', 'created_by', 'created_at')  # Fields to display
     list_filter = ('created_at',)  # Add filters
     search_fields = ('name', 'description')  # Enable search by these fields
+    search_kind = 'project'  # Served from the full-text index
 
 admin.site.register(Project, ProjectAdmin)
 
 # Register Task model
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'project', 'due_date', 'priority', 'status')  # Fields to display
     list_filter = ('priority', 'status', 'project')  # Add filters
     search_fields = ('title', 'description')  # Enable search by these fields
+    search_kind = 'task'  # Served from the full-text index
 
 admin.site.register(Task, TaskAdmin)
 
 # Register Comment model
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('task', 'user', 'created_at')  # Fields to display
     list_filter = ('created_at', 'user')  # Add filters
     search_fields = ('text',)  # Enable search by these fields
+    search_kind = 'comment'  # Served from the full-text index
 
 admin.site.register(Comment, CommentAdmin)
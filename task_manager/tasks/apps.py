@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects the model signal receivers)
+        from . import metrics  # noqa: F401  (counts database connections from the first one)
+        from . import instrumentation  # noqa: F401  (observes queries on every connection)
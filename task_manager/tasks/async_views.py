@@ -0,0 +1,190 @@
+"""
+Async versions of the hot read endpoints, served under /api/async/ with the
+same query parameters, visibility rules and response bodies as their
+TaskViewSet/CommentViewSet counterparts.
+
+DRF views are sync only, so these are plain Django async views that reuse
+the serializers and paginators. Rows are loaded with the async ORM and every
+relation the serializers read is prefetched, so serializing never queries.
+They do not go through the response cache.
+
+The change feed lives here too, as it holds its connection open and so only
+works under the ASGI server.
+"""
+import functools
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import events
+from .authentication import StatelessJWTAuthentication
+from .models import Comment, Task
+from .pagination import CommentPagination, TaskPagination
+from .serializers import CommentSerializer, FastTaskSerializer, TaskSerializer
+from .visibility import visible_tasks
+
+ITERATOR_CHUNK_SIZE = 500
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def async_api_view(view=None, token_query_param=None):
+    """
+    Authenticate the request with StatelessJWTAuthentication and hand the view
+    a DRF Request (for `query_params`) plus the request user. API exceptions
+    become JSON error responses, as in DRF's exception handler.
+    """
+    if view is None:
+        return functools.partial(async_api_view, token_query_param=token_query_param)
+    authenticator = StatelessJWTAuthentication()
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+        try:
+            result = await authenticator.aauthenticate(request, query_param=token_query_param)
+            if result is None:
+                return json_response(
+                    {'detail': 'Authentication credentials were not provided.'}, status.HTTP_401_UNAUTHORIZED
+                )
+            return await view(Request(request), result[0], *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(data, exc.status_code)
+
+    return wrapper
+
+
+async def fetch_all(queryset):
+    return [obj async for obj in queryset.aiterator(chunk_size=ITERATOR_CHUNK_SIZE)]
+
+
+async def paginated_response(queryset, request, paginator_class, serializer_class):
+    paginator = paginator_class()
+    page = await paginator.apaginate_queryset(queryset, request)
+    if page is None:
+        return json_response(serializer_class(await fetch_all(queryset), many=True).data)
+    return json_response(paginator.get_paginated_response(serializer_class(page, many=True).data).data)
+
+
+@async_api_view
+async def task_list(request, user):
+    """
+    Same as GET /api/tasks/.
+    """
+    queryset = TaskSerializer.setup_eager_loading(visible_tasks(user))
+    return await paginated_response(queryset, request, TaskPagination, FastTaskSerializer)
+
+
+@async_api_view
+async def tasks_by_project(request, user):
+    """
+    Same as GET /api/tasks/by-project/.
+    """
+    project_id = request.query_params.get('project_id')
+    if not project_id:
+        return json_response({"error": "Project ID is required"}, status.HTTP_400_BAD_REQUEST)
+
+    tasks = visible_tasks(user).filter(project_id=project_id)
+    tasks = await fetch_all(TaskSerializer.setup_eager_loading(tasks))
+    return json_response(FastTaskSerializer(tasks, many=True).data)
+
+
+@async_api_view
+async def tasks_by_user(request, user):
+    """
+    Same as GET /api/tasks/by-user/.
+    """
+    tasks = visible_tasks(user)
+
+    status_filter = request.query_params.get('status')
+    due_date = request.query_params.get('due_date')
+    user_id = request.query_params.get('user_id')
+
+    if status_filter:
+        tasks = tasks.filter(status=status_filter)
+    if due_date:
+        tasks = tasks.filter(due_date=due_date)
+    if user_id:
+        try:
+            tasks = tasks.filter(assigned_to=int(user_id.strip('/')))
+        except ValueError:
+            return json_response({"error": "Invalid user ID format"}, status.HTTP_400_BAD_REQUEST)
+
+    queryset = TaskSerializer.setup_eager_loading(tasks)
+    return await paginated_response(queryset, request, TaskPagination, FastTaskSerializer)
+
+
+@async_api_view
+async def comment_list(request, user):
+    """
+    Same as GET /api/comments/.
+    """
+    queryset = CommentSerializer.setup_eager_loading(Comment.objects.all())
+    task_id = request.query_params.get('task')
+    if task_id:
+        queryset = queryset.filter(task_id=task_id)
+    return await paginated_response(queryset, request, CommentPagination, CommentSerializer)
+
+
+@async_api_view
+async def comment_count(request, user):
+    """
+    Same as GET /api/comments/count/.
+    """
+    task_id = request.query_params.get("task_id")
+    if not task_id:
+        return json_response({"error": "task_id is required"}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        count = await Task.objects.values_list('comment_count', flat=True).aget(pk=task_id)
+    except (Task.DoesNotExist, ValueError):
+        count = 0
+    return json_response({"task_id": task_id, "comment_count": count})
+
+
+@async_api_view(token_query_param='access_token')
+async def change_feed(request, user):
+    """
+    Server-sent events for the tasks, comments and projects `user` can see.
+    - Events are `task`, `comment` and `project` messages, plus `resync` when
+      the client fell too far behind and should refetch.
+    - A comment line is sent every EVENTS['HEARTBEAT'] seconds of silence to
+      keep proxies from closing the connection.
+    - The token may be passed as `?access_token=` since EventSource cannot set
+      headers.
+    """
+    if not isinstance(request._request, ASGIRequest):
+        return json_response(
+            {"error": "The change feed needs the ASGI server (task_manager.asgi)."}, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    topics = events.topics_for_user(user)
+    heartbeat = events.get_setting('HEARTBEAT')
+
+    async def stream():
+        subscription = events.get_broker().subscribe(topics)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                message = await subscription.get(heartbeat)
+                if message is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield message
+                if message is events.RESYNC:
+                    return
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
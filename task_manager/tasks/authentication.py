@@ -0,0 +1,158 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+DEFAULTS = {
+    'ENABLED': False,
+    'STATUS_TTL': 30,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'STATELESS_JWT', {}).get(name, DEFAULTS[name])
+
+
+class UserStatusCache:
+    """
+    Small in-process TTL cache of `(is_active, is_admin)` per user id. It is
+    what lets a token-backed request skip the User lookup while still
+    noticing deactivations and role changes within `STATUS_TTL` seconds (or
+    immediately in the process that made the change).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, status):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + get_setting('STATUS_TTL'), status)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_status_cache = UserStatusCache()
+
+
+def get_user_status(user_id):
+    """
+    `(is_active, is_admin)` for `user_id`, or None if the user does not exist.
+    """
+    status = user_status_cache.get(user_id)
+    if status is None:
+        status = User.objects.filter(pk=user_id).values_list('is_active', 'is_admin').first()
+        if status is not None:
+            user_status_cache.set(user_id, status)
+    return status
+
+
+async def aget_user_status(user_id, use_cache=True):
+    """
+    Async counterpart of get_user_status. With `use_cache` off the row is
+    always read, matching what JWTAuthentication would see.
+    """
+    status = user_status_cache.get(user_id) if use_cache else None
+    if status is None:
+        status = await User.objects.filter(pk=user_id).values_list('is_active', 'is_admin').afirst()
+        if status is not None:
+            user_status_cache.set(user_id, status)
+    return status
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the access token claims (`username`, `email` and
+    `is_admin` are embedded by CustomTokenObtainPairSerializer). `is_admin`
+    is taken from the status cache rather than the token, so a demotion does
+    not wait for the token to expire.
+    """
+
+    def __init__(self, token, is_admin):
+        super().__init__(token)
+        self.is_admin = is_admin
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that does not load the User row for read-only requests.
+    - Safe methods get a ClaimsUser: zero queries while the user's status is cached.
+    - Writes, and everything when STATELESS_JWT['ENABLED'] is off, get the
+      database-backed user exactly like JWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        if not get_setting('ENABLED') or request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_claims_user(validated_token), validated_token
+
+    async def aauthenticate(self, request, query_param=None):
+        """
+        Authentication for the async views: always a ClaimsUser, since loading
+        the User model instance would block. The status lookup only skips the
+        cache when STATELESS_JWT['ENABLED'] is off.
+        - `query_param` also accepts the token from the query string, for
+          clients such as EventSource that cannot send headers.
+        """
+        header = self.get_header(request)
+        if header is not None:
+            raw_token = self.get_raw_token(header)
+        elif query_param:
+            raw_token = request.GET.get(query_param, '').encode() or None
+        else:
+            raw_token = None
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        status = await aget_user_status(self.get_token_user_id(validated_token), use_cache=get_setting('ENABLED'))
+        return self.claims_user_from_status(validated_token, status), validated_token
+
+    def get_token_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def get_claims_user(self, validated_token):
+        status = get_user_status(self.get_token_user_id(validated_token))
+        return self.claims_user_from_status(validated_token, status)
+
+    def claims_user_from_status(self, validated_token, status):
+        if status is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        is_active, is_admin = status
+        if not is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return ClaimsUser(validated_token, is_admin=is_admin)
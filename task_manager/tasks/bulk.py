@@ -0,0 +1,211 @@
+"""
+Batch versions of the task write paths. Each operation checks permissions
+for the whole batch with a couple of set queries, writes with bulk
+statements inside one transaction and reports a result per item.
+
+Bulk statements bypass the model signals, so every operation finishes by
+sending `tasks_bulk_changed` for the receivers in tasks/signals.py.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, Task, User
+from .serializers import TaskSerializer
+from .signals import tasks_bulk_changed
+from .visibility import member_project_ids
+
+MAX_BULK_ITEMS = 5000
+
+TaskAssignee = Task.assigned_to.through
+
+
+class BulkError(Exception):
+    """
+    The request as a whole is invalid (as opposed to a single item).
+    """
+
+
+def parse_ids(values, name):
+    if not isinstance(values, list) or not values:
+        raise BulkError(f'{name} must be a non-empty list of ids.')
+    if len(values) > MAX_BULK_ITEMS:
+        raise BulkError(f'At most {MAX_BULK_ITEMS} items per request.')
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise BulkError(f'{name} must only contain integer ids.')
+
+
+def writable_project_ids(user, project_ids):
+    """
+    Projects among `project_ids` whose tasks `user` may change: all of them
+    for admins, otherwise the ones the user is assigned to.
+    """
+    project_ids = set(project_ids)
+    if user.is_admin:
+        return set(Project.objects.filter(pk__in=project_ids).values_list('pk', flat=True))
+    return member_project_ids(user, project_ids)
+
+
+def existing_user_ids(user_ids):
+    return set(User.objects.filter(pk__in=set(user_ids)).values_list('pk', flat=True))
+
+
+def load_writable_tasks(user, task_ids):
+    """
+    Split `task_ids` into the tasks `user` may change ({id: project_id}) and
+    per-item errors for the rest.
+    """
+    project_of = dict(Task.objects.filter(pk__in=set(task_ids)).values_list('pk', 'project_id'))
+    allowed_projects = writable_project_ids(user, project_of.values())
+    writable, errors = {}, {}
+    for task_id in task_ids:
+        if task_id not in project_of:
+            errors[task_id] = 'Task not found.'
+        elif project_of[task_id] not in allowed_projects:
+            errors[task_id] = 'Only admins or project managers can update tasks.'
+        else:
+            writable[task_id] = project_of[task_id]
+    return writable, errors
+
+
+def id_results(task_ids, writable, errors, ok_status):
+    results = []
+    for task_id in task_ids:
+        if task_id in writable:
+            results.append({'id': task_id, 'status': ok_status})
+        else:
+            results.append({'id': task_id, 'status': 'error', 'error': errors[task_id]})
+    return results
+
+
+def bulk_create_tasks(user, payloads):
+    """
+    Create many tasks at once. Each payload takes the same fields as
+    `POST /api/tasks/`, including `project` and `assigned_to`.
+    """
+    if not isinstance(payloads, list) or not payloads:
+        raise BulkError('tasks must be a non-empty list.')
+    if len(payloads) > MAX_BULK_ITEMS:
+        raise BulkError(f'At most {MAX_BULK_ITEMS} items per request.')
+
+    results = [None] * len(payloads)
+    candidates = []
+    for index, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            results[index] = {'index': index, 'status': 'error', 'error': 'Each task must be an object.'}
+            continue
+        if not payload.get('project'):
+            results[index] = {'index': index, 'status': 'error', 'error': 'Project ID is required to create a task.'}
+            continue
+        serializer = TaskSerializer(data=payload)
+        try:
+            project_id = int(payload.get('project'))
+            assignees = [int(user_id) for user_id in payload.get('assigned_to') or []]
+        except (TypeError, ValueError):
+            results[index] = {'index': index, 'status': 'error', 'error': 'project and assigned_to must be ids.'}
+            continue
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'error': serializer.errors}
+            continue
+        candidates.append((index, project_id, assignees, serializer.validated_data))
+
+    allowed_projects = writable_project_ids(user, [project_id for _, project_id, _, _ in candidates])
+    known_users = existing_user_ids(user_id for _, _, assignees, _ in candidates for user_id in assignees)
+
+    to_create = []
+    for index, project_id, assignees, data in candidates:
+        if project_id not in allowed_projects:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Project not found or not writable.'}
+        elif not set(assignees) <= known_users:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Unknown user in assigned_to.'}
+        else:
+            to_create.append((index, assignees, Task(project_id=project_id, **data)))
+
+    with transaction.atomic():
+        created = Task.objects.bulk_create([task for _, _, task in to_create])
+        TaskAssignee.objects.bulk_create(
+            [
+                TaskAssignee(task_id=task.pk, user_id=user_id)
+                for (_, assignees, _), task in zip(to_create, created)
+                for user_id in set(assignees)
+            ],
+            ignore_conflicts=True,
+        )
+        tasks_bulk_changed.send(
+            sender=Task,
+            task_ids=[task.pk for task in created],
+            project_ids={task.project_id for task in created},
+            user_ids={user_id for _, assignees, _ in to_create for user_id in assignees},
+            created=True,
+        )
+
+    for (index, _, _), task in zip(to_create, created):
+        results[index] = {'index': index, 'status': 'created', 'id': task.pk}
+    return results
+
+
+def bulk_update_status(user, task_ids, new_status):
+    """
+    Move many tasks to `new_status` with a single UPDATE.
+    """
+    task_ids = parse_ids(task_ids, 'ids')
+    if new_status not in dict(Task.STATUS_CHOICES):
+        raise BulkError(f'"{new_status}" is not a valid status.')
+
+    writable, errors = load_writable_tasks(user, task_ids)
+    with transaction.atomic():
+        Task.objects.filter(pk__in=writable.keys()).update(status=new_status, updated_at=timezone.now())
+        tasks_bulk_changed.send(
+            sender=Task,
+            task_ids=list(writable),
+            project_ids=set(writable.values()),
+            user_ids=set(),
+            created=False,
+        )
+    return id_results(task_ids, writable, errors, 'updated')
+
+
+def bulk_reassign(user, task_ids, user_ids, mode='set'):
+    """
+    Change the assignees of many tasks.
+    - `set` replaces the assignees with `user_ids`.
+    - `add` and `remove` only add or take away `user_ids`.
+    """
+    task_ids = parse_ids(task_ids, 'ids')
+    if not isinstance(user_ids, list):
+        raise BulkError('assigned_to must be a list of user ids.')
+    try:
+        user_ids = {int(user_id) for user_id in user_ids}
+    except (TypeError, ValueError):
+        raise BulkError('assigned_to must only contain integer ids.')
+    if mode not in ('set', 'add', 'remove'):
+        raise BulkError('mode must be one of "set", "add" or "remove".')
+    unknown = user_ids - existing_user_ids(user_ids)
+    if unknown:
+        raise BulkError(f'Unknown user ids: {sorted(unknown)}')
+
+    writable, errors = load_writable_tasks(user, task_ids)
+    with transaction.atomic():
+        links = TaskAssignee.objects.filter(task_id__in=writable.keys())
+        touched_users = set(user_ids)
+        if mode == 'set':
+            stale = links.exclude(user_id__in=user_ids)
+            touched_users |= set(stale.values_list('user_id', flat=True))
+            stale.delete()
+        elif mode == 'remove':
+            links.filter(user_id__in=user_ids).delete()
+        if mode in ('set', 'add'):
+            TaskAssignee.objects.bulk_create(
+                [TaskAssignee(task_id=task_id, user_id=user_id) for task_id in writable for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+        Task.objects.filter(pk__in=writable.keys()).update(updated_at=timezone.now())
+        tasks_bulk_changed.send(
+            sender=Task,
+            task_ids=list(writable),
+            project_ids=set(writable.values()),
+            user_ids=touched_users,
+            created=False,
+        )
+    return id_results(task_ids, writable, errors, 'updated')
@@ -0,0 +1,194 @@
+import functools
+import hashlib
+import itertools
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import routing
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ETAGS': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'KEY_PREFIX': 'rc',
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class ResponseCache:
+    """
+    Per-user, per-URL cache of API responses.
+
+    Each cached response depends on a few "scopes" (for example `tasks`,
+    `project:4` or `user:7`). Every scope has a version counter that is part of
+    the cache key, so bumping a scope's version makes every response that
+    depends on it unreachable at once. Old entries are never deleted
+    explicitly; they age out through the backend's TTL and LRU culling.
+
+    The same key doubles as a strong ETag: it only changes when one of the
+    versions the response depends on does.
+    """
+
+    def __init__(self):
+        # itertools.count increments atomically under the GIL, so the hot path
+        # never takes a lock.
+        self._hits = itertools.count()
+        self._misses = itertools.count()
+        self._hit_total = 0
+        self._miss_total = 0
+
+    @property
+    def backend(self):
+        return caches[get_setting('ALIAS')]
+
+    def version_key(self, scope):
+        return f'{get_setting("KEY_PREFIX")}:v:{scope}'
+
+    def versions(self, scopes):
+        """
+        Current version of each scope, initializing missing ones. New versions
+        start from the clock so a counter lost to eviction never repeats.
+        """
+        keys = [self.version_key(scope) for scope in scopes]
+        found = self.backend.get_many(keys)
+        versions = []
+        for key in keys:
+            if key not in found:
+                self.backend.add(key, time.time_ns() // 1000, timeout=None)
+                found[key] = self.backend.get(key)
+            versions.append(found[key])
+        return versions
+
+    def bump(self, *scopes):
+        for scope in set(scopes):
+            key = self.version_key(scope)
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.set(key, time.time_ns() // 1000, timeout=None)
+
+    def response_key(self, request, scopes):
+        raw = '|'.join([
+            str(request.user.pk),
+            request.get_host(),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            ','.join(scopes),
+            ','.join(str(version) for version in self.versions(scopes)),
+        ])
+        return f'{get_setting("KEY_PREFIX")}:r:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        cached = self.backend.get(key)
+        if cached is None:
+            self._miss_total = next(self._misses) + 1
+        else:
+            self._hit_total = next(self._hits) + 1
+        return cached
+
+    def set(self, key, status_code, data):
+        self.backend.set(key, (status_code, data), timeout=get_setting('TIMEOUT'))
+
+    def stats(self):
+        hits, misses = self._hit_total, self._miss_total
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def invalidate(*scopes):
+    """
+    Bump the given scopes once the current transaction commits, so a reader
+    cannot cache the pre-commit state under the new version. This runs even
+    with the response cache disabled because ETags are built from the same
+    versions.
+    """
+    if not scopes:
+        return
+    transaction.on_commit(lambda: response_cache.bump(*scopes))
+
+
+def task_scopes(project_ids):
+    return ['tasks'] + [f'project:{project_id}' for project_id in project_ids]
+
+
+def project_scopes(project_ids):
+    return ['projects'] + [f'project:{project_id}' for project_id in project_ids]
+
+
+def user_scopes(user_ids):
+    return [f'user:{user_id}' for user_id in user_ids]
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in header.split(',')]
+
+
+def cache_response(view_method):
+    """
+    Serve a GET handler of a viewset from the response cache and answer
+    conditional requests. The viewset declares what the response depends on in
+    `get_cache_scopes()`; returning None skips both for that request. Every
+    response also depends on the requesting user's own `user:<id>` scope.
+
+    - `If-None-Match` with the current ETag gets a 304 before any query or
+      serializer runs.
+    - Otherwise a cached copy is returned when there is one.
+    - Responses read from a replica are not cached.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        use_cache, use_etags = get_setting('ENABLED'), get_setting('ETAGS')
+        if request.method != 'GET' or not (use_cache or use_etags):
+            return view_method(self, request, *args, **kwargs)
+        scopes = self.get_cache_scopes()
+        if scopes is None:
+            return view_method(self, request, *args, **kwargs)
+
+        key = response_cache.response_key(request, scopes + [f'user:{request.user.pk}'])
+        etag = '"%s"' % key.rsplit(':', 1)[-1]
+        if use_etags and etag_matches(request, etag):
+            response = Response(status=304)
+            response['ETag'] = etag
+            return response
+
+        cached = response_cache.get(key) if use_cache else None
+        if cached is not None:
+            status_code, data = cached
+            response = Response(data, status=status_code)
+            response['X-Cache'] = 'HIT'
+        else:
+            response = view_method(self, request, *args, **kwargs)
+            # A replica may not have caught up with the write that bumped the
+            # versions yet, so its answer is neither stored nor tagged.
+            lagging = routing.using_replica()
+            if use_cache and not lagging and response.status_code == 200 and isinstance(response, Response):
+                response_cache.set(key, response.status_code, response.data)
+            response['X-Cache'] = 'MISS'
+            use_etags = use_etags and not lagging
+        if use_etags and response.status_code == 200:
+            response['ETag'] = etag
+            # Let browsers keep the body but revalidate it on every use
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
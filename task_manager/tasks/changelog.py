@@ -0,0 +1,133 @@
+"""
+Change log behind GET /api/sync/: writers append ChangeLogEntry rows from the
+signal receivers, readers ask for everything after their cursor and get the
+current state of what changed plus tombstones for what they can no longer
+see.
+
+Readers must never move their cursor past an entry that commits later.
+Postgres hands out ids when rows are inserted, not when they commit, so
+id 11 can be visible before id 10. Entries are therefore read in
+(txid, id) order, and only those of transactions older than every one
+still running (below the snapshot's xmin), which can no longer change.
+Writers take no lock. A long transaction holds back the entries written
+after it started until it ends. SQLite commits one writer at a time, so
+there every txid is 0 and the order is plain id order.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q, Subquery
+from django.db.models.expressions import RawSQL
+
+from .models import ChangeLogEntry
+from .serializers import CommentSerializer, ProjectSerializer, TaskSerializer, UserSerializer
+from .visibility import visible_comments, visible_projects, visible_tasks, visible_users
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+KINDS = {
+    # kind: (visible queryset factory, serializer, response key)
+    'task': (visible_tasks, TaskSerializer, 'tasks'),
+    'project': (visible_projects, ProjectSerializer, 'projects'),
+    'comment': (visible_comments, CommentSerializer, 'comments'),
+    'user': (visible_users, UserSerializer, 'users'),
+}
+
+# Kinds whose rows vanish from a reader's view without a delete or revoke
+# entry (users are soft-deleted by deactivation).
+TOMBSTONE_WHEN_HIDDEN = {'user'}
+
+
+def record(kind, object_ids, action='upsert'):
+    entries = [ChangeLogEntry(kind=kind, object_id=object_id, action=action) for object_id in object_ids]
+    if entries:
+        ChangeLogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def record_revokes(kind, object_ids, user_ids):
+    """
+    Record that `user_ids` may have lost access to `object_ids`. Readers who
+    can still see an object at sync time ignore the entry.
+    """
+    entries = [
+        ChangeLogEntry(kind=kind, object_id=object_id, action='revoke', user_id=user_id)
+        for object_id in object_ids
+        for user_id in user_ids
+    ]
+    if entries:
+        ChangeLogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def settled_entries():
+    """
+    Entries of transactions that ended before every running one started, in
+    cursor order: no entry can still commit ahead of them.
+    """
+    entries = ChangeLogEntry.objects.all()
+    if connection.vendor == 'postgresql':
+        entries = entries.filter(txid__lt=RawSQL('pg_snapshot_xmin(pg_current_snapshot())::text::bigint', []))
+    return entries.order_by('txid', 'id')
+
+
+def latest_cursor():
+    return settled_entries().reverse().values_list('id', flat=True).first() or 0
+
+
+def cursor_expired(cursor):
+    """
+    True when the entry at `cursor` was pruned, so entries after it may have
+    been too and the diff would be incomplete.
+    """
+    return cursor != 0 and not ChangeLogEntry.objects.filter(pk=cursor).exists()
+
+
+def changes_since(user, cursor, limit=DEFAULT_LIMIT):
+    """
+    Everything `user` needs to bring a copy taken at `cursor` up to date, in
+    at most `limit` log entries:
+    {"cursor", "has_more", "reset", "tasks", "projects", "comments", "users",
+    "tombstones": {"tasks": [ids], ...}}.
+    """
+    after = Q(id__gt=cursor)
+    if cursor:
+        txid = Subquery(ChangeLogEntry.objects.filter(pk=cursor).values('txid'))
+        after = Q(txid__gt=txid) | Q(txid=txid, id__gt=cursor)
+    entries = list(
+        settled_entries()
+        .filter(after)
+        .filter(Q(user_id__isnull=True) | Q(user_id=user.pk))
+        .values_list('id', 'kind', 'object_id', 'action')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = defaultdict(dict)  # kind -> {id: last action}
+    revoked = defaultdict(set)
+    for _, kind, object_id, action in entries:
+        latest[kind][object_id] = action
+        if action == 'revoke':
+            revoked[kind].add(object_id)
+
+    result = {
+        'cursor': entries[-1][0] if entries else cursor,
+        'has_more': has_more,
+        'reset': False,
+        'tombstones': {},
+    }
+    for kind, (visible, serializer_class, key) in KINDS.items():
+        actions = latest.get(kind, {})
+        tombstones = [object_id for object_id, action in actions.items() if action == 'delete']
+        candidates = [object_id for object_id, action in actions.items() if action != 'delete']
+        rows = []
+        if candidates:
+            queryset = serializer_class.setup_eager_loading(visible(user).filter(pk__in=candidates))
+            rows = list(queryset.order_by('pk'))
+            seen = {row.pk for row in rows}
+            tombstones.extend(
+                object_id for object_id in candidates
+                if object_id not in seen and (object_id in revoked[kind] or kind in TOMBSTONE_WHEN_HIDDEN)
+            )
+        result[key] = serializer_class(rows, many=True).data
+        result['tombstones'][key] = sorted(tombstones)
+    return result
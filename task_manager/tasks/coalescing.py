@@ -0,0 +1,124 @@
+"""
+Group commit for high-frequency inserts, switched on with
+WRITE_COALESCING['ENABLED'].
+
+Request threads hand their write to one writer thread per process and
+wait for it. The writer takes everything queued at that moment (waiting
+up to MAX_DELAY_MS for more when set) and runs it in a single
+transaction, one savepoint per write so a failing write only fails its
+own request. On SQLite this turns many competing BEGIN/COMMIT pairs, each
+fighting over the database lock, into one lock acquisition and one sync
+per batch, and nothing is added to a write that arrives alone.
+
+Signal receivers run in the writer thread inside the batch's transaction,
+so the change log and counters stay atomic with each row; on_commit
+callbacks (cache invalidation, events) run before the waiting requests
+are released.
+"""
+import contextvars
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_BATCH': 100,
+    'MAX_DELAY_MS': 0,
+    'TIMEOUT': 30,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'WRITE_COALESCING', {}).get(name, DEFAULTS[name])
+
+
+class PendingWrite:
+    def __init__(self, write):
+        self.write = write
+        # The caller's context, so the database router still sees the
+        # request the write belongs to
+        self.context = contextvars.copy_context()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteCoalescer:
+    def __init__(self, name):
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, write):
+        """
+        Run `write()` in the writer thread and return its result (or raise
+        its exception). A write still queued after TIMEOUT seconds raises
+        TimeoutError in the caller but may yet be committed.
+        """
+        pending = PendingWrite(write)
+        self.ensure_writer()
+        self._queue.put(pending)
+        if not pending.done.wait(get_setting('TIMEOUT')):
+            raise TimeoutError(f'{self.name} write not committed within {get_setting("TIMEOUT")}s')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name=f'{self.name}-writer', daemon=True)
+                self._thread.start()
+
+    def next_batch(self):
+        batch = [self._queue.get()]
+        max_batch = get_setting('MAX_BATCH')
+        deadline = time.monotonic() + get_setting('MAX_DELAY_MS') / 1000
+        while len(batch) < max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            self.write_batch(self.next_batch())
+
+    def write_batch(self, batch):
+        # The writer keeps its connection for its whole life, whatever
+        # CONN_MAX_AGE says, as long as it stays usable
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+        try:
+            with transaction.atomic():
+                for pending in batch:
+                    try:
+                        with transaction.atomic():
+                            pending.result = pending.context.run(pending.write)
+                    except Exception as exc:
+                        pending.error = exc
+        except Exception as exc:
+            # The commit itself failed, so none of the batch was written
+            for pending in batch:
+                pending.result, pending.error = None, pending.error or exc
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+
+comment_writes = WriteCoalescer('comments')
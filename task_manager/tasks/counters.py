@@ -0,0 +1,56 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery
+
+from .caching import invalidate, task_scopes
+from .models import Comment, Task
+
+
+def latest_comment_at():
+    return Subquery(
+        Comment.objects.filter(task_id=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def comment_added(task_id, created_at):
+    """
+    Count a new comment in a single UPDATE, so concurrent posts never lose
+    an increment.
+    """
+    Task.objects.filter(pk=task_id).update(comment_count=F('comment_count') + 1, last_comment_at=created_at)
+
+
+def comment_removed(task_id):
+    Task.objects.filter(pk=task_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        last_comment_at=latest_comment_at(),
+    )
+
+
+def reconcile_comment_counters(task_ids):
+    """
+    Recompute the counters of the given tasks from the comments table and
+    fix the ones that drifted. Returns the number of tasks repaired.
+    Run it inside a transaction: the task rows are locked before counting so
+    concurrent increments queue behind the repair instead of being lost.
+    """
+    tasks = list(
+        Task.objects.select_for_update()
+        .filter(pk__in=task_ids)
+        .only('id', 'project_id', 'comment_count', 'last_comment_at')
+    )
+    actual = {
+        row['task_id']: (row['count'], row['latest'])
+        for row in Comment.objects.filter(task_id__in=task_ids)
+        .order_by()
+        .values('task_id')
+        .annotate(count=Count('id'), latest=Max('created_at'))
+    }
+    drifted = []
+    for task in tasks:
+        count, latest = actual.get(task.pk, (0, None))
+        if task.comment_count != count or task.last_comment_at != latest:
+            task.comment_count, task.last_comment_at = count, latest
+            drifted.append(task)
+    Task.objects.bulk_update(drifted, ['comment_count', 'last_comment_at'])
+    if drifted:
+        invalidate('comments', *task_scopes({task.project_id for task in drifted}))
+    return len(drifted)
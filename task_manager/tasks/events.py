@@ -0,0 +1,290 @@
+"""
+Change events pushed to clients by the feed at GET /api/events/.
+
+Writes publish small events (`{"type": "task", "action": "updated", "id": 3,
+...}`) to topics: `admins` for every admin and `user:<id>` for the users who
+can see the object under the ProjectViewSet/TaskViewSet rules. Each feed
+connection subscribes to its own topics, so the audience of an event is
+worked out once when it is published, never per subscriber.
+
+The broker is chosen with EVENTS['BACKEND']. InProcessBroker only reaches
+connections served by the same process; deployments with several workers
+need a backend that fans out across processes (e.g. over Redis pub/sub)
+implementing Broker.
+
+Working out the audience takes a query, which is skipped while the broker
+has no subscribers, so writes cost nothing extra when no feed is open.
+"""
+import abc
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Project, Task
+
+DEFAULTS = {
+    'BACKEND': 'tasks.events.InProcessBroker',
+    'QUEUE_SIZE': 256,
+    'HEARTBEAT': 15,
+}
+
+ADMINS_TOPIC = 'admins'
+
+# Sent instead of further events when a subscriber falls QUEUE_SIZE events
+# behind; the client should refetch what it shows and reconnect.
+RESYNC = 'event: resync\ndata: {}\n\n'
+
+
+def get_setting(name):
+    return getattr(settings, 'EVENTS', {}).get(name, DEFAULTS[name])
+
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+
+def topics_for_user(user):
+    topics = [user_topic(user.pk)]
+    if user.is_admin:
+        topics.append(ADMINS_TOPIC)
+    return topics
+
+
+def format_event(seq, event):
+    data = json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {seq}\nevent: {event["type"]}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """
+    Queue of formatted events for one feed connection. Only ever touched from
+    the event loop the connection runs on.
+    """
+
+    def __init__(self, broker, topics):
+        self.broker = broker
+        self.topics = list(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=get_setting('QUEUE_SIZE'))
+        self.overflowed = False
+
+    def deliver(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout):
+        """
+        Next message, or None after `timeout` seconds without one.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker(abc.ABC):
+    """
+    Interface of an event backend.
+    """
+
+    @abc.abstractmethod
+    def subscribe(self, topics):
+        """
+        Return a Subscription to `topics` for the running event loop.
+        """
+
+    @abc.abstractmethod
+    def unsubscribe(self, subscription):
+        pass
+
+    @abc.abstractmethod
+    def publish(self, topics, event):
+        pass
+
+    def has_subscribers(self):
+        """
+        Whether any connection may be listening. A backend that cannot tell
+        (subscribers in other processes) keeps answering True.
+        """
+        return True
+
+
+class InProcessBroker(Broker):
+    """
+    Fan-out within the current process. An event is formatted once and handed
+    to each event loop with subscribers in a single call_soon_threadsafe, so
+    publishing from a request thread stays cheap with thousands of
+    subscribers.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def subscribe(self, topics):
+        subscription = Subscription(self, topics)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def has_subscribers(self):
+        # Topics are dropped with their last subscriber
+        return bool(self._subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscribers.values()))
+
+    def publish(self, topics, event):
+        with self._lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self._subscribers.get(topic, ()))
+        if not targets:
+            return
+
+        message = format_event(next(self._seq), event)
+        by_loop = defaultdict(list)
+        for subscription in targets:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver_all, subscriptions, message)
+            except RuntimeError:
+                # The loop is closed, so are its connections
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+
+def deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(get_setting('BACKEND'))()
+    return _broker
+
+
+def has_subscribers():
+    return get_broker().has_subscribers()
+
+
+def publish(topics, event):
+    """
+    Publish `event` once the current transaction commits, so subscribers never
+    hear about rows they cannot read yet.
+    """
+    topics = list(topics)
+    if not topics:
+        return
+    transaction.on_commit(lambda: get_broker().publish(topics, event))
+
+
+def task_topics(task_ids, extra_user_ids=()):
+    """
+    Admins plus every assignee of `task_ids` (and `extra_user_ids`, e.g.
+    users who were just unassigned). Empty while nobody is subscribed.
+    """
+    if not has_subscribers():
+        return []
+    user_ids = set(extra_user_ids)
+    user_ids.update(
+        Task.assigned_to.through.objects.filter(task_id__in=task_ids).values_list('user_id', flat=True)
+    )
+    return [ADMINS_TOPIC] + [user_topic(user_id) for user_id in user_ids]
+
+
+def project_topics(project, extra_user_ids=()):
+    """
+    Admins, the creator and every member of `project`. Empty while nobody
+    is subscribed.
+    """
+    if not has_subscribers():
+        return []
+    user_ids = set(extra_user_ids)
+    user_ids.update(
+        Project.assigned_users.through.objects.filter(project_id=project.pk).values_list('user_id', flat=True)
+    )
+    if project.created_by_id:
+        user_ids.add(project.created_by_id)
+    return [ADMINS_TOPIC] + [user_topic(user_id) for user_id in user_ids]
+
+
+def task_event(task, action):
+    return {
+        'type': 'task',
+        'action': action,
+        'id': task.pk,
+        'project_id': task.project_id,
+        'status': task.status,
+        'updated_at': task.updated_at,
+    }
+
+
+def comment_event(comment, action):
+    return {
+        'type': 'comment',
+        'action': action,
+        'id': comment.pk,
+        'task_id': comment.task_id,
+        'user_id': comment.user_id,
+    }
+
+
+def project_event(project, action):
+    return {'type': 'project', 'action': action, 'id': project.pk}
+
+
+def publish_bulk(task_ids, created, user_ids=()):
+    """
+    One event per user for a bulk operation, listing only the tasks that user
+    can see, instead of one event per task. `user_ids` that no longer see any
+    of the tasks (unassigned by the operation) get an event with no ids.
+    """
+    if not has_subscribers():
+        return
+    action = 'bulk_created' if created else 'bulk_updated'
+    visible = defaultdict(list)
+    links = Task.assigned_to.through.objects.filter(task_id__in=task_ids).values_list('user_id', 'task_id')
+    for user_id, task_id in links:
+        visible[user_id].append(task_id)
+    publish([ADMINS_TOPIC], {'type': 'task', 'action': action, 'ids': list(task_ids)})
+    for user_id in set(visible) | set(user_ids):
+        publish([user_topic(user_id)], {'type': 'task', 'action': action, 'ids': visible.get(user_id, [])})
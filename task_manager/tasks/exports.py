@@ -0,0 +1,141 @@
+"""
+Streaming exports of a project's tasks with their assignees and comments.
+Rows are produced one at a time from a chunked iterator, so memory stays
+flat however large the project is.
+"""
+import csv
+import json
+import os
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from . import jobs
+from .models import Comment, Task, User
+from .visibility import visible_tasks
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_COLUMNS = [
+    'id', 'title', 'description', 'due_date', 'priority', 'status',
+    'project_id', 'project_name', 'assigned_to', 'comment_count', 'comments',
+]
+
+
+def export_queryset(project_id, user=None, include_comments=True):
+    """
+    Tasks of `project_id` visible to `user` (all of them for admins or when no
+    user is given, as in the management command), in a stable order.
+    """
+    queryset = Task.objects.all() if user is None else visible_tasks(user)
+    queryset = queryset.filter(project_id=project_id)
+    prefetches = [Prefetch('assigned_to', queryset=User.objects.only('id', 'username').order_by('id'))]
+    if include_comments:
+        prefetches.append(
+            Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('user').only(
+                    'id', 'task_id', 'text', 'created_at', 'user__id', 'user__username'
+                ).order_by('created_at', 'id'),
+            )
+        )
+    return queryset.select_related('project').prefetch_related(*prefetches).order_by('id')
+
+
+def task_record(task, include_comments):
+    record = {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'due_date': task.due_date,
+        'priority': task.priority,
+        'status': task.status,
+        'project': {'id': task.project_id, 'name': task.project.name},
+        'assigned_to': [{'id': user.id, 'username': user.username} for user in task.assigned_to.all()],
+        'comment_count': task.comment_count,
+    }
+    if include_comments:
+        record['comments'] = [
+            {'id': comment.id, 'user': {'id': comment.user.id, 'username': comment.user.username},
+             'text': comment.text, 'created_at': comment.created_at}
+            for comment in task.comments.all()
+        ]
+    return record
+
+
+class Echo:
+    """
+    File-like object whose write() hands the line back, so csv.writer can
+    be used to produce one row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(queryset, include_comments, chunk_size):
+    for task in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(task_record(task, include_comments), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_csv(queryset, include_comments, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for task in queryset.iterator(chunk_size=chunk_size):
+        record = task_record(task, include_comments)
+        yield writer.writerow([
+            record['id'],
+            record['title'],
+            record['description'],
+            record['due_date'].isoformat(),
+            record['priority'],
+            record['status'],
+            record['project']['id'],
+            record['project']['name'],
+            ';'.join(user['username'] for user in record['assigned_to']),
+            record['comment_count'],
+            json.dumps(record.get('comments', []), cls=DjangoJSONEncoder),
+        ])
+
+
+def stream_tasks(project_id, export_format='ndjson', user=None, include_comments=True, chunk_size=500):
+    """
+    Generator of NDJSON lines or CSV rows for the tasks of `project_id`.
+    Prefetches run once per chunk of `chunk_size` tasks.
+    """
+    queryset = export_queryset(project_id, user=user, include_comments=include_comments)
+    if export_format == 'csv':
+        return stream_csv(queryset, include_comments, chunk_size)
+    return stream_ndjson(queryset, include_comments, chunk_size)
+
+
+@jobs.job(pool='process')
+def write_export(project_id, path, export_format='ndjson', include_comments=True, chunk_size=1000):
+    """
+    Write the export to the file at `path` and return the number of tasks.
+    Each run writes a temporary file of its own next to `path` and only
+    replaces `path` once complete, so a failed run never leaves half an
+    export behind and two runs of the same job never write into each
+    other's. Deferred exports run in the worker's process pool: serializing
+    big projects is CPU-bound.
+    """
+    count = 0
+    partial_path = f'{path}.{uuid.uuid4().hex}.partial'
+    try:
+        with open(partial_path, 'x', encoding='utf-8', newline='') as output:
+            for row in stream_tasks(project_id, export_format, include_comments=include_comments,
+                                    chunk_size=chunk_size):
+                output.write(row)
+                count += 1
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        raise
+    if export_format == 'csv':
+        count -= 1  # header row
+    return count
@@ -0,0 +1,50 @@
+"""
+Password hashers whose cost comes from settings (PASSWORD_HASHING), so it
+can be tuned per install without a code change.
+
+Django re-hashes a password on the next successful login whenever its hash
+was made by another algorithm than the first of PASSWORD_HASHERS, or with
+another cost than the configured one. Putting ScryptPasswordHasher first
+(PASSWORD_HASHER=scrypt) therefore moves users from PBKDF2 to scrypt as
+they log in, while the PBKDF2 hashers stay listed to verify the hashes not
+yet moved.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULTS = {
+    'PBKDF2_ITERATIONS': None,
+    'SCRYPT_WORK_FACTOR': None,
+    'SCRYPT_PARALLELISM': None,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return get_setting('PBKDF2_ITERATIONS') or super().iterations
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+    Django's scrypt hasher, with parallelism 1 unless configured: OpenSSL
+    computes the lanes one after the other, so each one only adds time.
+    """
+
+    @property
+    def work_factor(self):
+        return get_setting('SCRYPT_WORK_FACTOR') or super().work_factor
+
+    @property
+    def parallelism(self):
+        return get_setting('SCRYPT_PARALLELISM') or 1
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * n * r bytes; OpenSSL refuses more than 32 MiB
+        # unless told otherwise
+        return 2 * 128 * self.work_factor * self.block_size
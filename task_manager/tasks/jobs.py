@@ -0,0 +1,252 @@
+"""
+Background jobs for side effects a request does not have to wait for:
+search indexing, dashboard rollup recomputes after bulk changes, exports.
+
+- `@job()` marks a function the worker may run; `defer(func, *args)`
+  queues a call to it. Arguments must be JSON-serializable.
+- With JOBS['ENABLED'] off (the default) `defer` calls the function inline,
+  so nothing changes for installs that do not run a worker.
+- With it on, the call is stored as a Job row in the caller's transaction
+  and `manage.py run_worker` picks it up: thread-pool jobs run in the
+  worker's threads, in a transaction together with marking the job done;
+  process-pool jobs (CPU-bound ones such as exports) run in worker
+  processes. The database is the only broker.
+- A failing job is retried with exponential backoff (RETRY_DELAY seconds,
+  doubling per attempt) until it has been tried `max_attempts` times, then
+  left failed with its last error for inspection.
+- Calls deferred with the same `key` while one of them is still queued
+  collapse into that one, so ten saves of a task index it once.
+
+Delivery is at least once: while a job runs, its worker refreshes
+`claimed_at` every HEARTBEAT_INTERVAL seconds, and a job whose worker
+stopped doing so for STALE_AFTER seconds (it died mid-run) is queued
+again, so job functions must be safe to repeat. On SQLite a thread-pool
+job's transaction holds the write lock, which the heartbeat waits for, so
+such jobs should still finish within STALE_AFTER there.
+"""
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Job
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 5,
+    'MAX_RETRY_DELAY': 3600,
+    'STALE_AFTER': 600,
+    'HEARTBEAT_INTERVAL': 60,
+    'KEEP_FINISHED': 7 * 24 * 3600,
+}
+
+POOLS = ('thread', 'process')
+# Due jobs looked at per claim; losing the race for all of them just means
+# another worker took them
+CLAIM_CANDIDATES = 10
+MAX_ERROR_LENGTH = 4000
+
+logger = logging.getLogger('tasks.jobs')
+
+
+def get_setting(name):
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
+
+
+class UnknownJob(Exception):
+    """
+    A queued job names a function that is gone or is not a job. Retrying
+    cannot help, so the job fails straight away.
+    """
+
+
+def job(max_attempts=None, pool='thread'):
+    """
+    Register the decorated function as a job. `pool='process'` runs it in a
+    worker process, for CPU-bound work that would hold the GIL.
+    """
+    if pool not in POOLS:
+        raise ValueError(f'pool must be one of {", ".join(POOLS)}')
+
+    def register(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_options = {'max_attempts': max_attempts, 'pool': pool}
+        return func
+
+    return register
+
+
+def resolve(name):
+    try:
+        func = import_string(name)
+    except ImportError:
+        raise UnknownJob(f'No job named {name}')
+    if not hasattr(func, 'job_options'):
+        raise UnknownJob(f'{name} is not a job')
+    return func
+
+
+def defer(func, *args, key=None, delay=0, **kwargs):
+    """
+    Run `func(*args, **kwargs)` in the background, at the earliest `delay`
+    seconds from now, or right away when the queue is disabled (returning
+    its result).
+    """
+    if not get_setting('ENABLED'):
+        return func(*args, **kwargs)
+    if not hasattr(func, 'job_name'):
+        raise UnknownJob(f'{func.__qualname__} is not a job')
+    Job.objects.bulk_create(
+        [
+            Job(
+                name=func.job_name,
+                args=list(args),
+                kwargs=kwargs,
+                idempotency_key=key,
+                max_attempts=func.job_options['max_attempts'] or get_setting('MAX_ATTEMPTS'),
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        ],
+        # A queued job with the same key already covers this call
+        ignore_conflicts=key is not None,
+    )
+    metrics.JOBS_DEFERRED.inc(job=func.job_name)
+
+
+def claim(worker_name):
+    """
+    Mark the next due job running for `worker_name` and return it, or None.
+    The conditional update is the lock: when workers race for a row, only
+    one of them updates it.
+    """
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'id').values_list('id', flat=True)[:CLAIM_CANDIDATES]
+    )
+    for job_id in due:
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, claimed_by=worker_name, claimed_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def finish(job):
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, claimed_by=job.claimed_by).update(
+        status=Job.DONE, finished_at=timezone.now(), last_error='',
+    )
+
+
+def retry_later(job, error, permanent=False):
+    """
+    Queue `job` again after its backoff delay, or fail it once its attempts
+    are used up. Returns the outcome: 'retry', 'failed' or 'superseded'
+    (another job with the same key was queued meanwhile and will do the
+    work instead).
+    """
+    now = timezone.now()
+    running = Job.objects.filter(pk=job.pk, status=Job.RUNNING, claimed_by=job.claimed_by)
+    error = error[-MAX_ERROR_LENGTH:]
+    if permanent or job.attempts >= job.max_attempts:
+        running.update(status=Job.FAILED, finished_at=now, last_error=error)
+        return 'failed'
+    delay = min(get_setting('RETRY_DELAY') * 2 ** (job.attempts - 1), get_setting('MAX_RETRY_DELAY'))
+    try:
+        with transaction.atomic():
+            running.update(
+                status=Job.QUEUED, run_after=now + timedelta(seconds=delay), claimed_by='', claimed_at=None,
+                last_error=error,
+            )
+    except IntegrityError:
+        running.update(status=Job.DONE, finished_at=now, last_error=error)
+        return 'superseded'
+    return 'retry'
+
+
+def beat(job, stop):
+    try:
+        while not stop.wait(get_setting('HEARTBEAT_INTERVAL')):
+            try:
+                Job.objects.filter(pk=job.pk, status=Job.RUNNING, claimed_by=job.claimed_by).update(
+                    claimed_at=timezone.now(),
+                )
+            except DatabaseError as exc:
+                # The next beat tries again; only STALE_AFTER without one matters
+                logger.warning('Heartbeat of job %s failed: %s', job.pk, exc)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job):
+    """
+    Keep `job` claimed while the block runs, from a thread (and connection)
+    of its own so it goes on while the job's thread is busy.
+    """
+    stop = threading.Event()
+    thread = threading.Thread(target=beat, args=(job, stop), name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def execute(job, process_pool=None):
+    """
+    Run a claimed job and record the outcome: 'ok', or that of retry_later().
+    Process-pool jobs run in the thread instead when no pool is given.
+    """
+    start = time.perf_counter()
+    try:
+        func = resolve(job.name)
+        with heartbeat(job):
+            if func.job_options['pool'] == 'process' and process_pool is not None:
+                process_pool.submit(run_in_process, job.name, job.args, job.kwargs).result()
+                finish(job)
+            else:
+                with transaction.atomic():
+                    func(*job.args, **job.kwargs)
+                    finish(job)
+        outcome = 'ok'
+    except Exception as exc:
+        outcome = retry_later(job, ''.join(traceback.format_exception(exc)), permanent=isinstance(exc, UnknownJob))
+    metrics.JOBS_FINISHED.inc(job=job.name, result=outcome)
+    metrics.JOB_DURATION.observe(time.perf_counter() - start, job=job.name)
+    return outcome
+
+
+def requeue_stale():
+    """
+    Give jobs whose worker stopped responding (no heartbeat for STALE_AFTER
+    seconds) another attempt. Returns how many there were.
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_setting('STALE_AFTER'))
+    stale = list(Job.objects.filter(status=Job.RUNNING, claimed_at__lt=cutoff))
+    for job in stale:
+        outcome = retry_later(job, f'Worker {job.claimed_by} stopped responding')
+        metrics.JOBS_FINISHED.inc(job=job.name, result=outcome)
+    return len(stale)
+
+
+def prune():
+    cutoff = timezone.now() - timedelta(seconds=get_setting('KEEP_FINISHED'))
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def run_in_process(name, args, kwargs):
+    close_old_connections()
+    resolve(name)(*args, **kwargs)
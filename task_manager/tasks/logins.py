@@ -0,0 +1,213 @@
+"""
+Login pipeline for POST /api/login/, configured with LOGIN:
+- Password verification, the CPU-heavy part of a login, runs in a pool of
+  HASH_PROCESSES worker processes (0, the default, verifies in the request
+  thread). The pool caps how many cores a login storm can take from the
+  rest of the API. At most MAX_PENDING verifications per process wait for
+  it; past that logins get 503 with Retry-After instead of piling up.
+- A hash made by another hasher than the first of PASSWORD_HASHERS, or at
+  another cost, is replaced on the next successful login (tasks/hashers.py).
+- Every account has a token bucket of BURST attempts refilled at RATE per
+  second (AccountLoginThrottle). Buckets live in the memory of each
+  process, so with N processes an account gets up to N times the rate.
+Verification time shows as `hash` in Server-Timing and the request log,
+and in the password_hash_duration_seconds histogram.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils.crypto import get_random_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+from .instrumentation import timed_hashing
+from .pools import ProcessPool
+
+DEFAULTS = {
+    'HASH_PROCESSES': 0,
+    'MAX_PENDING': 64,
+    'RATE': 10 / 60,
+    'BURST': 10,
+    'MAX_ACCOUNTS': 100_000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'LOGIN', {}).get(name, DEFAULTS[name])
+
+
+class LoginBusy(APIException):
+    status_code = 503
+    default_detail = _('Too many logins in progress, try again shortly.')
+    default_code = 'login_busy'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def verify(password, encoded):
+    """
+    Check `password` against `encoded`. Returns whether it matches and, when
+    the hash is due for an upgrade, the new one. Runs in the pool's worker
+    processes, so it only takes and returns plain values.
+    """
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, (upgraded[0] if upgraded else None)
+
+
+class Verifier:
+    """
+    Runs `verify` in the request thread, or in the process pool once
+    HASH_PROCESSES is set. The pool is started on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = None
+        self._dummy = None
+
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pending = threading.BoundedSemaphore(get_setting('MAX_PENDING'))
+                    self._pool = ProcessPool(get_setting('HASH_PROCESSES'))
+        return self._pool
+
+    def verify(self, password, encoded):
+        algorithm = encoded.split('$', 1)[0] if encoded else 'unusable'
+        start = time.perf_counter()
+        with timed_hashing():
+            if get_setting('HASH_PROCESSES'):
+                pool = self.pool()
+                if not self._pending.acquire(blocking=False):
+                    metrics.LOGINS.inc(result='busy')
+                    raise LoginBusy()
+                try:
+                    result = pool.submit(verify, password, encoded).result()
+                finally:
+                    self._pending.release()
+            else:
+                result = verify(password, encoded)
+        metrics.PASSWORD_HASH_DURATION.observe(time.perf_counter() - start, algorithm=algorithm)
+        return result
+
+    def dummy_hash(self):
+        # Hashed with the preferred hasher, so a login for an unknown
+        # username costs about as much as one for a real account
+        if self._dummy is None:
+            self._dummy = make_password(get_random_string(32))
+        return self._dummy
+
+    def reset(self):
+        """
+        Stop the pool and forget the dummy hash, after a settings change
+        (benchmarks). The next verification starts a new pool.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
+            self._dummy = None
+
+
+verifier = Verifier()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend with the password verified through `verifier`, and the
+    upgraded hash written only if the password was not changed meanwhile.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            verifier.verify(password, verifier.dummy_hash())
+            metrics.LOGINS.inc(result='failed')
+            return None
+        valid, upgraded = verifier.verify(password, user.password)
+        if not valid or not self.user_can_authenticate(user):
+            metrics.LOGINS.inc(result='failed')
+            return None
+        if upgraded:
+            UserModel._default_manager.filter(pk=user.pk, password=user.password).update(password=upgraded)
+            user.password = upgraded
+            metrics.LOGINS.inc(result='upgraded')
+        else:
+            metrics.LOGINS.inc(result='ok')
+        return user
+
+
+class TokenBuckets:
+    """
+    Token buckets by key, the least recently used dropped past MAX_ACCOUNTS
+    (a dropped bucket comes back full).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+
+    def take(self, key):
+        """
+        Take a token for `key`. Returns 0 if there was one, or else the
+        seconds until there is.
+        """
+        rate, burst = get_setting('RATE'), get_setting('BURST')
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                while len(self._buckets) > get_setting('MAX_ACCOUNTS'):
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+login_buckets = TokenBuckets()
+
+
+class AccountLoginThrottle(BaseThrottle):
+    """
+    Limits login attempts per username, whatever address they come from.
+    """
+
+    def allow_request(self, request, view):
+        username = request.data.get(get_user_model().USERNAME_FIELD) if hasattr(request.data, 'get') else None
+        if not username or not isinstance(username, str):
+            self._wait = None
+            return True
+        self._wait = login_buckets.take(username)
+        if self._wait:
+            metrics.LOGINS.inc(result='throttled')
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
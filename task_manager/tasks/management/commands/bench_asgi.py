@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from tasks.models import User
+from tasks.perf import datagen
+from tasks.perf.harness import bearer_token, isolated_database, percentile, read_endpoints
+
+# Endpoints that have an async twin under /api/async/
+ASYNC_ENDPOINTS = ['tasks-list', 'tasks-by-project', 'tasks-by-user', 'comments-list', 'comments-count']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second and latency of the sync read endpoints (WSGI '
+        'handler, one thread per worker) with their async twins (ASGI handler, one '
+        'event loop) at the same concurrency, against a throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000, help='Tasks in the generated dataset.')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and stack.')
+        parser.add_argument('--concurrency', type=int, default=8, help='WSGI threads / concurrent ASGI requests.')
+        parser.add_argument('--role', choices=['admin', 'member'], default='member')
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='Leave the response cache and ETags on (the async views bypass them).',
+        )
+
+    def run_wsgi(self, url, headers, total, concurrency):
+        def one(_):
+            start = time.perf_counter()
+            response = Client().get(url, headers=headers)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            return elapsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(total)))
+        return latencies, time.perf_counter() - start
+
+    def run_asgi(self, url, headers, total, concurrency):
+        async def main():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    # What ASGIHandler does per request, so sync_to_async calls of
+                    # concurrent requests do not queue on a single thread.
+                    async with ThreadSensitiveContext():
+                        response = await client.get(url, headers=headers)
+                    elapsed = time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise CommandError(f'{url} returned {response.status_code}')
+                    return elapsed
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one() for _ in range(total)))
+            return latencies, time.perf_counter() - start
+
+        return asyncio.run(main())
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+        overrides = {} if options['with_cache'] else {'RESPONSE_CACHE': {'ENABLED': False, 'ETAGS': False}}
+
+        with isolated_database(), override_settings(**overrides):
+            ids = datagen.generate(
+                users=max(10, options['tasks'] // 50), projects=max(3, options['tasks'] // 200),
+                tasks=options['tasks'], comments_per_task=3,
+            )
+            user = User.objects.get(pk=ids['users'][0 if options['role'] == 'admin' else 1])
+            headers = {'Authorization': f'Bearer {bearer_token(user)}'}
+            urls = read_endpoints(ids)
+
+            self.stdout.write(
+                f'{total} requests per run, concurrency {concurrency}, {options["tasks"]} tasks, {options["role"]}'
+            )
+            self.stdout.write(f'{"endpoint":<18} {"stack":<5} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9}')
+            for name in ASYNC_ENDPOINTS:
+                sync_url = urls[name]
+                async_url = sync_url.replace('/api/', '/api/async/', 1)
+                for stack, run, url in (('wsgi', self.run_wsgi, sync_url), ('asgi', self.run_asgi, async_url)):
+                    latencies, wall = run(url, headers, total, concurrency)
+                    self.stdout.write(
+                        f'{name:<18} {stack:<5} {total / wall:>9.1f} '
+                        f'{percentile(latencies, 50) * 1000:>9.2f} {percentile(latencies, 99) * 1000:>9.2f}'
+                    )
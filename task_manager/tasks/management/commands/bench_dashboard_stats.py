@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import rollups
+from tasks.models import User
+from tasks.perf import datagen
+from tasks.perf.harness import isolated_database, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the dashboard statistics served from the rollup table against the same '
+        'numbers aggregated with GROUP BY on every request, for growing datasets in a '
+        'throwaway database. Both must return identical results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000', help='Comma-separated task counts.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed calls per size, role and source.')
+
+    def time_calls(self, func, user, repeat):
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(user)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        repeat = options['repeat']
+
+        self.stdout.write(
+            f'{"tasks":>8} {"role":<7} {"rollup p50":>11} {"rollup p99":>11} {"live p50":>9} {"live p99":>9} {"speedup":>8}'
+        )
+        for size in sizes:
+            with isolated_database():
+                ids = datagen.generate(
+                    users=max(10, size // 100), projects=max(3, size // 500), tasks=size, comments_per_task=2,
+                )
+                # datagen bulk-inserts without signals, so build the counters once
+                rollups.recompute()
+                for role, user_id in (('admin', ids['users'][0]), ('member', ids['users'][1])):
+                    user = User.objects.get(pk=user_id)
+                    if rollups.dashboard_stats(user) != rollups.live_stats(user):
+                        raise CommandError(f'Rollup and live stats differ for {size} tasks ({role})')
+                    rollup = self.time_calls(rollups.dashboard_stats, user, repeat)
+                    live = self.time_calls(rollups.live_stats, user, repeat)
+                    rollup_p50, live_p50 = percentile(rollup, 50), percentile(live, 50)
+                    self.stdout.write(
+                        f'{size:>8} {role:<7} {rollup_p50 * 1000:>9.2f}ms {percentile(rollup, 99) * 1000:>9.2f}ms '
+                        f'{live_p50 * 1000:>7.2f}ms {percentile(live, 99) * 1000:>7.2f}ms {live_p50 / rollup_p50:>7.1f}x'
+                    )
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from tasks.logins import login_buckets, verifier, verify
+from tasks.models import User
+from tasks.perf.harness import isolated_database, percentile, test_database_on_disk
+
+HASHERS = {
+    'pbkdf2': 'tasks.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'tasks.hashers.ScryptPasswordHasher',
+}
+PASSWORD = 'bench-password'
+
+
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Log in from many threads at once through POST /api/login/ and report logins per '
+        'second, per core and latency, for each password hasher, verifying in the request '
+        'threads and in the hashing process pool (LOGIN_HASH_PROCESSES), in a throwaway '
+        'database. Hasher costs come from PASSWORD_HASHING as configured.'
+    )
+
+    def add_arguments(self, parser):
+        cores = available_cores()
+        parser.add_argument('--hashers', default=','.join(HASHERS), help='Comma-separated hashers.')
+        parser.add_argument('--threads', type=int, default=cores * 2, help='Clients logging in at the same time.')
+        parser.add_argument('--processes', type=int, default=cores, help='Hashing processes in pool mode.')
+        parser.add_argument('--logins', type=int, default=20, help='Logins per thread.')
+
+    def handle(self, *args, **options):
+        hashers = options['hashers'].split(',')
+        unknown = set(hashers) - set(HASHERS)
+        if unknown:
+            raise CommandError(f'Unknown hashers: {", ".join(sorted(unknown))}')
+        if options['threads'] < 1 or options['processes'] < 1:
+            raise CommandError('--threads and --processes must be at least 1')
+        cores = available_cores()
+
+        original_hasher = os.environ.get('PASSWORD_HASHER')
+        try:
+            with test_database_on_disk(), isolated_database():
+                users = [
+                    User.objects.create_user(f'bench{n}', f'bench{n}@example.com')
+                    for n in range(options['threads'])
+                ]
+                self.stdout.write(
+                    f'{"hasher":<8} {"verify in":<9} {"logins/s":>9} {"per core":>9} {"p50":>9} {"p99":>9}'
+                )
+                for hasher in hashers:
+                    preferred = [HASHERS[hasher]] + [path for path in settings.PASSWORD_HASHERS if path != HASHERS[hasher]]
+                    # Spawned hashing processes read their settings from the environment
+                    os.environ['PASSWORD_HASHER'] = hasher
+                    with override_settings(PASSWORD_HASHERS=preferred):
+                        encoded = make_password(PASSWORD)
+                        User.objects.update(password=encoded)
+                        for processes, where in ((0, 'threads'), (options['processes'], 'pool')):
+                            login_settings = {'HASH_PROCESSES': processes, 'BURST': 10 ** 9}
+                            with override_settings(LOGIN=login_settings):
+                                verifier.reset()
+                                login_buckets.clear()
+                                if processes:
+                                    self.warm_up(processes, encoded)
+                                elapsed, latencies = self.run(users, options['logins'])
+                                verifier.reset()
+                            rate = len(latencies) / elapsed
+                            self.stdout.write(
+                                f'{hasher:<8} {where:<9} {rate:>9.1f} {rate / cores:>9.1f} '
+                                f'{percentile(latencies, 50) * 1000:>7.1f}ms {percentile(latencies, 99) * 1000:>7.1f}ms'
+                            )
+        finally:
+            if original_hasher is None:
+                os.environ.pop('PASSWORD_HASHER', None)
+            else:
+                os.environ['PASSWORD_HASHER'] = original_hasher
+        self.stderr.write(f'Per core: logins/s divided by the {cores} cores available.')
+
+    def warm_up(self, processes, encoded):
+        """
+        Start every pool process (they spawn on demand) outside the timing.
+        """
+        pool = verifier.pool()
+        for future in [pool.submit(verify, PASSWORD, encoded) for _ in range(processes)]:
+            future.result()
+
+    def run(self, users, per_thread):
+        """
+        Wall time and per-login latencies; every login must succeed.
+        """
+        latencies, failures = [], []
+        barrier = threading.Barrier(len(users) + 1)
+
+        def log_in(user):
+            client = APIClient()
+            barrier.wait()
+            try:
+                for _ in range(per_thread):
+                    start = time.perf_counter()
+                    response = client.post('/api/login/', {'username': user.username, 'password': PASSWORD},
+                                           format='json')
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=log_in, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        if failures:
+            raise CommandError(f'{len(failures)} logins failed, with status {sorted(set(failures))}')
+        return elapsed, latencies
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tasks.models import Task
+from tasks.perf import datagen
+from tasks.perf.harness import isolated_database, percentile
+from tasks.serializers import FastTaskSerializer, NormalizedTaskSerializer, TaskSerializer
+
+SPARSE_FIELDS = 'id,title,status,priority,due_date,project.name,assigned_to.username'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare serialization time and payload size of the task list representations '
+        '(full DRF serializer, sparse fieldsets, id references, the hand-rolled fast '
+        'serializer and the normalized mode) on a generated dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Tasks in the generated dataset.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per representation.')
+
+    def modes(self):
+        factory = APIRequestFactory()
+
+        def drf(query=None):
+            context = {'request': Request(factory.get('/api/tasks/', query))} if query else {}
+            return lambda tasks: TaskSerializer(tasks, many=True, context=context).data
+
+        return {
+            'drf': drf(),
+            'drf fields=': drf({'fields': SPARSE_FIELDS}),
+            'drf expand=': drf({'expand': ''}),
+            'fast': lambda tasks: FastTaskSerializer(tasks, many=True).data,
+            'normalized': lambda tasks: NormalizedTaskSerializer(tasks, many=True).data,
+        }
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with isolated_database():
+            datagen.generate(
+                users=max(10, options['tasks'] // 50), projects=max(3, options['tasks'] // 200),
+                tasks=options['tasks'], comments_per_task=0, users_per_project=10, assignees_per_task=3,
+            )
+            # Load once so only serialization and rendering are measured
+            tasks = list(TaskSerializer.setup_eager_loading(Task.objects.order_by('due_date', 'id')))
+            renderer = JSONRenderer()
+
+            modes = self.modes()
+            if renderer.render(modes['fast'](tasks)) != renderer.render(modes['drf'](tasks)):
+                raise CommandError('FastTaskSerializer output differs from TaskSerializer')
+
+            self.stdout.write(f'{len(tasks)} tasks, {repeat} runs each')
+            self.stdout.write(f'{"representation":<14} {"serialize p50":>14} {"render p50":>11} {"payload KiB":>12}')
+            for name, serialize in modes.items():
+                serialize_times, render_times = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    data = serialize(tasks)
+                    serialize_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    payload = renderer.render(data)
+                    render_times.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f'{name:<14} {percentile(serialize_times, 50) * 1000:>12.1f}ms '
+                    f'{percentile(render_times, 50) * 1000:>9.1f}ms {len(payload) / 1024:>12.1f}'
+                )
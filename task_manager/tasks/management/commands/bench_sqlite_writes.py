@@ -0,0 +1,124 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from task_manager.databases import sqlite_concurrency_options
+from tasks.models import Comment, User
+from tasks.perf import datagen
+from tasks.perf.harness import client_for, isolated_database, percentile, test_database_on_disk
+
+# name: (connection OPTIONS, coalesce comment inserts)
+MODES = {
+    # Rollback journal, deferred transactions, 5 s busy timeout
+    'default': ({'init_command': 'PRAGMA journal_mode=DELETE'}, False),
+    'tuned': (sqlite_concurrency_options(), False),
+    'tuned+coalesced': (sqlite_concurrency_options(), True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Post comments from many threads at once against a throwaway SQLite file, with the '
+        'default SQLite settings, the tuned ones (DB_SQLITE_CONCURRENT) and the tuned ones '
+        'plus comment write coalescing, and report throughput (successful writes per second), '
+        'latency and failed writes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,4,16', help='Comma-separated thread counts.')
+        parser.add_argument('--comments', type=int, default=50, help='Comments posted by each thread.')
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to run.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('bench_sqlite_writes only runs against SQLite')
+        try:
+            thread_counts = [int(count) for count in options['threads'].split(',')]
+        except ValueError:
+            raise CommandError('--threads must be a comma-separated list of integers')
+        modes = options['modes'].split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Unknown modes: {", ".join(sorted(unknown))}')
+
+        # Concurrency needs a database file; the default test database lives in memory
+        settings_dict = connection.settings_dict
+        original_options = dict(settings_dict['OPTIONS'])
+        try:
+            with test_database_on_disk(), isolated_database():
+                ids = datagen.generate(users=20, projects=3, tasks=200, comments_per_task=0)
+                admin = User.objects.get(pk=ids['users'][0])
+                self.stdout.write(
+                    f'{"mode":<16} {"threads":>7} {"writes/s":>9} {"p50":>9} {"p99":>9} {"failed":>7} {"stored anyway":>13}'
+                )
+                for mode in modes:
+                    connection_options, coalesce = MODES[mode]
+                    self.configure(settings_dict, connection_options)
+                    for threads in thread_counts:
+                        with override_settings(WRITE_COALESCING={'ENABLED': coalesce}):
+                            elapsed, latencies, failed, stored_anyway = self.run(
+                                admin, ids['tasks'], threads, options['comments'],
+                            )
+                        self.stdout.write(
+                            f'{mode:<16} {threads:>7} {(len(latencies) - failed) / elapsed:>9.0f} '
+                            f'{percentile(latencies, 50) * 1000:>7.2f}ms {percentile(latencies, 99) * 1000:>7.2f}ms '
+                            f'{failed:>7} {stored_anyway:>13}'
+                        )
+                self.configure(settings_dict, original_options)
+        finally:
+            settings_dict['OPTIONS'] = original_options
+
+    def configure(self, settings_dict, connection_options):
+        """
+        Connections opened from now on (each thread opens its own) use
+        `connection_options`.
+        """
+        connection.close()
+        settings_dict['OPTIONS'] = dict(connection_options)
+
+    def run(self, user, task_ids, threads, per_thread):
+        """
+        Wall time, per-request latencies, the number of failed writes and how
+        many of those were stored anyway (the client saw an error for a
+        comment that exists). No acknowledged comment may be missing.
+        """
+        before = Comment.objects.count()
+        latencies, failed = [], []
+        barrier = threading.Barrier(threads + 1)
+
+        def post_comments(worker):
+            client = client_for(user)
+            barrier.wait()
+            try:
+                for i in range(per_thread):
+                    text = f'Bench {threads}/{worker}/{i}'
+                    task_id = task_ids[(worker * per_thread + i) % len(task_ids)]
+                    start = time.perf_counter()
+                    try:
+                        ok = client.post('/api/comments/', {'task_id': task_id, 'text': text},
+                                         format='json').status_code == 201
+                    except Exception:  # "database is locked" surfaces as an OperationalError
+                        ok = False
+                    latencies.append(time.perf_counter() - start)
+                    if not ok:
+                        failed.append(text)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post_comments, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        written = Comment.objects.count() - before
+        stored_anyway = Comment.objects.filter(text__in=failed).count()
+        if written - stored_anyway != len(latencies) - len(failed):
+            raise CommandError(f'{len(latencies) - len(failed)} comments acknowledged but {written - stored_anyway} stored')
+        return elapsed, latencies, len(failed), stored_anyway
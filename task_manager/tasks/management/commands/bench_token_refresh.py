@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from tasks.models import User
+from tasks.perf.harness import isolated_database, percentile, test_database_on_disk
+from tasks.revocation import RefreshToken, blacklist_index
+
+SEED_BATCH = 500_000
+# One seeded token in LIVE_EVERY is still unexpired, as if the blacklist had
+# not been purged for a long while
+LIVE_EVERY = 100
+
+SEED_OUTSTANDING_SQL = """
+    WITH RECURSIVE seq(n) AS (SELECT %s UNION ALL SELECT n + 1 FROM seq WHERE n < %s)
+    INSERT INTO {outstanding} (jti, token, created_at, expires_at)
+    SELECT 'seed-' || n, '', %s, CASE WHEN n %% {live_every} = 0 THEN %s ELSE %s END FROM seq
+"""
+SEED_BLACKLISTED_SQL = """
+    INSERT INTO {blacklisted} (token_id, blacklisted_at)
+    SELECT id, %s FROM {outstanding} WHERE id > %s
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Time POST /api/token/refresh/ (with rotation and blacklisting, as configured) against '
+        'blacklists of growing size, checking the blacklist in the database and through the '
+        'Bloom filter (TOKEN_BLACKLIST_CACHE), in a throwaway database file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,1000000,10000000', help='Comma-separated blacklist sizes.')
+        parser.add_argument('--refreshes', type=int, default=500, help='Refreshes timed per size and mode.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        with test_database_on_disk(), isolated_database():
+            user = User.objects.create_user('bench', 'bench@example.com', 'bench')
+            self.stdout.write(
+                f'{"blacklist":>10} {"mode":<9} {"refresh/s":>9} {"p50":>9} {"p99":>9} {"check p50":>10} {"filter build":>12}'
+            )
+            seeded = 0
+            for size in sizes:
+                start = time.perf_counter()
+                self.seed(seeded, size)
+                seeded = size
+                self.stderr.write(f'Seeded {size} blacklisted tokens in {time.perf_counter() - start:.1f}s')
+                for mode in ('database', 'filter'):
+                    with override_settings(TOKEN_BLACKLIST_CACHE={'ENABLED': mode == 'filter'}):
+                        blacklist_index.clear()
+                        build = '-'
+                        if mode == 'filter':
+                            # Built here rather than in the background thread, to time it
+                            start = time.perf_counter()
+                            blacklist_index.rebuild()
+                            build = f'{(time.perf_counter() - start) * 1000:.0f}ms'
+                        check_p50 = self.time_checks(user, options['refreshes'])
+                        elapsed, latencies = self.time_refreshes(user, options['refreshes'])
+                    self.stdout.write(
+                        f'{size:>10} {mode:<9} {len(latencies) / elapsed:>9.0f} '
+                        f'{percentile(latencies, 50) * 1000:>7.2f}ms {percentile(latencies, 99) * 1000:>7.2f}ms '
+                        f'{check_p50 * 1000:>8.3f}ms {build:>12}'
+                    )
+
+    def seed(self, start, end):
+        """
+        Blacklist tokens number `start` + 1 to `end`, with set-based inserts.
+        """
+        tables = {
+            'outstanding': connection.ops.quote_name(OutstandingToken._meta.db_table),
+            'blacklisted': connection.ops.quote_name(BlacklistedToken._meta.db_table),
+            'live_every': LIVE_EVERY,
+        }
+        now = timezone.now()
+        for batch_start in range(start, end, SEED_BATCH):
+            batch_end = min(batch_start + SEED_BATCH, end)
+            with transaction.atomic(), connection.cursor() as cursor:
+                last_id = OutstandingToken.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                cursor.execute(
+                    SEED_OUTSTANDING_SQL.format(**tables),
+                    [batch_start + 1, batch_end, now, now + timedelta(days=1), now - timedelta(days=1)],
+                )
+                cursor.execute(SEED_BLACKLISTED_SQL.format(**tables), [now, last_id])
+
+    def time_checks(self, user, repeat):
+        """
+        Median time to load and check a refresh token that is not blacklisted.
+        """
+        raw = str(RefreshToken.for_user(user))
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            RefreshToken(raw)
+            latencies.append(time.perf_counter() - start)
+        return percentile(latencies, 50)
+
+    def time_refreshes(self, user, count):
+        """
+        Refresh a chain of `count` rotated tokens; every used token must be
+        rejected afterwards.
+        """
+        client = APIClient()
+        refresh = first = str(RefreshToken.for_user(user))
+        latencies = []
+        begin = time.perf_counter()
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f'Refresh failed with {response.status_code}: {response.content[:200]}')
+            refresh = response.data.get('refresh', refresh)
+        elapsed = time.perf_counter() - begin
+        if client.post('/api/token/refresh/', {'refresh': first}, format='json').status_code != 401:
+            raise CommandError('A rotated refresh token was accepted again')
+        return elapsed, latencies
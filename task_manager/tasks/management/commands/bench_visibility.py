@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from tasks.models import Project, Task, User
+from tasks.perf import datagen
+from tasks.perf.harness import isolated_database, percentile
+from tasks.visibility import is_project_member, visible_projects, visible_tasks
+
+PAGE_SIZE = 50
+
+
+def joined_projects(user):
+    # What ProjectViewSet used to run: an OR across the membership join
+    return Project.objects.filter(Q(assigned_users=user) | Q(created_by=user)).distinct()
+
+
+def joined_tasks(user):
+    return Task.objects.filter(assigned_to=user.pk)
+
+
+def loaded_membership(user, project):
+    # What TaskViewSet.update used to run: every member loaded into Python
+    return user in Project.objects.get(pk=project.pk).assigned_users.all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time project and task visibility and the membership check through the access '
+        'tables against the previous joins, for users who belong to thousands of projects, '
+        'in a throwaway database. Both must return identical results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,5000', help='Comma-separated project counts.')
+        parser.add_argument('--tasks-per-project', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed calls per size and check.')
+
+    def time_calls(self, func, repeat):
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+        return percentile(latencies, 50)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        repeat = options['repeat']
+
+        self.stdout.write(f'{"projects":>8} {"member of":>9} {"check":<16} {"join p50":>10} {"index p50":>10} {"speedup":>8}')
+        for size in sizes:
+            with isolated_database():
+                # 20 users, 10 per project: each regular user is in about half the projects
+                ids = datagen.generate(
+                    users=20, projects=size, tasks=size * options['tasks_per_project'], comments_per_task=0,
+                    users_per_project=10,
+                )
+                user = User.objects.get(pk=ids['users'][1])
+                member_of = visible_projects(user).count()
+                project = visible_projects(user).order_by('-id').first()
+                checks = {
+                    'project ids': (
+                        lambda: set(joined_projects(user).values_list('id', flat=True)),
+                        lambda: set(visible_projects(user).values_list('id', flat=True)),
+                    ),
+                    'project page': (
+                        lambda: list(joined_projects(user).order_by('id')[:PAGE_SIZE]),
+                        lambda: list(visible_projects(user).order_by('id')[:PAGE_SIZE]),
+                    ),
+                    'task page': (
+                        lambda: list(joined_tasks(user).order_by('due_date', 'id')[:PAGE_SIZE]),
+                        lambda: list(visible_tasks(user).order_by('due_date', 'id')[:PAGE_SIZE]),
+                    ),
+                    'membership': (
+                        lambda: loaded_membership(user, project),
+                        lambda: is_project_member(user, project.pk),
+                    ),
+                }
+                for name, (joined, indexed) in checks.items():
+                    if joined() != indexed():
+                        raise CommandError(f'{name} differs between the join and the access tables for {size} projects')
+                    joined_p50 = self.time_calls(joined, repeat)
+                    indexed_p50 = self.time_calls(indexed, repeat)
+                    self.stdout.write(
+                        f'{size:>8} {member_of:>9} {name:<16} {joined_p50 * 1000:>8.2f}ms {indexed_p50 * 1000:>8.2f}ms '
+                        f'{joined_p50 / indexed_p50:>7.1f}x'
+                    )
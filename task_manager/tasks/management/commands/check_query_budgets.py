@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import User
+from tasks.perf import datagen
+from tasks.perf.harness import QUERY_BUDGETS, client_for, count_queries, isolated_database, read_endpoints
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database at two sizes and check that every read endpoint '
+        'stays within its query budget at both sizes. The same budgets are asserted by '
+        'tasks.tests.test_query_budgets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=50, help='Tasks in the small dataset; the large one has 10x.')
+        parser.add_argument('--show-sql', action='store_true', help='Print the SQL of endpoints over budget.')
+
+    def measure(self, size, show_sql):
+        """
+        Return {(endpoint, role): query count} for a dataset with `size` tasks.
+        """
+        results = {}
+        with isolated_database():
+            ids = datagen.generate(users=20, projects=5, tasks=size, comments_per_task=3, users_per_project=10)
+            admin = User.objects.get(pk=ids['users'][0])
+            member = User.objects.get(pk=ids['users'][1])
+            for role, user in (('admin', admin), ('member', member)):
+                client = client_for(user)
+                for name, url in read_endpoints(ids).items():
+                    response, queries = count_queries(client.get, url)
+                    if response.status_code >= 400 and response.status_code != 404:
+                        raise CommandError(f'{name} ({role}) returned {response.status_code}')
+                    results[(name, role)] = len(queries)
+                    if show_sql and len(queries) > QUERY_BUDGETS[name]:
+                        for query in queries:
+                            self.stdout.write(f'    {query["sql"]}')
+        return results
+
+    def handle(self, *args, **options):
+        small = self.measure(options['tasks'], options['show_sql'])
+        large = self.measure(options['tasks'] * 10, options['show_sql'])
+
+        failures = []
+        for (name, role), count in sorted(small.items()):
+            budget = QUERY_BUDGETS[name]
+            large_count = large[(name, role)]
+            ok = max(count, large_count) <= budget
+            line = f'{name:<18} {role:<7} {count:>3} / {large_count:>3} queries (budget {budget})'
+            self.stdout.write(self.style.SUCCESS(line) if ok else self.style.ERROR(line))
+            if not ok:
+                failures.append(f'{name} ({role})')
+
+        if failures:
+            raise CommandError('Query budget exceeded for: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import User
+from tasks.perf import datagen
+from tasks.perf.harness import client_for, isolated_database
+from tasks.perf.plans import check_endpoints
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database, EXPLAIN every query the read endpoints run '
+        'and fail if any plan falls back to a full table scan. Plans are read as if '
+        'every table were large (see tasks/perf/plans.py), so --tasks only changes '
+        'how long the seeding takes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20000, help='Number of tasks to seed.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only the failing ones.')
+
+    def handle(self, *args, **options):
+        failures = []
+        with isolated_database():
+            tasks = options['tasks']
+            ids = datagen.generate(
+                users=max(20, tasks // 50),
+                projects=max(5, tasks // 50),
+                tasks=tasks,
+                comments_per_task=2,
+                users_per_project=10,
+            )
+
+            admin = User.objects.get(pk=ids['users'][0])
+            member = User.objects.get(pk=ids['users'][1])
+            for role, user in (('admin', admin), ('member', member)):
+                for name, sql, plan, scans in check_endpoints(client_for(user), role, ids):
+                    if options['verbose_plans'] or scans:
+                        style = self.style.ERROR if scans else self.style.SUCCESS
+                        self.stdout.write(style(f'{name} ({role}): {sql}'))
+                        for line in plan:
+                            self.stdout.write(f'    {line}')
+                    if scans:
+                        failures.append(f'{name} ({role}) scans {", ".join(sorted(scans))}')
+
+        if failures:
+            raise CommandError('Full table scans found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No read endpoint falls back to a full table scan.'))
@@ -0,0 +1,59 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import exports, jobs
+from tasks.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Write every task of a project, with assignees and comments, as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('--format', dest='export_format', choices=sorted(exports.FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write to (defaults to stdout).')
+        parser.add_argument('--no-comments', action='store_true', help='Leave comments out of the export.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tasks fetched (and prefetched) per chunk.')
+        parser.add_argument(
+            '--defer', action='store_true',
+            help='Queue the export for the background worker instead (needs --output and JOBS_ENABLED).',
+        )
+
+    def handle(self, *args, **options):
+        project_id = options['project_id']
+        if not Project.objects.filter(pk=project_id).exists():
+            raise CommandError(f'Project {project_id} does not exist.')
+
+        if options['defer']:
+            if not options['output']:
+                raise CommandError('--defer needs --output.')
+            if not jobs.get_setting('ENABLED'):
+                raise CommandError('The job queue is disabled; set JOBS_ENABLED=true and run run_worker.')
+            # A relative path would be resolved in the worker's working directory
+            path = os.path.abspath(options['output'])
+            jobs.defer(
+                exports.write_export, project_id, path, options['export_format'],
+                include_comments=not options['no_comments'], chunk_size=options['chunk_size'],
+                key=f'export:{path}',
+            )
+            self.stderr.write(self.style.SUCCESS(f'Queued the export of project {project_id} to {path}.'))
+            return
+
+        if not options['output']:
+            rows = exports.stream_tasks(
+                project_id,
+                options['export_format'],
+                include_comments=not options['no_comments'],
+                chunk_size=options['chunk_size'],
+            )
+            for row in rows:
+                sys.stdout.write(row)
+            return
+
+        count = exports.write_export(
+            project_id, options['output'], options['export_format'],
+            include_comments=not options['no_comments'], chunk_size=options['chunk_size'],
+        )
+        self.stderr.write(self.style.SUCCESS(f'Wrote {count} tasks to {options["output"]}.'))
@@ -0,0 +1,52 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import provisioning
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users in bulk from a CSV or NDJSON file (columns or keys: username, password, '
+        'email, is_admin, projects), hashing passwords across worker processes. Writes an NDJSON '
+        'report with one line per row.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin.')
+        parser.add_argument(
+            '--format', dest='import_format', choices=sorted(provisioning.FORMATS),
+            help='Defaults to the file extension.',
+        )
+        parser.add_argument('--report', help='File to write the per-row report to (defaults to stdout).')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Processes hashing passwords; 0 hashes in this process.',
+        )
+        parser.add_argument('--batch-size', type=int, default=provisioning.get_setting('BATCH_SIZE'),
+                            help='Rows validated, hashed and inserted together.')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--processes cannot be negative and --batch-size must be at least 1')
+        import_format = options['import_format']
+        if import_format is None:
+            import_format = os.path.splitext(options['path'])[1].lstrip('.').lower()
+            if options['path'] == '-' or import_format not in provisioning.FORMATS:
+                raise CommandError('Pass --format: it cannot be told from the file name.')
+
+        source = sys.stdin.buffer if options['path'] == '-' else open(options['path'], 'rb')
+        report = open(options['report'], 'w') if options['report'] else sys.stdout
+        try:
+            try:
+                rows = provisioning.read_rows(source, import_format)
+            except provisioning.ProvisioningError as exc:
+                raise CommandError(str(exc))
+            for line in provisioning.stream_report(rows, options['processes'], options['batch_size']):
+                report.write(line)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+            if report is not sys.stdout:
+                report.close()
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete change-log entries older than --days. Clients whose cursor predates '
+        'the oldest remaining entry get a reset from /api/sync/ and reload everything.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep entries from the last N days.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Entries deleted per statement.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Entries are appended in id order, so the cutoff is an id boundary.
+        # A cursor whose entry is gone gets a reset, so the newest entry
+        # always stays for clients that are up to date.
+        newest = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        boundary = (
+            ChangeLogEntry.objects.filter(created_at__gte=cutoff).order_by('id').values_list('id', flat=True).first()
+        )
+        boundary = newest if boundary is None else min(boundary, newest)
+
+        deleted = 0
+        while True:
+            batch = list(
+                ChangeLogEntry.objects.filter(id__lt=boundary).order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            deleted += ChangeLogEntry.objects.filter(id__gte=batch[0], id__lte=batch[-1]).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change-log entries.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tasks import access
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the project and task visibility tables from memberships, creators and assignments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report rows that drifted, change nothing.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = 0
+            for table, changes in access.drift().items():
+                for kind, rows in changes.items():
+                    for row in sorted(rows):
+                        self.stdout.write(f'{table} {kind}: {row}')
+                    drifted += len(rows)
+            if drifted:
+                self.stdout.write(self.style.WARNING(f'{drifted} rows drifted.'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Visibility tables match.'))
+            return
+
+        count = access.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} rows.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from tasks import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard statistics rollups from the tasks, assignments and comments tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report counters that drifted, change nothing.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = rollups.drift()
+            for (metric, project_id, user_id, bucket), (stored, actual) in sorted(drifted.items()):
+                self.stdout.write(f'{metric} project={project_id} user={user_id} {bucket}: stored {stored}, actual {actual}')
+            if drifted:
+                self.stdout.write(self.style.WARNING(f'{len(drifted)} counters drifted.'))
+            else:
+                self.stdout.write(self.style.SUCCESS('All counters match.'))
+            return
+
+        count = rollups.recompute()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} counters.'))
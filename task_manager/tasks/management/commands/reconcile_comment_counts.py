@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.counters import reconcile_comment_counters
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in Task.comment_count / last_comment_at, one batch of tasks at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks checked per transaction.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id, checked, repaired = 0, 0, 0
+        while True:
+            # Walk the primary key so every batch is an index range scan
+            task_ids = list(
+                Task.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not task_ids:
+                break
+            with transaction.atomic():
+                repaired += reconcile_comment_counters(task_ids)
+            checked += len(task_ids)
+            last_id = task_ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} tasks, repaired {repaired}.'))
@@ -0,0 +1,96 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from tasks import rollups, search
+from tasks.models import User
+from tasks.perf import datagen, suite
+from tasks.perf.harness import isolated_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the scripted API scenarios against a generated dataset in a throwaway '
+        'database (SQLite or whatever DATABASES points to) and report latency '
+        'percentiles, query counts and peak memory per endpoint. Results can be '
+        'saved as JSON and compared with a baseline; a regression exits non-zero.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--projects', type=int, default=10)
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--comments-per-task', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per scenario.')
+        parser.add_argument('--only', action='append', help='Run scenarios whose name contains this (repeatable).')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare with the results in this JSON file.')
+        parser.add_argument(
+            '--threshold', type=float, default=suite.DEFAULT_THRESHOLD,
+            help='Allowed p50 slowdown against the baseline, as a fraction.',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=suite.DEFAULT_MIN_DELTA_MS,
+            help='Ignore p50 slowdowns smaller than this.',
+        )
+        parser.add_argument('--with-cache', action='store_true', help='Leave the response cache and ETags on.')
+
+    def report(self, name, result):
+        line = (
+            f'{name:<28} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+            f'{result["queries"]:>8} {result["peak_kib"]:>10.1f}'
+        )
+        if 'errors' in result:
+            self.stdout.write(self.style.ERROR(f'{line}  status {result["errors"]}'))
+        else:
+            self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+
+        dataset = {
+            'users': options['users'], 'projects': options['projects'], 'tasks': options['tasks'],
+            'comments_per_task': options['comments_per_task'], 'seed': options['seed'],
+        }
+        overrides = {} if options['with_cache'] else {'RESPONSE_CACHE': {'ENABLED': False, 'ETAGS': False}}
+        with isolated_database(), override_settings(**overrides):
+            ids = datagen.generate(**dataset)
+            # datagen bulk-inserts without signals, so build what they maintain
+            search.rebuild()
+            rollups.recompute()
+            # The member scenarios need a regular user with assigned tasks
+            member = User.objects.filter(is_admin=False, tasks_assigned__isnull=False).order_by('pk').first()
+            if member is None:
+                raise CommandError('The dataset has no regular user with assigned tasks.')
+            users = {'admin': User.objects.get(pk=ids['users'][0]), 'member': member}
+            self.stdout.write(
+                f'{"scenario":<28} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8} {"peak KiB":>10}'
+            )
+            results = suite.run_suite(ids, users, options['iterations'], options['only'], progress=self.report)
+            run = {'environment': suite.environment(dataset, options['iterations']), 'results': results}
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(run, f, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        failed = sorted(name for name, result in results.items() if 'errors' in result)
+        if failed:
+            raise CommandError('Unexpected status codes from: ' + ', '.join(failed))
+        if baseline is not None:
+            if baseline.get('environment', {}).get('dataset') != dataset:
+                self.stdout.write(self.style.WARNING('The baseline was recorded with a different dataset.'))
+            regressions = suite.compare(baseline, run, options['threshold'], options['min_delta_ms'])
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(regression))
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
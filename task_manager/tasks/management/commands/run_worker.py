@@ -0,0 +1,111 @@
+import os
+import signal
+import socket
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from tasks import jobs
+from tasks.metrics import REGISTRY
+from tasks.pools import ProcessPool
+
+# Seconds between sweeps for jobs of dead workers and for old finished jobs
+STALE_SWEEP_INTERVAL = 60
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (JOBS_ENABLED=true): thread-pool jobs in --threads '
+        'threads, process-pool jobs in --processes worker processes. Stops on SIGINT or '
+        'SIGTERM once the running jobs are done. On SQLite, set DB_SQLITE_CONCURRENT=true: '
+        'with deferred transactions concurrent writers fail with "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Jobs run at the same time.')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Worker processes for process-pool jobs; 0 runs them in the threads.',
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of waiting for more.')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1:
+            raise CommandError('--threads must be at least 1')
+        if options['processes'] < 0:
+            raise CommandError('--processes cannot be negative')
+
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: stop.set())
+
+        process_pool = ProcessPool(options['processes']) if options['processes'] else None
+        self.outcomes = Counter()
+        self.outcomes_lock = threading.Lock()
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(
+                target=self.work, name=f'job-worker-{n}',
+                args=(f'{name}:{n}', process_pool, stop, options['poll_interval'], options['once']),
+            )
+            for n in range(options['threads'])
+        ]
+        self.stderr.write(
+            f'Worker {name} running {options["threads"]} threads and {options["processes"]} processes.'
+        )
+        # Before the threads start, so that --once runs them too
+        self.requeue_stale()
+        for thread in threads:
+            thread.start()
+
+        last_sweep = time.monotonic()
+        last_prune = 0.0
+        try:
+            while any(thread.is_alive() for thread in threads):
+                now = time.monotonic()
+                if now - last_sweep >= STALE_SWEEP_INTERVAL:
+                    last_sweep = now
+                    self.requeue_stale()
+                if now - last_prune >= PRUNE_INTERVAL:
+                    last_prune = now
+                    jobs.prune()
+                REGISTRY.maybe_flush()
+                stop.wait(options['poll_interval'])
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            if process_pool is not None:
+                process_pool.shutdown()
+            connection.close()
+            REGISTRY.flush()
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(self.outcomes.items())) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped: {summary}.'))
+
+    def requeue_stale(self):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stderr.write(self.style.WARNING(f'Requeued {requeued} jobs of unresponsive workers.'))
+
+    def work(self, worker_name, process_pool, stop, poll_interval, once):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                job = jobs.claim(worker_name)
+                if job is None:
+                    if once:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                outcome = jobs.execute(job, process_pool)
+                with self.outcomes_lock:
+                    self.outcomes[outcome] += 1
+        finally:
+            connection.close()
@@ -0,0 +1,428 @@
+"""
+Prometheus metrics for GET /metrics, without external dependencies.
+
+Counters and histograms are written to a per-thread shard (a plain dict
+only its own thread touches), so recording never takes a lock; a scrape
+adds the shards up. Gauges and values owned by other modules (response
+cache hits, open database connections) are read by collectors at scrape
+time. The job queue depth is read from the database by the process serving
+the scrape.
+
+With METRICS['MULTIPROCESS_DIR'] set, every worker process writes its
+totals to `<dir>/<pid>.json` at most every FLUSH_INTERVAL seconds (and on
+exit), and a scrape of any worker merges all the files: counters and
+histograms are summed over every file, gauges only over processes that
+are still running. Clear the directory when the service restarts.
+"""
+import atexit
+import bisect
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+from django.db.models import Count, Min
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+
+from .caching import response_cache
+from .models import Job
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': None,
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def get_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULTS[name])
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class Registry:
+    """
+    Metric definitions plus the per-thread shards holding their values.
+    Sample keys are (metric name, label values, part), where part is None
+    for counters and gauges, and a bucket index or 'sum' for histograms.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.derived = []
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """
+        `collector()` returns {(name, label values, None): value} read at
+        scrape time, for values kept elsewhere.
+        """
+        self.collectors.append(collector)
+
+    def add_derived(self, compute):
+        """
+        `compute(samples)` returns samples worked out from the merged totals
+        of every process, such as ratios, which cannot be summed.
+        """
+        self.derived.append(compute)
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:  # once per thread
+                self._shards.append(shard)
+        return shard
+
+    def local_samples(self):
+        samples = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.items()):
+                samples[key] = samples.get(key, 0) + value
+        for collector in self.collectors:
+            samples.update(collector())
+        return samples
+
+    # Shared-directory mode
+
+    def flush(self):
+        directory = get_setting('MULTIPROCESS_DIR')
+        if not directory:
+            return
+        self._last_flush = time.monotonic()
+        data = {
+            'pid': os.getpid(),
+            'samples': [[name, list(labels), part, value] for (name, labels, part), value in self.local_samples().items()],
+        }
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(directory, f'{os.getpid()}.json'))
+
+    def maybe_flush(self):
+        if get_setting('MULTIPROCESS_DIR') and time.monotonic() - self._last_flush >= get_setting('FLUSH_INTERVAL'):
+            self.flush()
+
+    def merged_samples(self):
+        directory = get_setting('MULTIPROCESS_DIR')
+        if not directory:
+            return self.local_samples()
+        self.flush()
+        samples = {}
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # being replaced or truncated
+            alive = process_alive(data['pid'])
+            for name, labels, part, value in data['samples']:
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == 'gauge' and not alive):
+                    continue
+                key = (name, tuple(labels), part)
+                samples[key] = samples.get(key, 0) + value
+        return samples
+
+    def exposition(self):
+        samples = self.merged_samples()
+        for compute in self.derived:
+            samples.update(compute(samples))
+        by_metric = {}
+        for (name, labels, part), value in samples.items():
+            by_metric.setdefault(name, {})[(labels, part)] = value
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(by_metric.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+def process_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def label_values(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self, values):
+        return [
+            f'{self.name}{format_labels(zip(self.labelnames, labels))} {format_value(value)}'
+            for (labels, _), value in sorted(values.items())
+        ]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self.registry.shard()
+        key = (self.name, self.label_values(labels), None)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Values come from a collector registered with Registry.add_collector.
+    """
+    kind = 'gauge'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        shard = self.registry.shard()
+        label_values = self.label_values(labels)
+        bucket = (self.name, label_values, bisect.bisect_left(self.buckets, value))
+        total = (self.name, label_values, 'sum')
+        shard[bucket] = shard.get(bucket, 0) + 1
+        shard[total] = shard.get(total, 0) + value
+
+    def render(self, values):
+        series = {}
+        for (labels, part), value in values.items():
+            series.setdefault(labels, {})[part] = value
+        lines = []
+        for labels in sorted(series):
+            parts = series[labels]
+            pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for index, bound in enumerate(self.buckets + (float('inf'),)):
+                cumulative += parts.get(index, 0)
+                lines.append(f'{self.name}_bucket{format_labels(pairs + [("le", format_value(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(pairs)} {format_value(parts.get("sum", 0))}')
+            lines.append(f'{self.name}_count{format_labels(pairs)} {cumulative}')
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', 'Requests served, by handler, method and status.', ['handler', 'method', 'status'])
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to produce the response, by handler.', ['handler', 'method'],
+)
+AUTH_FAILURES = Counter('auth_failures_total', 'Responses denied for authentication (401) or permission (403) reasons.',
+                        ['handler', 'status'])
+TOKEN_BLACKLIST = Counter('token_blacklist_operations_total', 'Refresh token blacklist operations and their outcome.',
+                          ['operation', 'result'])
+CACHE_REQUESTS = Counter('response_cache_requests_total', 'Response cache lookups, by result.', ['result'])
+CACHE_HIT_RATIO = Gauge('response_cache_hit_ratio', 'Share of response cache lookups served from the cache.')
+DB_CONNECTIONS_CREATED = Counter('db_connections_created_total', 'Database connections opened, by alias.', ['alias'])
+DB_CONNECTIONS_OPEN = Gauge('db_connections_open', 'Database connections currently open, by alias.', ['alias'])
+JOBS_DEFERRED = Counter('jobs_deferred_total', 'Jobs queued for the background worker, by job.', ['job'])
+JOBS_FINISHED = Counter('jobs_finished_total', 'Job attempts ended, by job and result (ok, retry, failed, superseded).',
+                        ['job', 'result'])
+JOB_DURATION = Histogram('job_duration_seconds', 'Time spent on each job attempt, by job.', ['job'])
+JOBS_QUEUE_DEPTH = Gauge('jobs_queue_depth', 'Jobs in the queue table, by status.', ['status'])
+JOBS_QUEUE_LAG = Gauge('jobs_queue_lag_seconds', 'How long the oldest due job has been waiting for a worker.')
+LOGINS = Counter('logins_total', 'Login attempts, by result (ok, upgraded, failed, throttled, busy).', ['result'])
+PASSWORD_HASH_DURATION = Histogram('password_hash_duration_seconds', 'Time to verify a password, by hash algorithm.',
+                                   ['algorithm'])
+USERS_IMPORTED = Counter('users_imported_total', 'Rows of bulk user imports, by result (created, error).', ['result'])
+
+
+def handler_name(request):
+    """
+    `ViewSet.action` for viewsets (e.g. TaskViewSet.get_tasks_by_project),
+    `View.method` for other class-based views and the function name for
+    function views, so the label set stays bounded.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return f'{func.__module__.rsplit(".", 1)[-1]}.{func.__name__}'
+    actions = getattr(func, 'actions', None) or {}
+    method = request.method.lower()
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+# Open connections are tracked per process through the connection wrappers,
+# which are otherwise private to the thread (or async task) that made them.
+_connections = weakref.WeakSet()
+_connections_lock = threading.Lock()
+
+
+def track_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS_CREATED.inc(alias=connection.alias)
+    with _connections_lock:
+        _connections.add(connection)
+
+
+connection_created.connect(track_connection, dispatch_uid='tasks.metrics.track_connection')
+
+
+def collect_connections():
+    with _connections_lock:
+        wrappers = list(_connections)
+    open_by_alias = {}
+    for wrapper in wrappers:
+        if wrapper.connection is not None:
+            open_by_alias[wrapper.alias] = open_by_alias.get(wrapper.alias, 0) + 1
+    return {(DB_CONNECTIONS_OPEN.name, (alias,), None): count for alias, count in open_by_alias.items()}
+
+
+def collect_cache():
+    stats = response_cache.stats()
+    return {
+        (CACHE_REQUESTS.name, ('hit',), None): stats['hits'],
+        (CACHE_REQUESTS.name, ('miss',), None): stats['misses'],
+    }
+
+
+def cache_hit_ratio(samples):
+    hits = samples.get((CACHE_REQUESTS.name, ('hit',), None), 0)
+    total = hits + samples.get((CACHE_REQUESTS.name, ('miss',), None), 0)
+    return {(CACHE_HIT_RATIO.name, (), None): round(hits / total, 4) if total else 0.0}
+
+
+def job_queue(samples):
+    # A derived value rather than a collector: the table is shared, so it
+    # must be read once per scrape instead of summed over every process
+    now = timezone.now()
+    try:
+        depth = dict(
+            Job.objects.filter(status__in=[Job.QUEUED, Job.RUNNING, Job.FAILED])
+            .order_by().values_list('status').annotate(n=Count('id'))
+        )
+        oldest = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).aggregate(oldest=Min('run_after'))['oldest']
+    except DatabaseError:
+        return {}
+    result = {
+        (JOBS_QUEUE_DEPTH.name, (status,), None): depth.get(status, 0)
+        for status in (Job.QUEUED, Job.RUNNING, Job.FAILED)
+    }
+    result[(JOBS_QUEUE_LAG.name, (), None)] = (now - oldest).total_seconds() if oldest else 0.0
+    return result
+
+
+REGISTRY.add_collector(collect_connections)
+REGISTRY.add_collector(collect_cache)
+REGISTRY.add_derived(cache_hit_ratio)
+REGISTRY.add_derived(job_queue)
+atexit.register(REGISTRY.flush)
+
+
+class MetricsMiddleware:
+    """
+    Counts and times every request by handler. Place it near the top of
+    MIDDLEWARE; METRICS['ENABLED'] = False removes it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, elapsed):
+        handler = handler_name(request)
+        REQUESTS.inc(handler=handler, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(elapsed, handler=handler, method=request.method)
+        if response.status_code in (401, 403):
+            AUTH_FAILURES.inc(handler=handler, status=response.status_code)
+        REGISTRY.maybe_flush()
+
+
+def metrics_view(request):
+    """
+    GET /metrics in the Prometheus text format. Scrapers must send
+    METRICS['TOKEN'] as a bearer token; without a token the endpoint only
+    exists with DEBUG on, so a default deployment does not publish it.
+    """
+    token = get_setting('TOKEN')
+    if not get_setting('ENABLED') or not (token or settings.DEBUG):
+        raise Http404
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
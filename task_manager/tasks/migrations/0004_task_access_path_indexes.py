@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'due_date'], name='task_project_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date', 'id'], name='task_status_due_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'Archive'), _negated=True), fields=['due_date', 'id'], name='task_active_due_id_idx'),
+        ),
+        # The auto-created M2M tables only index (task_id, user_id) and each
+        # column alone; "everything assigned to user X" wants user_id first.
+        migrations.RunSQL(
+            'CREATE INDEX task_assignee_user_task_idx ON tasks_task_assigned_to (user_id, task_id);',
+            'DROP INDEX task_assignee_user_task_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX project_member_user_project_idx ON tasks_project_assigned_users (user_id, project_id);',
+            'DROP INDEX project_member_user_project_idx;',
+        ),
+    ]
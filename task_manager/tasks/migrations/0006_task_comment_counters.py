@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:17
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counters(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Comment = apps.get_model('tasks', 'Comment')
+    per_task = Comment.objects.filter(task_id=OuterRef('pk')).order_by().values('task_id')
+    Task.objects.update(
+        comment_count=Coalesce(Subquery(per_task.annotate(n=Count('id')).values('n'), output_field=IntegerField()), 0),
+        last_comment_at=Subquery(per_task.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_project_updated_at_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_comment_counters, migrations.RunPython.noop),
+    ]
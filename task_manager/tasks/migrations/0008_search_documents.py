@@ -0,0 +1,112 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+# The full-text index itself is vendor specific and invisible to the ORM:
+# an external-content FTS5 table kept in step by triggers on SQLite, a
+# generated tsvector column with a GIN index on Postgres.
+INDEX_SQL = {
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE tasks_searchdocument_fts USING fts5(
+            title, body,
+            content='tasks_searchdocument', content_rowid='id',
+            tokenize='porter unicode61', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER tasks_searchdocument_fts_ai AFTER INSERT ON tasks_searchdocument BEGIN
+            INSERT INTO tasks_searchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_searchdocument_fts_ad AFTER DELETE ON tasks_searchdocument BEGIN
+            INSERT INTO tasks_searchdocument_fts (tasks_searchdocument_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_searchdocument_fts_au AFTER UPDATE ON tasks_searchdocument BEGIN
+            INSERT INTO tasks_searchdocument_fts (tasks_searchdocument_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO tasks_searchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        ALTER TABLE tasks_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX searchdocument_vector_gin ON tasks_searchdocument USING GIN (search_vector)",
+    ],
+}
+
+DROP_SQL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS tasks_searchdocument_fts_ai",
+        "DROP TRIGGER IF EXISTS tasks_searchdocument_fts_ad",
+        "DROP TRIGGER IF EXISTS tasks_searchdocument_fts_au",
+        "DROP TABLE IF EXISTS tasks_searchdocument_fts",
+    ],
+    'postgresql': [
+        "DROP INDEX IF EXISTS searchdocument_vector_gin",
+        "ALTER TABLE tasks_searchdocument DROP COLUMN IF EXISTS search_vector",
+    ],
+}
+
+BACKFILL_SQL = [
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'project', id, NULL, id, name, description FROM tasks_project
+    """,
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'task', id, id, project_id, title, description FROM tasks_task
+    """,
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'comment', id, task_id, NULL, '', text FROM tasks_comment
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    for sql in INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+    for sql in BACKFILL_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    for sql in DROP_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('project', 'Project'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('task_id', models.BigIntegerField(blank=True, null=True)),
+                ('project_id', models.BigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_id'], name='searchdocument_task_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='searchdocument_kind_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:32
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+CLOSED_STATUSES = ('Completed', 'Archive')
+
+
+def backfill_rollups(apps, schema_editor):
+    # Frozen copy of tasks.rollups.recompute() for the historical models
+    Task = apps.get_model('tasks', 'Task')
+    Comment = apps.get_model('tasks', 'Comment')
+    DashboardRollup = apps.get_model('tasks', 'DashboardRollup')
+    rows = []
+    for field in ('status', 'priority'):
+        for item in Task.objects.order_by().values('project_id', field).annotate(n=Count('id')):
+            rows.append(DashboardRollup(metric=field, project_id=item['project_id'], bucket=item[field], count=item['n']))
+    open_tasks = Task.objects.exclude(status__in=CLOSED_STATUSES).order_by()
+    for item in open_tasks.values('project_id', 'due_date').annotate(n=Count('id')):
+        rows.append(
+            DashboardRollup(metric='open_due', project_id=item['project_id'], bucket=str(item['due_date']), count=item['n'])
+        )
+    links = Task.assigned_to.through.objects.order_by()
+    for item in links.values('user_id', 'task__status').annotate(n=Count('id')):
+        rows.append(DashboardRollup(metric='workload', user_id=item['user_id'], bucket=item['task__status'], count=item['n']))
+    comments = Comment.objects.annotate(day=TruncDate('created_at')).order_by()
+    for item in comments.values('task__project_id', 'day').annotate(n=Count('id')):
+        rows.append(
+            DashboardRollup(metric='comments', project_id=item['task__project_id'], bucket=str(item['day']), count=item['n'])
+        )
+    DashboardRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('status', 'Tasks by status'), ('priority', 'Tasks by priority'), ('open_due', 'Open tasks by due date'), ('workload', 'Tasks by assignee and status'), ('comments', 'Comments by day')], max_length=10)),
+                ('project_id', models.BigIntegerField(default=0)),
+                ('user_id', models.BigIntegerField(default=0)),
+                ('bucket', models.CharField(max_length=32)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'user_id'], name='dashboardrollup_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'project_id', 'user_id', 'bucket'), name='dashboardrollup_counter_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_access(apps, schema_editor):
+    # Frozen copy of tasks.access.rebuild() for the historical models
+    Project = apps.get_model('tasks', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    ProjectAccess = apps.get_model('tasks', 'ProjectAccess')
+    TaskAccess = apps.get_model('tasks', 'TaskAccess')
+    ProjectAccess.objects.bulk_create(
+        [
+            ProjectAccess(user_id=user_id, project_id=project_id, reason='member')
+            for project_id, user_id in Project.assigned_users.through.objects.values_list('project_id', 'user_id')
+        ]
+        + [
+            ProjectAccess(user_id=user_id, project_id=project_id, reason='creator')
+            for project_id, user_id in Project.objects.values_list('id', 'created_by_id')
+        ],
+        batch_size=1000,
+    )
+    TaskAccess.objects.bulk_create(
+        [
+            TaskAccess(user_id=user_id, task_id=task_id)
+            for task_id, user_id in Task.assigned_to.through.objects.values_list('task_id', 'user_id')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('member', 'Assigned member'), ('creator', 'Creator')], max_length=10)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.project')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'project', 'reason'), name='projectaccess_user_project_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.task')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'task'), name='taskaccess_user_task_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:50
+
+import tasks.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='txid',
+            field=models.BigIntegerField(db_default=tasks.models.CurrentTransactionId()),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['txid', 'id'], name='changelog_txid_id_idx'),
+        ),
+    ]
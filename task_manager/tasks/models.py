@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 class User(AbstractUser):
     is_admin = models.BooleanField(default=False)
@@ -13,6 +14,7 @@ class Project(models.Model):
     description = models.TextField()
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_projects')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     assigned_users = models.ManyToManyField(User, related_name='assigned_projects', blank=True)
 
     def __str__(self):
@@ -29,6 +31,26 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     project = models.ForeignKey("Project", on_delete=models.CASCADE, related_name="tasks")
     assigned_to = models.ManyToManyField(User, related_name="tasks_assigned")
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from Comment, kept current by tasks/signals.py
+    comment_count = models.PositiveIntegerField(default=0)
+    last_comment_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (see tasks/pagination.py)
+            models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+            # by-project, optionally narrowed by status
+            models.Index(fields=['project', 'status', 'due_date'], name='task_project_status_due_idx'),
+            # by-user status filter, already in pagination order
+            models.Index(fields=['status', 'due_date', 'id'], name='task_status_due_id_idx'),
+            # Live (non-archived) work, which is what boards and the dashboard read
+            models.Index(
+                fields=['due_date', 'id'],
+                name='task_active_due_id_idx',
+                condition=~models.Q(status='Archive'),
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -41,5 +63,228 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order, overall and within a task (see tasks/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='comment_created_id_idx'),
+            models.Index(fields=['task', 'created_at', 'id'], name='comment_task_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.task.title}"
+
+
+class CurrentTransactionId(models.Func):
+    """
+    Id of the writing transaction on Postgres, 0 elsewhere (SQLite commits
+    one writer at a time, so its ids already commit in order).
+    """
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection):
+        return '0', []
+
+    def as_postgresql(self, compiler, connection):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of changes behind the delta sync endpoint (/api/sync/).
+    Entries are written by the signal receivers in the same transaction as
+    the change itself; the id is the sync cursor. Entries are read in
+    (txid, id) order, see tasks/changelog.py.
+    - `upsert` and `delete` entries concern every reader.
+    - `revoke` entries record that `user_id` lost sight of the object (for
+      example by being unassigned), so only that user gets a tombstone.
+    """
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+        ('user', 'User'),
+    ]
+    ACTION_CHOICES = [
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+        ('revoke', 'Revoke'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='upsert')
+    user_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    txid = models.BigIntegerField(db_default=CurrentTransactionId())
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='changelog_txid_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id}"
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one task, project or comment, kept in step by the
+    signal receivers. The full-text index over `title` and `body` lives in the
+    database itself (see tasks/search.py and migration 0008): an FTS5 table on
+    SQLite, a generated tsvector column with a GIN index on Postgres.
+    """
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    task_id = models.BigIntegerField(null=True, blank=True)
+    project_id = models.BigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchdocument_kind_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['task_id'], name='searchdocument_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class DashboardRollup(models.Model):
+    """
+    One pre-aggregated counter behind the dashboard stats endpoint, kept
+    current by tasks/rollups.py. Unused dimensions are 0 rather than NULL so
+    the unique constraint (and the upserts that rely on it) covers them.
+    - `status` / `priority`: tasks per project and bucket.
+    - `open_due`: tasks not yet completed or archived, per project and due date.
+    - `workload`: tasks per assignee and status.
+    - `comments`: comments per project and day.
+    """
+    METRIC_CHOICES = [
+        ('status', 'Tasks by status'),
+        ('priority', 'Tasks by priority'),
+        ('open_due', 'Open tasks by due date'),
+        ('workload', 'Tasks by assignee and status'),
+        ('comments', 'Comments by day'),
+    ]
+
+    metric = models.CharField(max_length=10, choices=METRIC_CHOICES)
+    project_id = models.BigIntegerField(default=0)
+    user_id = models.BigIntegerField(default=0)
+    bucket = models.CharField(max_length=32)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'project_id', 'user_id', 'bucket'], name='dashboardrollup_counter_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'user_id'], name='dashboardrollup_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.project_id}/{self.user_id}/{self.bucket} = {self.count}"
+
+
+class ProjectAccess(models.Model):
+    """
+    Why a user may read a project, one row per reason, kept current by
+    tasks/access.py. Project visibility and membership checks are single
+    lookups on the (user, project, reason) index instead of an OR across
+    the membership join.
+    """
+    MEMBER = 'member'
+    CREATOR = 'creator'
+    REASON_CHOICES = [
+        (MEMBER, 'Assigned member'),
+        (CREATOR, 'Creator'),
+    ]
+
+    # The unique index below starts with the user, so no separate one
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'project', 'reason'], name='projectaccess_user_project_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.reason} of project {self.project_id}"
+
+
+class TaskAccess(models.Model):
+    """
+    Tasks a (non-admin) user may read, kept current by tasks/access.py from
+    the task assignments.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task'], name='taskaccess_user_task_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} may read task {self.task_id}"
+
+
+class Job(models.Model):
+    """
+    A unit of deferred work for the background worker (tasks/jobs.py,
+    run by the run_worker command). The row is written in the same
+    transaction as the change that asked for it, so a rolled-back request
+    leaves no job behind and a committed one cannot lose its job.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Jobs sharing a key while queued collapse into one
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'], condition=models.Q(status='queued'), name='job_queued_key_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,177 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, composite ordering such as (due_date, id).
+
+    - The cursor stores the ordering values of the last row of the page, and the
+      next page is fetched with `WHERE (due_date, id) > (cursor)`, so page 1000
+      costs the same as page one as long as an index covers the ordering.
+    - `?paginate=false` returns the plain, un-paginated list. This keeps older
+      clients working while they migrate to reading `results`/`next`.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    unpaginated_query_param = 'paginate'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.get_page_window(queryset, request)
+        if window is None:
+            return None
+        return self.finish_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async counterpart of paginate_queryset for the views in async_views.py.
+        """
+        window = self.get_page_window(queryset, request)
+        if window is None:
+            return None
+        return self.finish_page([obj async for obj in window.aiterator(chunk_size=self.page_size_fetched)])
+
+    def get_page_window(self, queryset, request):
+        """
+        The queryset slice holding the requested page plus one extra row that
+        tells whether there is more, or None when pagination is turned off.
+        """
+        if request.query_params.get(self.unpaginated_query_param, '').lower() == 'false':
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size_fetched = self.get_page_size(request) + 1
+        self.position, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            queryset = queryset.order_by(*('-' + field for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            try:
+                queryset = queryset.filter(self.position_filter(self.position, self.reverse))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size_fetched]
+
+    def finish_page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) >= self.page_size_fetched
+        rows = rows[:self.page_size_fetched - 1]
+        if reverse:
+            rows.reverse()
+
+        # Moving forward we know there is a previous page whenever a cursor was
+        # given; moving backward the same holds for the next page.
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first_position = self.position_of(rows[0]) if rows else position
+        self.last_position = self.position_of(rows[-1]) if rows else position
+        return rows
+
+    def get_paginated_response(self, data):
+        links = [('next', self.get_next_link()), ('previous', self.get_previous_link())]
+        if isinstance(data, dict):
+            # Normalized payloads ({"tasks": ..., "projects": ..., "users": ...})
+            # sit next to the links instead of under `results`
+            return Response(OrderedDict(links + list(data.items())))
+        return Response(OrderedDict(links + [('results', data)]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def position_of(self, obj):
+        """
+        Ordering values of `obj`, as strings the ORM accepts back in filters.
+        """
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return values
+
+    def position_filter(self, position, reverse):
+        """
+        Expand `(f1, f2, ...) > (v1, v2, ...)` into OR-ed equality prefixes. The
+        leading `f1 >= v1` lets the database use the index as a range scan.
+        """
+        op = 'lt' if reverse else 'gt'
+        lead_op = 'lte' if reverse else 'gte'
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            term = Q(**{f'{field}__{op}': position[i]})
+            for prev_field, prev_value in zip(self.ordering[:i], position[:i]):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        return Q(**{f'{self.ordering[0]}__{lead_op}': position[0]}) & condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = [str(value) for value in payload['p']]
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+class TaskPagination(KeysetPagination):
+    ordering = ('due_date', 'id')
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class UserPagination(KeysetPagination):
+    ordering = ('id',)
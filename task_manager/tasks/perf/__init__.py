@@ -0,0 +1,5 @@
+"""
+Tooling for measuring the API: a deterministic data generator and helpers for
+running scenarios against a throwaway database. Used by the management
+commands that check query budgets and run benchmarks.
+"""
@@ -0,0 +1,107 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from ..models import Comment, Project, ProjectAccess, Task, TaskAccess, User
+
+DEFAULT_PASSWORD = 'bench-password'
+
+
+def generate(users=10, projects=3, tasks=100, comments_per_task=2, assignees_per_task=2,
+             users_per_project=5, seed=0, batch_size=1000):
+    """
+    Populate the database with a deterministic dataset.
+    - The same arguments and seed always produce the same rows.
+    - User 0 is an admin, everybody else is a regular user.
+    - Every user shares DEFAULT_PASSWORD so it is hashed only once.
+    - The visibility tables are filled in too (rows are bulk-inserted, so
+      no signal does it); the search index and rollups are not.
+    Returns the ids of the created rows.
+    """
+    rng = random.Random(seed)
+    password = make_password(DEFAULT_PASSWORD)
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+
+    with transaction.atomic():
+        user_objs = User.objects.bulk_create(
+            [
+                User(
+                    username=f'bench-user-{i}',
+                    email=f'bench-user-{i}@example.com',
+                    password=password,
+                    is_admin=(i == 0),
+                )
+                for i in range(users)
+            ],
+            batch_size=batch_size,
+        )
+        user_ids = [user.id for user in user_objs]
+        admin_id = user_ids[0]
+
+        project_objs = Project.objects.bulk_create(
+            [
+                Project(name=f'Project {i}', description=f'Generated project {i}', created_by_id=admin_id)
+                for i in range(projects)
+            ],
+            batch_size=batch_size,
+        )
+        project_ids = [project.id for project in project_objs]
+
+        regular_ids = user_ids[1:] or user_ids
+        members = {}
+        project_links = []
+        for project_id in project_ids:
+            members[project_id] = rng.sample(regular_ids, min(users_per_project, len(regular_ids)))
+            project_links.extend(
+                Project.assigned_users.through(project_id=project_id, user_id=user_id)
+                for user_id in members[project_id]
+            )
+        Project.assigned_users.through.objects.bulk_create(project_links, batch_size=batch_size)
+        ProjectAccess.objects.bulk_create(
+            [ProjectAccess(user_id=link.user_id, project_id=link.project_id, reason=ProjectAccess.MEMBER)
+             for link in project_links]
+            + [ProjectAccess(user_id=admin_id, project_id=project_id, reason=ProjectAccess.CREATOR)
+               for project_id in project_ids],
+            batch_size=batch_size,
+        )
+
+        start = date(2025, 1, 1)
+        task_objs = Task.objects.bulk_create(
+            [
+                Task(
+                    title=f'Task {i}',
+                    description=f'Generated task {i}',
+                    due_date=start + timedelta(days=rng.randrange(365)),
+                    priority=rng.choice(priorities),
+                    status=rng.choice(statuses),
+                    project_id=project_ids[i % len(project_ids)],
+                )
+                for i in range(tasks)
+            ],
+            batch_size=batch_size,
+        )
+        task_ids = [task.id for task in task_objs]
+
+        task_links = []
+        comment_objs = []
+        for task in task_objs:
+            pool = members[task.project_id]
+            for user_id in rng.sample(pool, min(assignees_per_task, len(pool))):
+                task_links.append(Task.assigned_to.through(task_id=task.id, user_id=user_id))
+            for n in range(comments_per_task):
+                comment_objs.append(Comment(task_id=task.id, user_id=rng.choice(pool), text=f'Comment {n} on task {task.id}'))
+        Task.assigned_to.through.objects.bulk_create(task_links, batch_size=batch_size)
+        TaskAccess.objects.bulk_create(
+            [TaskAccess(user_id=link.user_id, task_id=link.task_id) for link in task_links], batch_size=batch_size,
+        )
+        comment_ids = [comment.id for comment in Comment.objects.bulk_create(comment_objs, batch_size=batch_size)]
+
+    return {
+        'users': user_ids,
+        'projects': project_ids,
+        'tasks': task_ids,
+        'comments': comment_ids,
+    }
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Maximum number of SQL queries each read endpoint may run, whatever the row count.
+QUERY_BUDGETS = {
+    'users-list': 1,
+    'users-detail': 1,
+    'projects-list': 2,
+    'projects-detail': 2,
+    'tasks-list': 3,
+    'tasks-detail': 3,
+    'tasks-by-project': 3,
+    'tasks-by-user': 3,
+    'comments-list': 1,
+    'comments-detail': 1,
+    'comments-count': 1,
+}
+
+
+@contextmanager
+def isolated_database(verbosity=0, keepdb=False):
+    """
+    Run the enclosed block against a freshly created test database, so
+    measurements never touch (or depend on) the real data. Caches are cleared
+    on the way in and out so no response outlives the database it came from.
+    """
+    old_config = setup_databases(verbosity=verbosity, interactive=False, keepdb=keepdb)
+    for cache in caches.all():
+        cache.clear()
+    try:
+        yield
+    finally:
+        for cache in caches.all():
+            cache.clear()
+        teardown_databases(old_config, verbosity=verbosity, keepdb=keepdb)
+
+
+@contextmanager
+def test_database_on_disk():
+    """
+    Have isolated_database() create the SQLite test database in a temporary
+    file rather than in memory, for runs that need several connections
+    (threads) or more data than fits comfortably in RAM.
+    """
+    directory = tempfile.mkdtemp()
+    test_settings = connection.settings_dict['TEST']
+    original_name = test_settings.get('NAME')
+    test_settings['NAME'] = os.path.join(directory, 'bench.sqlite3')
+    try:
+        yield
+    finally:
+        test_settings['NAME'] = original_name
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def client_for(user):
+    """
+    API client authenticated as `user` without going through the login flow.
+    """
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def bearer_token(user):
+    """
+    Access token for `user`, for scenarios that exercise the real JWT
+    authentication instead of force_authenticate.
+    """
+    return str(AccessToken.for_user(user))
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values` (pct between 0 and 100).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def count_queries(func, *args, **kwargs):
+    """
+    Call `func` and return `(result, queries)` where `queries` is the list of
+    SQL statements it executed.
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        result = func(*args, **kwargs)
+    return result, ctx.captured_queries
+
+
+def read_endpoints(ids):
+    """
+    One URL per read endpoint, keyed by a short name, for a dataset produced
+    by `datagen.generate`.
+    """
+    user_id = ids['users'][1]
+    project_id = ids['projects'][0]
+    task_id = ids['tasks'][0]
+    comment_id = ids['comments'][0]
+    return {
+        'users-list': '/api/users/',
+        'users-detail': f'/api/users/{user_id}/',
+        'projects-list': '/api/projects/',
+        'projects-detail': f'/api/projects/{project_id}/',
+        'tasks-list': '/api/tasks/',
+        'tasks-detail': f'/api/tasks/{task_id}/',
+        'tasks-by-project': f'/api/tasks/by-project/?project_id={project_id}',
+        'tasks-by-user': '/api/tasks/by-user/',
+        'comments-list': f'/api/comments/?task={task_id}',
+        'comments-detail': f'/api/comments/{comment_id}/',
+        'comments-count': f'/api/comments/count/?task_id={task_id}',
+    }
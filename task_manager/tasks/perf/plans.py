@@ -0,0 +1,92 @@
+"""
+Query plan checks for the read endpoints, for the check_query_plans command
+and the test suite.
+
+A plan is read as if every table were large, so the result does not depend
+on how many rows the database holds:
+- SQLite plans without statistics (no ANALYZE), and then assumes a million
+  rows per table and selective indexes.
+- Postgres plans with enable_seqscan off, so it only reads a table from
+  start to end when no index fits the query.
+
+Any remaining full scan is a missing index, except on the tables of
+FULL_SCAN_ALLOWED, which return every row by design.
+"""
+import re
+
+from django.db import connection
+
+from .harness import count_queries, read_endpoints
+
+# Tables whose endpoints return every row by design (projects are not
+# paginated), so a full scan there is the expected plan.
+FULL_SCAN_ALLOWED = {
+    ('projects-list', 'admin'): {'tasks_project', 'tasks_project_assigned_users', 'tasks_user'},
+}
+
+
+def filtered_endpoints(ids):
+    """
+    The read endpoints plus the optional filters of by-user and by-project.
+    """
+    endpoints = read_endpoints(ids)
+    endpoints.update({
+        'tasks-by-user-status': '/api/tasks/by-user/?status=InProgress',
+        'tasks-by-user-due': '/api/tasks/by-user/?due_date=2025-06-01',
+        'tasks-by-user-assignee': f'/api/tasks/by-user/?user_id={ids["users"][2]}',
+        'comments-all': '/api/comments/',
+    })
+    return endpoints
+
+
+def explain(sql):
+    """
+    Return the plan of `sql` as a list of text lines.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('SET enable_seqscan = off')
+        try:
+            cursor.execute('EXPLAIN ' + sql)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute('RESET enable_seqscan')
+
+
+def full_scans(sql, plan):
+    """
+    Tables the plan reads from start to end.
+    - SQLite reports `SCAN <table>` without `USING ... INDEX`.
+    - Postgres reports `Seq Scan on <table>`.
+    A bare SQLite `SCAN` is also a walk of the primary key, which is an index
+    read when the query orders by that key and stops at a LIMIT.
+    """
+    if connection.vendor != 'sqlite':
+        return {match.group(1) for line in plan for match in [re.search(r'Seq Scan on (\w+)', line)] if match}
+    scans = set()
+    for line in plan:
+        match = re.match(r'SCAN (\w+)', line)
+        if not match or 'USING' in line:
+            continue
+        table = match.group(1)
+        by_key = re.search(rf'ORDER BY "{table}"\."id" (ASC|DESC) LIMIT \d+$', sql)
+        if by_key and not any('TEMP B-TREE' in line for line in plan):
+            continue
+        scans.add(table)
+    return scans
+
+
+def check_endpoints(client, role, ids):
+    """
+    Run every filtered endpoint as `client` and EXPLAIN the queries they
+    issue. Yields `(name, sql, plan, scans)` for each query, scans being
+    the tables read in full that FULL_SCAN_ALLOWED does not cover.
+    """
+    for name, url in filtered_endpoints(ids).items():
+        _, queries = count_queries(client.get, url)
+        allowed = FULL_SCAN_ALLOWED.get((name, role), set())
+        for query in queries:
+            plan = explain(query['sql'])
+            yield name, query['sql'], plan, full_scans(query['sql'], plan) - allowed
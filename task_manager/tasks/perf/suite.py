@@ -0,0 +1,245 @@
+"""
+Scripted scenarios against the API routes, for the run_benchmarks command.
+
+Each scenario is one request repeated against a dataset from
+`datagen.generate`, measured for latency, SQL queries and peak Python
+memory. Results are plain dicts so they can be saved as JSON and compared
+with an earlier run.
+
+GET /api/events/ is left out: the change feed only runs under the ASGI
+server and never finishes a response (bench_asgi covers the async stack).
+"""
+import itertools
+import platform
+import time
+import tracemalloc
+from datetime import date
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..logins import login_buckets
+from ..models import Task
+from ..visibility import visible_projects
+from .datagen import DEFAULT_PASSWORD
+from .harness import bearer_token, percentile, read_endpoints
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+class Scenario:
+    """
+    One scripted request.
+    - `path` and `body` are values or callables called before every
+      iteration (outside the timed section), for requests that must differ
+      each time, such as a new username or a fresh refresh token.
+    - `role` is the user the request is sent as: `admin`, `member` or None
+      for anonymous requests.
+    """
+
+    def __init__(self, name, path, method='get', body=None, role='member', expect=(200,)):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.body = body
+        self.role = role
+        self.expect = expect
+
+    def prepare(self):
+        path = self.path() if callable(self.path) else self.path
+        body = self.body() if callable(self.body) else self.body
+        return path, body
+
+
+def build_scenarios(ids, users):
+    """
+    Scenarios for every route in tasks/urls.py over the dataset `ids`.
+    `users` maps the roles to User objects.
+    """
+    member = users['member']
+    member_task = Task.objects.filter(assigned_to=member).order_by('pk').values_list('pk', flat=True).first()
+    member_project = visible_projects(member).order_by('pk').values_list('pk', flat=True).first()
+    # The detail endpoints read the first task and project, which must be
+    # ones the member can see
+    visible_ids = {
+        'admin': ids,
+        'member': dict(ids, tasks=[member_task, *ids['tasks']], projects=[member_project, *ids['projects']]),
+    }
+    some_tasks = ids['tasks'][:50]
+    sequence = itertools.count()
+    statuses = itertools.cycle(['InProgress', 'ToDo'])
+
+    def refresh_token():
+        return {'refresh': str(RefreshToken.for_user(member))}
+
+    def new_user():
+        n = next(sequence)
+        return {'username': f'bench-new-{n}', 'email': f'bench-new-{n}@example.com', 'password': DEFAULT_PASSWORD}
+
+    def new_tasks():
+        return {'tasks': [
+            {
+                'title': f'Bench task {next(sequence)}', 'description': 'Created by run_benchmarks',
+                'due_date': date.today().isoformat(), 'priority': 'medium', 'status': 'ToDo',
+                'project': ids['projects'][0], 'assigned_to': [member.pk],
+            }
+            for _ in range(10)
+        ]}
+
+    scenarios = [
+        Scenario('login', '/api/login/', 'post', {'username': member.username, 'password': DEFAULT_PASSWORD}, role=None),
+        Scenario('token-refresh', '/api/token/refresh/', 'post', refresh_token, role=None),
+        Scenario('logout', '/api/logout/', 'post', refresh_token),
+        Scenario('register', '/api/register/', 'post', new_user, role=None, expect=(201,)),
+        Scenario('profile', '/api/profile/'),
+        Scenario('cache-stats', '/api/cache/stats/', role='admin'),
+    ]
+    for role in ('admin', 'member'):
+        scenarios.extend(
+            Scenario(f'{name} ({role})', url, role=role) for name, url in read_endpoints(visible_ids[role]).items()
+        )
+    project_id = ids['projects'][0]
+    scenarios += [
+        Scenario('tasks-export', f'/api/tasks/export/?project_id={project_id}', role='admin'),
+        Scenario('tasks-normalized', '/api/tasks/?normalize=true'),
+        Scenario('tasks-sparse', '/api/tasks/?fields=id,title,status,due_date'),
+        Scenario('comments-counts', '/api/comments/counts/?task_ids=' + ','.join(map(str, some_tasks))),
+        Scenario('async-tasks-list', '/api/async/tasks/'),
+        Scenario('async-tasks-by-project', f'/api/async/tasks/by-project/?project_id={project_id}'),
+        Scenario('async-tasks-by-user', '/api/async/tasks/by-user/'),
+        Scenario('async-comments-list', f'/api/async/comments/?task={member_task}'),
+        Scenario('async-comments-count', f'/api/async/comments/count/?task_id={member_task}'),
+        Scenario('sync', '/api/sync/?cursor=0'),
+        Scenario('search', '/api/search/?q=generated+task'),
+        Scenario('dashboard-stats', '/api/dashboard/stats/'),
+        Scenario(
+            'comment-create', '/api/comments/', 'post',
+            lambda: {'task_id': member_task, 'text': f'Bench comment {next(sequence)}'}, expect=(201,),
+        ),
+        Scenario('tasks-bulk-create', '/api/tasks/bulk-create/', 'post', new_tasks, role='admin'),
+        Scenario(
+            'tasks-bulk-status', '/api/tasks/bulk-status/', 'post',
+            lambda: {'ids': some_tasks, 'status': next(statuses)}, role='admin',
+        ),
+        Scenario(
+            'tasks-bulk-reassign', '/api/tasks/bulk-reassign/', 'post',
+            {'ids': some_tasks, 'assigned_to': [member.pk], 'mode': 'add'}, role='admin',
+        ),
+    ]
+    return scenarios
+
+
+def authenticated_clients(users):
+    clients = {None: APIClient()}
+    for role, user in users.items():
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {bearer_token(user)}')
+        clients[role] = client
+    return clients
+
+
+def send(client, scenario):
+    path, body = scenario.prepare()
+    method = getattr(client, scenario.method)
+    start = time.perf_counter()
+    response = method(path) if body is None else method(path, body, format='json')
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response, time.perf_counter() - start
+
+
+def run_scenario(client, scenario, iterations, warmup=1):
+    """
+    Latency percentiles (ms), the largest query count of any iteration and
+    the peak memory allocated while serving one request (KiB, measured in a
+    separate pass since tracing slows everything down).
+    """
+    for _ in range(warmup):
+        send(client, scenario)
+
+    latencies, queries, errors = [], 0, []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            response, elapsed = send(client, scenario)
+        latencies.append(elapsed)
+        queries = max(queries, len(ctx.captured_queries))
+        if response.status_code not in scenario.expect:
+            errors.append(response.status_code)
+
+    tracemalloc.start()
+    try:
+        send(client, scenario)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+    if errors:
+        result['errors'] = sorted(set(errors))
+    return result
+
+
+def run_suite(ids, users, iterations, only=None, progress=None):
+    """
+    Run every scenario (or those whose name contains one of `only`) and
+    return {name: result}. The per-account login throttle is lifted: the
+    login scenario logs the same user in for every iteration.
+    """
+    clients = authenticated_clients(users)
+    results = {}
+    with override_settings(LOGIN={**getattr(settings, 'LOGIN', {}), 'BURST': 10 ** 9}):
+        login_buckets.clear()
+        for scenario in build_scenarios(ids, users):
+            if only and not any(part in scenario.name for part in only):
+                continue
+            results[scenario.name] = run_scenario(clients[scenario.role], scenario, iterations)
+            if progress:
+                progress(scenario.name, results[scenario.name])
+    login_buckets.clear()
+    return results
+
+
+def environment(dataset, iterations):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': dataset,
+        'iterations': iterations,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """
+    Regressions of `current` against `baseline` (both run results), as
+    messages. A scenario regresses when it runs more queries, or when its
+    p50 grew by more than `threshold` (a fraction) and by at least
+    `min_delta_ms`, which keeps sub-millisecond noise from failing a build.
+    """
+    regressions = []
+    for name, before in baseline['results'].items():
+        after = current['results'].get(name)
+        if after is None:
+            continue
+        if after['queries'] > before['queries']:
+            regressions.append(f'{name}: {before["queries"]} -> {after["queries"]} queries')
+        delta = after['p50_ms'] - before['p50_ms']
+        if delta > max(before['p50_ms'] * threshold, min_delta_ms):
+            regressions.append(f'{name}: p50 {before["p50_ms"]:.2f} -> {after["p50_ms"]:.2f} ms')
+    return regressions
@@ -0,0 +1,38 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+
+
+class ProcessPool:
+    """
+    A process pool that replaces itself once broken (a process was killed,
+    say by the OOM killer) instead of failing every later call. Processes
+    are spawned rather than forked, so none inherits the parent's threads
+    or database connections, and set Django up before their first call.
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self.lock = threading.Lock()
+        self.executor = self.start()
+
+    def start(self):
+        return ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+        )
+
+    def submit(self, *args):
+        executor = self.executor
+        try:
+            return executor.submit(*args)
+        except BrokenProcessPool:
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = self.start()
+            return self.executor.submit(*args)
+
+    def shutdown(self):
+        self.executor.shutdown()
@@ -0,0 +1,360 @@
+"""
+Bulk user import from CSV or NDJSON, for onboarding a whole organisation at
+once: POST /api/users/import/ and the import_users command.
+
+- Rows are read one at a time and handled in batches of BATCH_SIZE, so
+  memory stays flat however long the file is.
+- Each batch is checked with a couple of set queries: usernames already
+  taken, or repeated in the file, and unknown project ids are row errors.
+- The passwords of a batch are hashed across a process pool of
+  HASH_PROCESSES processes (0 hashes in the calling thread).
+- The users are inserted with one bulk_create. Their project memberships go
+  in with one bulk insert into the membership table, in the same
+  transaction.
+- Every row gets a result, in order: created with its id, or the error. A
+  bad row never stops the import.
+- The API imports at most MAX_REQUEST_ROWS rows within the request, which a
+  web worker's timeout would otherwise cut short. With the job queue on
+  (JOBS['ENABLED']) it saves the body in IMPORT_DIR instead and the worker
+  runs the import (`import_file`), writing the report next to it.
+
+Bulk statements bypass the model signals, so every batch sends
+`users_bulk_created` for the receivers in tasks/signals.py.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from . import jobs, metrics
+from .models import Project, User
+from .pools import ProcessPool
+from .serializers import UserImportSerializer
+from .signals import users_bulk_created
+
+DEFAULTS = {
+    'HASH_PROCESSES': 0,
+    'BATCH_SIZE': 500,
+    'MAX_REQUEST_ROWS': 50,
+    'IMPORT_DIR': None,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+USERNAME_TAKEN = 'A user with that username already exists.'
+
+ProjectMember = Project.assigned_users.through
+
+
+def get_setting(name):
+    return getattr(settings, 'PROVISIONING', {}).get(name, DEFAULTS[name])
+
+
+class ProvisioningError(Exception):
+    """
+    The import as a whole cannot be read (as opposed to a single row).
+    """
+
+
+def read_rows(stream, import_format):
+    """
+    `(row number, fields)` for each row of a binary `stream`, read as they
+    are iterated. Fields is a dict, or a message when the row cannot be
+    parsed. In CSV, `projects` holds project ids separated by semicolons
+    and the header row is not counted.
+    """
+    if import_format not in FORMATS:
+        raise ProvisioningError(f'Format must be one of {", ".join(FORMATS)}.')
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if import_format == 'ndjson':
+        return ndjson_rows(text)
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or 'username' not in reader.fieldnames:
+        raise ProvisioningError('The CSV header must name at least a username column.')
+    return csv_rows(reader)
+
+
+def count_rows(stream, import_format):
+    """
+    The number of rows read_rows() would yield for a seekable binary
+    `stream`, which is left open and rewound. Raises ProvisioningError as
+    read_rows() does.
+    """
+    if import_format not in FORMATS:
+        raise ProvisioningError(f'Format must be one of {", ".join(FORMATS)}.')
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if import_format == 'ndjson':
+            return sum(1 for line in text if line.strip())
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or 'username' not in reader.fieldnames:
+            raise ProvisioningError('The CSV header must name at least a username column.')
+        return sum(1 for _ in reader)
+    except UnicodeDecodeError:
+        raise ProvisioningError('The body must be UTF-8 text.')
+    finally:
+        text.detach()
+        stream.seek(0)
+
+
+def csv_rows(reader):
+    for number, row in enumerate(reader, 1):
+        fields = {name: value for name, value in row.items() if name and value not in ('', None)}
+        if 'projects' in fields:
+            fields['projects'] = [value.strip() for value in fields['projects'].split(';') if value.strip()]
+        yield number, fields
+
+
+def ndjson_rows(lines):
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            yield number, 'Not valid JSON.'
+            continue
+        yield number, fields if isinstance(fields, dict) else 'Each line must be a JSON object.'
+
+
+def taken_usernames(usernames):
+    return set(User.objects.filter(username__in=list(usernames)).values_list('username', flat=True))
+
+
+def hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+@contextmanager
+def hashing_pool(processes):
+    """
+    A process pool of `processes` for the import, or None to hash inline.
+    """
+    if not processes:
+        yield None
+        return
+    pool = ProcessPool(processes)
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+class UserImport:
+    """
+    One import run. `run(rows)` yields a result per row as batches complete.
+    """
+
+    def __init__(self, pool=None, batch_size=None):
+        self.pool = pool
+        self.batch_size = batch_size or get_setting('BATCH_SIZE')
+        self.seen = set()
+        self.created = 0
+        self.failed = 0
+
+    def run(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield from self.import_batch(batch)
+                batch = []
+        if batch:
+            yield from self.import_batch(batch)
+
+    def summary(self):
+        return {'created': self.created, 'failed': self.failed}
+
+    def import_batch(self, rows):
+        results = {}
+        candidates = []
+        for number, fields in rows:
+            if isinstance(fields, str):
+                results[number] = fields
+                continue
+            serializer = UserImportSerializer(data=fields)
+            if not serializer.is_valid():
+                results[number] = serializer.errors
+                continue
+            data = serializer.validated_data
+            if data['username'] in self.seen:
+                results[number] = 'Username repeated in this import.'
+                continue
+            self.seen.add(data['username'])
+            candidates.append((number, data))
+
+        known_projects = set(
+            Project.objects.filter(pk__in={pk for _, data in candidates for pk in data['projects']})
+            .values_list('pk', flat=True)
+        )
+        taken = taken_usernames(data['username'] for _, data in candidates)
+        valid = []
+        for number, data in candidates:
+            unknown = set(data['projects']) - known_projects
+            if data['username'] in taken:
+                results[number] = USERNAME_TAKEN
+            elif unknown:
+                results[number] = f'Unknown projects: {sorted(unknown)}'
+            else:
+                valid.append((number, data))
+
+        hashes = self.hash([data['password'] for _, data in valid])
+        pending = [(number, data, encoded) for (number, data), encoded in zip(valid, hashes)]
+        results.update(self.insert(pending, results))
+
+        created = sum(1 for outcome in results.values() if isinstance(outcome, int))
+        self.created += created
+        self.failed += len(rows) - created
+        metrics.USERS_IMPORTED.inc(created, result='created')
+        metrics.USERS_IMPORTED.inc(len(rows) - created, result='error')
+        for number, _ in rows:
+            outcome = results[number]
+            if isinstance(outcome, int):
+                yield {'row': number, 'status': 'created', 'id': outcome}
+            else:
+                yield {'row': number, 'status': 'error', 'error': outcome}
+
+    def hash(self, passwords):
+        if self.pool is None or len(passwords) < 2:
+            return hash_passwords(passwords)
+        size = -(-len(passwords) // self.pool.processes)
+        futures = [self.pool.submit(hash_passwords, passwords[i:i + size]) for i in range(0, len(passwords), size)]
+        return [encoded for future in futures for encoded in future.result()]
+
+    def insert(self, pending, results):
+        """
+        Create the users of `pending` ((row number, data, hash) tuples) and
+        their memberships, returning {row number: user id}. A username taken
+        by a concurrent writer since the check fails the insert, which is
+        retried once without it; rows that still cannot be saved go to
+        `results` as errors.
+        """
+        try:
+            with transaction.atomic():
+                return self.create(pending)
+        except IntegrityError:
+            taken = taken_usernames(data['username'] for _, data, _ in pending)
+        for number, data, _ in pending:
+            if data['username'] in taken:
+                results[number] = USERNAME_TAKEN
+        pending = [row for row in pending if row[1]['username'] not in taken]
+        try:
+            with transaction.atomic():
+                return self.create(pending)
+        except IntegrityError as exc:
+            for number, _, _ in pending:
+                results[number] = f'Could not be saved: {exc}'
+            return {}
+
+    def create(self, pending):
+        if not pending:
+            return {}
+        users = User.objects.bulk_create([
+            User(username=data['username'], email=data['email'], is_admin=data['is_admin'], password=encoded)
+            for _, data, encoded in pending
+        ])
+        memberships = [
+            (user.pk, project_id)
+            for (_, data, _), user in zip(pending, users)
+            for project_id in set(data['projects'])
+        ]
+        ProjectMember.objects.bulk_create(
+            [ProjectMember(user_id=user_id, project_id=project_id) for user_id, project_id in memberships],
+            batch_size=1000,
+        )
+        users_bulk_created.send(sender=User, user_ids=[user.pk for user in users], memberships=memberships)
+        return {number: user.pk for (number, _, _), user in zip(pending, users)}
+
+
+def stream_report(rows, processes, batch_size=None, on_close=None):
+    """
+    Run an import of `rows` and yield its report as NDJSON lines: one per
+    row, then `{"summary": {"created": n, "failed": n}}`. `on_close` is
+    called once the import ends or the client goes away.
+    """
+    try:
+        with hashing_pool(processes) as pool:
+            user_import = UserImport(pool, batch_size)
+            for result in user_import.run(rows):
+                yield json.dumps(result) + '\n'
+        yield json.dumps({'summary': user_import.summary()}) + '\n'
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+def import_dir():
+    directory = get_setting('IMPORT_DIR') or os.path.join(tempfile.gettempdir(), 'task-manager-imports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def import_paths(import_id, import_format):
+    """
+    The saved body and the report of the import `import_id`.
+    """
+    base = os.path.join(import_dir(), import_id)
+    return f'{base}.{import_format}', f'{base}.report.ndjson'
+
+
+def queue_import(stream, import_format):
+    """
+    Save the binary `stream` and queue its import for the worker. Returns
+    the import id, under which import_status() finds the report once done.
+    """
+    import_id = uuid.uuid4().hex
+    source, _ = import_paths(import_id, import_format)
+    with open(source, 'xb') as saved:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            saved.write(chunk)
+    jobs.defer(import_file, import_id, import_format)
+    return import_id
+
+
+def import_status(import_id):
+    """
+    `('done', report path)`, `('pending', None)` while queued or running,
+    or `(None, None)` for an unknown import.
+    """
+    sources, reports = zip(*(import_paths(import_id, import_format) for import_format in FORMATS))
+    if os.path.exists(reports[0]):
+        return 'done', reports[0]
+    if any(os.path.exists(source) for source in sources):
+        return 'pending', None
+    return None, None
+
+
+@jobs.job(pool='process', max_attempts=1)
+def import_file(import_id, import_format):
+    """
+    Run an import saved by queue_import(). The report only appears once the
+    import ended, with a last line saying why when it stopped early. Not
+    retried: a second run would report the users of the first as taken.
+    """
+    source, report = import_paths(import_id, import_format)
+    partial = f'{report}.{uuid.uuid4().hex}.partial'
+    try:
+        with open(source, 'rb') as stream, open(partial, 'x') as output:
+            try:
+                # The job has a worker process of its own, so it hashes inline
+                for line in stream_report(read_rows(stream, import_format), 0):
+                    output.write(line)
+            except Exception as exc:
+                output.write(json.dumps({'error': f'The import stopped: {exc}'}) + '\n')
+                raise
+    finally:
+        if os.path.exists(partial):
+            os.replace(partial, report)
+        os.unlink(source)
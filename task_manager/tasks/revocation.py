@@ -0,0 +1,277 @@
+"""
+Fast path for the refresh token blacklist check (simplejwt's token_blacklist
+app), switched on with TOKEN_BLACKLIST_CACHE['ENABLED'].
+
+Every refresh, and every logout, first asks whether the token's jti is
+blacklisted. Without this module that is a join query each time; with it:
+- A Bloom filter of the jtis of unexpired blacklisted tokens answers
+  "certainly not blacklisted" without a query. "Maybe" (about ERROR_RATE
+  of the tokens that are not blacklisted) falls through to the database.
+- An LRU of jtis known to be blacklisted answers replayed rotated or
+  logged-out tokens. Blacklisting is permanent, so those never go stale.
+- The filter follows the BlacklistedToken table by id. A process reads the
+  rows added since its last sync when the version counter in the cache
+  (bumped whenever a token is blacklisted) has moved, and at least every
+  SYNC_INTERVAL seconds. With a shared cache (REDIS_URL) other processes'
+  blacklistings are seen at once; with the per-process local-memory cache
+  it can take SYNC_INTERVAL seconds. The process that blacklists a token
+  always knows straight away.
+- Memory is bounded: the filter is sized for CAPACITY jtis and rebuilt from
+  the unexpired rows every REBUILD_INTERVAL seconds, in a background
+  thread, which drops expired tokens (an expired token is rejected however
+  its jti is answered). Past CAPACITY live blacklisted tokens more checks
+  fall through to the database, but none gets a wrong answer.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from . import metrics
+
+DEFAULTS = {
+    'ENABLED': False,
+    'CAPACITY': 1_000_000,
+    'ERROR_RATE': 0.01,
+    'LRU_SIZE': 10_000,
+    'SYNC_INTERVAL': 5,
+    'REBUILD_INTERVAL': 3600,
+    'ALIAS': 'default',
+}
+
+VERSION_KEY = 'token-blacklist:version'
+# Ids are handed out at insert but become visible at commit, so a sync can
+# see id 12 before 11 commits. Ids skipped over are looked for again by
+# later syncs for this long (and at most MAX_GAPS of them).
+GAP_TIMEOUT = 60
+MAX_GAPS = 1000
+
+
+def get_setting(name):
+    return getattr(settings, 'TOKEN_BLACKLIST_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class BlacklistIndex:
+    """
+    The per-process filter and LRU. Checks never wait for the filter to be
+    built: that happens in a background thread, and until the first build
+    completes every check goes to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._watermark = 0
+        self._gaps = {}
+        self._version = None
+        self._synced_at = 0.0
+        self._built_at = None
+        self._building = False
+        self._added_while_building = None
+        self._known = OrderedDict()
+
+    @property
+    def cache(self):
+        return caches[get_setting('ALIAS')]
+
+    def is_blacklisted(self, jti):
+        if jti in self._known:
+            metrics.TOKEN_BLACKLIST.inc(operation='check', result='lru')
+            self.remember(jti)
+            return True
+        bloom = self.current_filter()
+        if bloom is not None and jti not in bloom:
+            metrics.TOKEN_BLACKLIST.inc(operation='check', result='filter')
+            return False
+        metrics.TOKEN_BLACKLIST.inc(operation='check', result='database')
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if blacklisted:
+            self.remember(jti)
+        return blacklisted
+
+    def remember(self, jti):
+        with self._lock:
+            self._known[jti] = True
+            self._known.move_to_end(jti)
+            while len(self._known) > get_setting('LRU_SIZE'):
+                self._known.popitem(last=False)
+
+    def added(self, jti):
+        """
+        `jti` was just blacklisted by this process: known here right away,
+        and to the other processes once the transaction commits.
+        """
+        self.remember(jti)
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+            if self._added_while_building is not None:
+                self._added_while_building.append(jti)
+        transaction.on_commit(self.bump)
+
+    def bump(self):
+        try:
+            version = self.cache.incr(VERSION_KEY)
+        except ValueError:
+            self.cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+            return
+        with self._lock:
+            if self._version is not None and version == self._version + 1:
+                # Only this process blacklisted since the last sync, and the
+                # filter already has the jti: no need to sync for it
+                self._version = version
+
+    def current_filter(self):
+        """
+        The filter, synced with the table, or None while there is none yet.
+        """
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at >= get_setting('REBUILD_INTERVAL'):
+            self.start_rebuild(now)
+        if self._filter is None:
+            return None
+        version = self.cache.get(VERSION_KEY)
+        if version == self._version and now - self._synced_at < get_setting('SYNC_INTERVAL'):
+            return self._filter
+        with self._lock:
+            if version != self._version or now - self._synced_at >= get_setting('SYNC_INTERVAL'):
+                self.sync(now)
+                # Read before syncing, so a bump racing the sync triggers another
+                self._version = version
+                self._synced_at = now
+            return self._filter
+
+    def start_rebuild(self, now):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            self._built_at = now
+        threading.Thread(target=self.rebuild_in_background, name='token-blacklist-filter', daemon=True).start()
+
+    def rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self._building = False
+            connection.close()
+
+    def rebuild(self):
+        """
+        Build a filter of the unexpired blacklisted tokens and swap it in.
+        This scans the whole table.
+        """
+        with self._lock:
+            self._added_while_building = []
+        try:
+            watermark = BlacklistedToken.objects.aggregate(last=Max('id'))['last'] or 0
+            # Recent ids under the watermark not committed yet become gaps, as
+            # in sync(). Read before the scan: a row committing in between is
+            # then only looked for again.
+            committed = set(
+                BlacklistedToken.objects.filter(id__gt=watermark - MAX_GAPS, id__lte=watermark)
+                .values_list('id', flat=True)
+            )
+            bloom = BloomFilter(get_setting('CAPACITY'), get_setting('ERROR_RATE'))
+            live = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list(
+                'token__jti', flat=True,
+            )
+            for jti in live.iterator(chunk_size=10000):
+                bloom.add(jti)
+            now = time.monotonic()
+            with self._lock:
+                # What this process blacklisted during the scan went into the
+                # old filter only
+                for jti in self._added_while_building:
+                    bloom.add(jti)
+                self._filter, self._watermark = bloom, watermark
+                self._gaps = {
+                    row_id: now for row_id in range(max(watermark - MAX_GAPS, 0) + 1, watermark)
+                    if row_id not in committed
+                }
+                # Rows blacklisted during the scan are past the watermark; the
+                # next check syncs them, whatever the version says
+                self._version = None
+                self._synced_at = 0.0
+                if self._built_at is None:
+                    self._built_at = now
+        finally:
+            with self._lock:
+                self._added_while_building = None
+
+    def sync(self, now):
+        self._gaps = {row_id: seen for row_id, seen in self._gaps.items() if now - seen < GAP_TIMEOUT}
+        rows = BlacklistedToken.objects.filter(Q(id__gt=self._watermark) | Q(id__in=list(self._gaps)))
+        found = set()
+        for row_id, jti in rows.values_list('id', 'token__jti'):
+            self._filter.add(jti)
+            found.add(row_id)
+            self._gaps.pop(row_id, None)
+        last = max(found, default=self._watermark)
+        for row_id in range(self._watermark + 1, last):
+            if row_id not in found and len(self._gaps) < MAX_GAPS:
+                self._gaps[row_id] = now
+        self._watermark = max(self._watermark, last)
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._watermark = 0
+            self._gaps = {}
+            self._version = None
+            self._synced_at = 0.0
+            self._built_at = None
+            self._added_while_building = None
+            self._known.clear()
+
+
+blacklist_index = BlacklistIndex()
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token whose blacklist check goes through `blacklist_index` when
+    the fast path is enabled.
+    """
+
+    def check_blacklist(self):
+        if not get_setting('ENABLED'):
+            return super().check_blacklist()
+        if blacklist_index.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
@@ -0,0 +1,332 @@
+"""
+Dashboard statistics served from DashboardRollup counters.
+
+Single-row changes adjust the counters by delta from the signal receivers
+(one upsert per touched counter). Bulk operations recompute the counters of
+the projects and users they touched, in the background when the job queue
+is enabled. `recompute()` rebuilds everything and
+is what the recompute_dashboard_stats command runs.
+
+`dashboard_stats` (from the rollups) and `live_stats` (GROUP BY over the
+source tables) return the same structure, so the two can be compared and
+benchmarked against each other.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import jobs
+from .caching import invalidate
+from .models import Comment, DashboardRollup, Task, User
+from .visibility import visible_projects
+
+CLOSED_STATUSES = ('Completed', 'Archive')
+TASK_METRICS = ('status', 'priority', 'open_due')
+DEFAULT_ACTIVITY_DAYS = 30
+
+TaskAssignee = Task.assigned_to.through
+
+
+def task_counters(project_id, status, priority, due_date):
+    """
+    Per-project counters one task contributes to.
+    """
+    keys = [('status', project_id, 0, status), ('priority', project_id, 0, priority)]
+    if status not in CLOSED_STATUSES:
+        keys.append(('open_due', project_id, 0, str(due_date)))
+    return keys
+
+
+def workload_counters(user_ids, status):
+    return [('workload', 0, user_id, status) for user_id in user_ids]
+
+
+def comment_counter(project_id, created_at):
+    return ('comments', project_id, 0, str(timezone.localdate(created_at)))
+
+
+def apply(deltas):
+    """
+    Add `deltas` ({(metric, project_id, user_id, bucket): n}) to the counters,
+    creating missing ones, in one batched upsert.
+    """
+    rows = [(*key, delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = DashboardRollup._meta.db_table
+    sql = (
+        f'INSERT INTO {table} (metric, project_id, user_id, bucket, count) VALUES (%s, %s, %s, %s, %s) '
+        f'ON CONFLICT (metric, project_id, user_id, bucket) DO UPDATE SET count = {table}.count + excluded.count'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def task_state(task):
+    return (task.project_id, task.status, task.priority, task.due_date)
+
+
+def stored_task_state(task_id):
+    """
+    State of the task as stored, read before a save. Inside a transaction
+    the row stays locked until commit, so a concurrent save of the same
+    task waits and then reads this save's result instead of moving the
+    counters from the same state twice.
+    """
+    tasks = Task.objects.filter(pk=task_id)
+    if transaction.get_connection().in_atomic_block:
+        tasks = tasks.select_for_update()
+    row = tasks.values_list('project_id', 'status', 'priority', 'due_date').first()
+    return tuple(row) if row else None
+
+
+def task_saved(task, before):
+    """
+    Move `task`'s counters from its `before` state (None when it was just
+    created) to its current one.
+    """
+    after = task_state(task)
+    if before == after:
+        return
+    deltas = Counter()
+    if before is not None:
+        deltas.subtract(task_counters(*before))
+    deltas.update(task_counters(*after))
+
+    if before is not None and before[1] != after[1]:
+        assignees = list(TaskAssignee.objects.filter(task_id=task.pk).values_list('user_id', flat=True))
+        deltas.subtract(workload_counters(assignees, before[1]))
+        deltas.update(workload_counters(assignees, after[1]))
+
+    if before is not None and before[0] != after[0]:
+        # Comment activity follows the task to its new project
+        for created_at in Comment.objects.filter(task_id=task.pk).values_list('created_at', flat=True):
+            deltas[comment_counter(before[0], created_at)] -= 1
+            deltas[comment_counter(after[0], created_at)] += 1
+    apply(deltas)
+
+
+def task_deleted(task, assignee_ids):
+    deltas = Counter()
+    deltas.subtract(task_counters(*task_state(task)))
+    deltas.subtract(workload_counters(assignee_ids, task.status))
+    apply(deltas)
+
+
+def assignees_changed(task_statuses, user_ids, sign):
+    """
+    `user_ids` were assigned to (sign=1) or unassigned from (sign=-1) the
+    tasks in `task_statuses` ({task_id: status}).
+    """
+    deltas = Counter()
+    for status in task_statuses.values():
+        for key in workload_counters(user_ids, status):
+            deltas[key] += sign
+    apply(deltas)
+
+
+def comment_changed(comment, project_id, sign):
+    if project_id is not None:
+        apply({comment_counter(project_id, comment.created_at): sign})
+
+
+def task_rows(project_ids=None):
+    tasks = Task.objects.all() if project_ids is None else Task.objects.filter(project_id__in=project_ids)
+    rows = []
+    for field in ('status', 'priority'):
+        for item in tasks.order_by().values('project_id', field).annotate(n=Count('id')):
+            rows.append(DashboardRollup(metric=field, project_id=item['project_id'], bucket=item[field], count=item['n']))
+    open_tasks = tasks.exclude(status__in=CLOSED_STATUSES).order_by()
+    for item in open_tasks.values('project_id', 'due_date').annotate(n=Count('id')):
+        rows.append(
+            DashboardRollup(metric='open_due', project_id=item['project_id'], bucket=str(item['due_date']), count=item['n'])
+        )
+    return rows
+
+
+def workload_rows(user_ids=None):
+    links = TaskAssignee.objects.all() if user_ids is None else TaskAssignee.objects.filter(user_id__in=user_ids)
+    return [
+        DashboardRollup(metric='workload', user_id=item['user_id'], bucket=item['task__status'], count=item['n'])
+        for item in links.order_by().values('user_id', 'task__status').annotate(n=Count('id'))
+    ]
+
+
+def comment_rows(project_ids=None):
+    comments = Comment.objects.all() if project_ids is None else Comment.objects.filter(task__project_id__in=project_ids)
+    return [
+        DashboardRollup(metric='comments', project_id=item['task__project_id'], bucket=str(item['day']), count=item['n'])
+        for item in comments.annotate(day=TruncDate('created_at')).order_by().values('task__project_id', 'day')
+        .annotate(n=Count('id'))
+    ]
+
+
+def recompute(project_ids=None, user_ids=None):
+    """
+    Rebuild counters from the source tables: everything by default, or only
+    the per-project counters of `project_ids` and the workload of `user_ids`.
+    """
+    with transaction.atomic():
+        if project_ids is None and user_ids is None:
+            DashboardRollup.objects.all().delete()
+            rows = task_rows() + workload_rows() + comment_rows()
+        else:
+            rows = []
+            if project_ids:
+                DashboardRollup.objects.filter(metric__in=TASK_METRICS, project_id__in=project_ids).delete()
+                rows += task_rows(project_ids)
+            if user_ids:
+                DashboardRollup.objects.filter(metric='workload', user_id__in=user_ids).delete()
+                rows += workload_rows(user_ids)
+        DashboardRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def drift():
+    """
+    Counters whose stored value differs from the source tables, as
+    {(metric, project_id, user_id, bucket): (stored, actual)}.
+    """
+    def key(row):
+        return (row.metric, row.project_id, row.user_id, row.bucket)
+
+    actual = {key(row): row.count for row in task_rows() + workload_rows() + comment_rows()}
+    stored = {key(row): row.count for row in DashboardRollup.objects.exclude(count=0)}
+    return {
+        counter: (stored.get(counter, 0), actual.get(counter, 0))
+        for counter in stored.keys() | actual.keys()
+        if stored.get(counter, 0) != actual.get(counter, 0)
+    }
+
+
+@jobs.job()
+def tasks_changed_in_bulk(task_ids, project_ids, user_ids):
+    assignees = set(TaskAssignee.objects.filter(task_id__in=task_ids).values_list('user_id', flat=True))
+    recompute(project_ids=set(project_ids), user_ids=assignees | set(user_ids))
+    # Dashboards cached between the change and a deferred recompute are stale
+    invalidate('dashboard')
+
+
+def empty_project(project):
+    return {'id': project['id'], 'name': project['name'], 'tasks': 0, 'by_status': {}, 'by_priority': {}, 'overdue': 0}
+
+
+def build_stats(projects, per_project, overdue, workload, activity, users, today):
+    """
+    Shape the response out of plain {key: count} maps, whichever way they
+    were computed.
+    """
+    project_stats = []
+    totals = {'tasks': 0, 'by_status': Counter(), 'by_priority': Counter(), 'overdue': 0}
+    for project in projects:
+        entry = empty_project(project)
+        for (metric, bucket), count in sorted(per_project.get(project['id'], {}).items()):
+            if count:
+                entry['by_' + metric][bucket] = count
+                totals['by_' + metric][bucket] += count
+        entry['tasks'] = sum(entry['by_status'].values())
+        entry['overdue'] = overdue.get(project['id'], 0)
+        totals['tasks'] += entry['tasks']
+        totals['overdue'] += entry['overdue']
+        project_stats.append(entry)
+
+    workload_stats = []
+    for user in users:
+        by_status = {status: count for status, count in sorted(workload.get(user['id'], {}).items()) if count}
+        if by_status:
+            open_count = sum(count for status, count in by_status.items() if status not in CLOSED_STATUSES)
+            workload_stats.append(
+                {'user_id': user['id'], 'username': user['username'], 'by_status': by_status, 'open': open_count}
+            )
+
+    return {
+        'as_of': str(today),
+        'totals': {
+            'tasks': totals['tasks'],
+            'by_status': dict(sorted(totals['by_status'].items())),
+            'by_priority': dict(sorted(totals['by_priority'].items())),
+            'overdue': totals['overdue'],
+        },
+        'projects': project_stats,
+        'workload': workload_stats,
+        'comment_activity': [{'date': day, 'count': count} for day, count in sorted(activity.items()) if count],
+    }
+
+
+def stats_scope(user):
+    """
+    Projects (and workload rows) a user's dashboard covers: everything for
+    admins, otherwise their visible projects and their own workload.
+    """
+    projects = list(visible_projects(user).order_by('id').values('id', 'name'))
+    users = User.objects.order_by('id') if user.is_admin else User.objects.filter(pk=user.pk)
+    return projects, list(users.values('id', 'username'))
+
+
+def dashboard_stats(user, days=DEFAULT_ACTIVITY_DAYS):
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    projects, users = stats_scope(user)
+    project_ids = [project['id'] for project in projects]
+    rollups = DashboardRollup.objects.filter(count__gt=0)
+    if not user.is_admin:
+        rollups = rollups.filter(Q(project_id__in=project_ids) | Q(metric='workload', user_id=user.pk))
+
+    per_project = defaultdict(dict)
+    for metric, project_id, bucket, count in (
+        rollups.filter(metric__in=('status', 'priority')).values_list('metric', 'project_id', 'bucket', 'count')
+    ):
+        per_project[project_id][(metric, bucket)] = count
+
+    overdue = dict(
+        rollups.filter(metric='open_due', bucket__lt=str(today)).order_by()
+        .values('project_id').annotate(n=Sum('count')).values_list('project_id', 'n')
+    )
+
+    workload = defaultdict(dict)
+    for user_id, bucket, count in rollups.filter(metric='workload').values_list('user_id', 'bucket', 'count'):
+        workload[user_id][bucket] = count
+
+    activity = dict(
+        rollups.filter(metric='comments', bucket__gte=str(since), bucket__lte=str(today)).order_by()
+        .values('bucket').annotate(n=Sum('count')).values_list('bucket', 'n')
+    )
+    return build_stats(projects, per_project, overdue, workload, activity, users, today)
+
+
+def live_stats(user, days=DEFAULT_ACTIVITY_DAYS):
+    """
+    Same as dashboard_stats, aggregated on the fly from the source tables.
+    """
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    projects, users = stats_scope(user)
+    project_ids = [project['id'] for project in projects]
+    tasks = Task.objects.filter(project_id__in=project_ids).order_by()
+
+    per_project = defaultdict(dict)
+    for field in ('status', 'priority'):
+        for item in tasks.values('project_id', field).annotate(n=Count('id')):
+            per_project[item['project_id']][(field, item[field])] = item['n']
+
+    overdue = dict(
+        tasks.exclude(status__in=CLOSED_STATUSES).filter(due_date__lt=today)
+        .values('project_id').annotate(n=Count('id')).values_list('project_id', 'n')
+    )
+
+    workload = defaultdict(dict)
+    links = TaskAssignee.objects.filter(user_id__in=[u['id'] for u in users]).order_by()
+    for item in links.values('user_id', 'task__status').annotate(n=Count('id')):
+        workload[item['user_id']][item['task__status']] = item['n']
+
+    activity = {
+        str(item['day']): item['n']
+        for item in Comment.objects.filter(task__project_id__in=project_ids)
+        .annotate(day=TruncDate('created_at')).filter(day__gte=since, day__lte=today)
+        .order_by().values('day').annotate(n=Count('id'))
+    }
+    return build_stats(projects, per_project, overdue, workload, activity, users, today)
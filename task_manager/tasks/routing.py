@@ -0,0 +1,122 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+Only requests that opt in read from a replica: viewsets with
+ReplicaReadsMixin mark their list and retrieve actions, once the user is
+authenticated. Everything else, including every read in a request that
+has written, goes to `default`.
+
+A user who wrote is pinned to the primary for STICKY_SECONDS, long enough
+for the replicas to catch up, so they never read their own change back as
+missing. The pin is kept in the default cache, which must be shared
+(REDIS_URL) when there is more than one worker process.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'STICKY_SECONDS': 10,
+}
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+def sticky_key(user_id):
+    return f'db-routing:sticky:{user_id}'
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and cache.get(sticky_key(user.pk)))
+
+
+class RoutingState:
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def read_from_replica(user):
+    """
+    Let the rest of the current request read from a replica, unless `user`
+    wrote recently. Returns whether it will.
+    """
+    state = _state.get()
+    if state is None or state.wrote or not get_setting('REPLICAS') or is_sticky(user):
+        return False
+    state.use_replica = True
+    return True
+
+
+def using_replica():
+    state = _state.get()
+    return state is not None and state.use_replica and not state.wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if using_replica():
+            return random.choice(get_setting('REPLICAS'))
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same rows as the primary
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Holds the routing state of each request and pins users who wrote to the
+    primary. Removes itself when no replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_setting('REPLICAS'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, state)
+        return response
+
+    def finish(self, request, state):
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            cache.set(sticky_key(user.pk), True, get_setting('STICKY_SECONDS'))
@@ -0,0 +1,235 @@
+"""
+Full-text search over task titles and descriptions, project names and
+descriptions, and comment text.
+
+SearchDocument rows are the indexed copy, written by the signal receivers,
+or by the background worker when the job queue is enabled (tasks/jobs.py).
+Ranking and matching run in the database: FTS5 with bm25() on SQLite,
+ts_rank_cd() over a GIN-indexed tsvector on Postgres (both created by
+migration 0008). Other databases fall back to unranked icontains filters.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import jobs
+from .models import Comment, Project, SearchDocument, Task
+from .visibility import visible_comments, visible_projects, visible_tasks
+
+KINDS = ('task', 'project', 'comment')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_TERMS = 8
+
+FTS_TABLE = 'tasks_searchdocument_fts'
+# bm25() column weights: a hit in the title counts more than one in the body
+SQLITE_WEIGHTS = (10.0, 1.0)
+
+
+def parse_terms(query):
+    """
+    Words of `query`, lowercased. Everything else is dropped, so user input
+    never reaches the MATCH / to_tsquery syntax.
+    """
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def task_document(task):
+    return SearchDocument(
+        kind='task', object_id=task.pk, task_id=task.pk, project_id=task.project_id,
+        title=task.title, body=task.description,
+    )
+
+
+def project_document(project):
+    return SearchDocument(
+        kind='project', object_id=project.pk, task_id=None, project_id=project.pk,
+        title=project.name, body=project.description,
+    )
+
+
+def comment_document(comment):
+    return SearchDocument(
+        kind='comment', object_id=comment.pk, task_id=comment.task_id, project_id=None,
+        title='', body=comment.text,
+    )
+
+
+DOCUMENTS = {
+    'task': (Task, task_document),
+    'project': (Project, project_document),
+    'comment': (Comment, comment_document),
+}
+
+
+def index(documents):
+    """
+    Insert or refresh `documents` with a single upsert statement.
+    """
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['task_id', 'project_id', 'title', 'body'],
+        )
+
+
+def unindex(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+@jobs.job()
+def reindex(kind, object_ids):
+    """
+    Bring the documents of `object_ids` in line with the rows as they are
+    now: index the objects that exist and drop the others.
+    """
+    model, document = DOCUMENTS[kind]
+    objects = list(model.objects.filter(pk__in=object_ids))
+    index([document(obj) for obj in objects])
+    missing = set(object_ids) - {obj.pk for obj in objects}
+    if missing:
+        unindex(kind, missing)
+
+
+def index_later(kind, instance):
+    """
+    Index a saved object: through the job queue when it is enabled, with at
+    most one pending job per object, otherwise straight from `instance`.
+    """
+    if jobs.get_setting('ENABLED'):
+        jobs.defer(reindex, kind, [instance.pk], key=f'search:{kind}:{instance.pk}')
+    else:
+        index([DOCUMENTS[kind][1](instance)])
+
+
+def unindex_later(kind, object_id):
+    if jobs.get_setting('ENABLED'):
+        # A reindex queued by an earlier save finds the row gone just the same
+        jobs.defer(reindex, kind, [object_id], key=f'search:{kind}:{object_id}')
+    else:
+        unindex(kind, [object_id])
+
+
+def visible_documents(user, kinds=KINDS):
+    documents = SearchDocument.objects.filter(kind__in=kinds)
+    if user.is_admin:
+        return documents
+    return documents.filter(
+        Q(kind='task', object_id__in=visible_tasks(user).values('pk'))
+        | Q(kind='project', object_id__in=visible_projects(user).values('pk'))
+        | Q(kind='comment', object_id__in=visible_comments(user).values('pk'))
+    )
+
+
+def search(user, query, kinds=KINDS, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Ranked hits for `query` among the documents `user` may see. Every word is
+    matched as a prefix and all of them must match.
+    """
+    return search_documents(visible_documents(user, kinds), query, limit, offset)
+
+
+def search_documents(documents, query, limit=DEFAULT_LIMIT, offset=0):
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        return search_sqlite(documents, terms, limit, offset)
+    if vendor == 'postgresql':
+        return search_postgres(documents, terms, limit, offset)
+    return search_fallback(documents, terms, limit, offset)
+
+
+def run_hits_query(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def search_sqlite(documents, terms, limit, offset):
+    visible_sql, visible_params = documents.values('id').query.sql_with_params()
+    match = ' '.join(f'"{term}"*' for term in terms)
+    sql = f"""
+        SELECT d.id, d.kind, d.object_id, d.task_id, d.project_id, d.title,
+               snippet({FTS_TABLE}, -1, '', '', '…', 16) AS snippet,
+               -bm25({FTS_TABLE}, %s, %s) AS rank
+        FROM {FTS_TABLE}
+        JOIN tasks_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.id IN ({visible_sql})
+        ORDER BY rank DESC, d.id
+        LIMIT %s OFFSET %s
+    """
+    return run_hits_query(sql, [*SQLITE_WEIGHTS, match, *visible_params, limit, offset])
+
+
+def search_postgres(documents, terms, limit, offset):
+    visible_sql, visible_params = documents.values('id').query.sql_with_params()
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    sql = f"""
+        SELECT d.id, d.kind, d.object_id, d.task_id, d.project_id, d.title,
+               ts_headline('english', d.body, q, 'StartSel="", StopSel="", MaxWords=16, MinWords=8') AS snippet,
+               ts_rank_cd(d.search_vector, q) AS rank
+        FROM tasks_searchdocument d, to_tsquery('english', %s) q
+        WHERE d.search_vector @@ q AND d.id IN ({visible_sql})
+        ORDER BY rank DESC, d.id
+        LIMIT %s OFFSET %s
+    """
+    return run_hits_query(sql, [tsquery, *visible_params, limit, offset])
+
+
+def search_fallback(documents, terms, limit, offset):
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    rows = documents.order_by('id').values('id', 'kind', 'object_id', 'task_id', 'project_id', 'title', 'body')
+    return [
+        dict(row, snippet=row.pop('body')[:120], rank=0.0)
+        for row in rows[offset:offset + limit]
+    ]
+
+
+def matching_object_ids(kind, query, limit=1000):
+    """
+    Ids of `kind` objects matching `query`, best first, ignoring visibility
+    (for the admin).
+    """
+    hits = search_documents(SearchDocument.objects.filter(kind=kind), query, limit)
+    return [hit['object_id'] for hit in hits]
+
+
+REBUILD_SQL = [
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'project', id, NULL, id, name, description FROM tasks_project
+    """,
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'task', id, id, project_id, title, description FROM tasks_task
+    """,
+    """
+    INSERT INTO tasks_searchdocument (kind, object_id, task_id, project_id, title, body)
+    SELECT 'comment', id, task_id, NULL, '', text FROM tasks_comment
+    """,
+]
+
+
+def rebuild():
+    """
+    Recreate every document from the source tables with set-based statements
+    and return the number of documents. Searches running meanwhile see the
+    old index until the transaction commits.
+    """
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        with connection.cursor() as cursor:
+            for sql in REBUILD_SQL:
+                cursor.execute(sql)
+            if connection.vendor == 'sqlite':
+                cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return SearchDocument.objects.count()
@@ -1,12 +1,123 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import Task, Project, User, Comment
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .instrumentation import timed_serialization
+from .revocation import RefreshToken
 
 
-class UserSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Lets a serializer declare the relations its (nested) fields read, so views
+    can load them up front instead of issuing one query per row.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Counts `.data` towards the request's serializer time when the
+    instrumentation middleware is on. Set `list_serializer_class =
+    TimedListSerializer` in Meta to cover many=True too.
+    """
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+def parse_field_paths(value):
+    """
+    Turn "id,project.name,project.assigned_users" into a tree:
+    {"id": {}, "project": {"name": {}, "assigned_users": {}}}. An empty
+    subtree means the whole field.
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for reads, driven by the root serializer's request:
+    - `?fields=id,title,project.name` keeps only the listed fields, nested
+      ones included (a bare `project` keeps all of the project's fields).
+    - `?expand=project` switches nested relations to primary keys except the
+      listed ones, so `?expand=` alone renders every relation as ids.
+      Without `expand` every relation is nested, as before.
+    Unknown field names are ignored. Writes always use every field.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, *args, **kwargs):
+        # (fields tree or None, expand tree or None), pushed down by a parent
+        self._sparse = None
+        super().__init__(*args, **kwargs)
+
+    def sparse_options(self):
+        if self._sparse is not None:
+            return self._sparse
+        request = self.context.get('request')
+        is_root = self.root is self or self.root is self.parent
+        if not is_root or request is None or request.method not in SAFE_METHODS:
+            return None, None
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get(self.fields_query_param)
+        expand = params.get(self.expand_query_param)
+        return (
+            parse_field_paths(fields) if fields else None,
+            parse_field_paths(expand) if expand is not None else None,
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.sparse_options()
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        for name, field in list(fields.items()):
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, SparseFieldsMixin):
+                continue
+            if expand is not None and name not in expand:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+                continue
+            nested._sparse = (
+                (requested or {}).get(name) or None,
+                expand.get(name, {}) if expand is not None else None,
+            )
+        return fields
+
+
+class UserSerializer(TimedSerializerMixin, SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = User
         fields = ['id', 'username', 'email', 'password', 'is_admin', 'is_active']
 
@@ -35,6 +146,8 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -45,6 +158,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         return token
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    # Checks the blacklist through tasks/revocation.py
+    token_class = RefreshToken
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -62,28 +179,148 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class ProjectSerializer(serializers.ModelSerializer):
+class UserImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk user import (tasks/provisioning.py). Usernames are
+    checked for uniqueness per batch there rather than one query per row.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(allow_blank=True, default='')
+    password = serializers.CharField()
+    is_admin = serializers.BooleanField(default=False)
+    projects = serializers.ListField(child=serializers.IntegerField(min_value=1), default=list)
+
+class ProjectSerializer(TimedSerializerMixin, SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     assigned_users = UserSerializer(many=True, read_only=True)
 
+    prefetch_related_fields = (Prefetch('assigned_users', queryset=User.objects.all()),)
+
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Project
         fields = '__all__'
         read_only_fields = ["created_by"]
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     assigned_to = UserSerializer(many=True, read_only=True)
     project = ProjectSerializer(read_only=True)
 
+    select_related_fields = ('project',)
+    prefetch_related_fields = (
+        Prefetch('assigned_to', queryset=User.objects.all()),
+        Prefetch('project__assigned_users', queryset=User.objects.all()),
+    )
+
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Task
-        fields = ['id', 'title', 'description', 'due_date', 'priority', 'status', 'project', 'assigned_to']
+        fields = [
+            'id', 'title', 'description', 'due_date', 'priority', 'status', 'project', 'assigned_to',
+            'updated_at', 'comment_count', 'last_comment_at',
+        ]
+        read_only_fields = ['comment_count', 'last_comment_at']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     task_id = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all(), write_only=True)
 
+    select_related_fields = ('user',)
+
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Comment
         fields = ['id', 'text', 'user', 'task_id', 'created_at', 'updated_at']
-    
\ No newline at end of file
+
+
+class FastTaskSerializer:
+    """
+    Read-only stand-in for TaskSerializer(many=True) on large lists.
+    - Builds plain dicts straight from the model attributes, skipping DRF's
+      per-field to_representation machinery; the output is identical.
+    - Each project and user is rendered once and the same dict reused for
+      every task that references it.
+    - Expects rows loaded with TaskSerializer.setup_eager_loading.
+    """
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance, many=True, **kwargs):
+        self.instance = instance
+        self.users = {}
+        self.projects = {}
+
+    def datetime(self, value):
+        return None if value is None else self.datetime_field.to_representation(value)
+
+    def user(self, user):
+        data = self.users.get(user.pk)
+        if data is None:
+            data = self.users[user.pk] = {
+                'id': user.pk,
+                'username': user.username,
+                'email': user.email,
+                'is_admin': user.is_admin,
+                'is_active': user.is_active,
+            }
+        return data
+
+    def project_users(self, project):
+        return [self.user(user) for user in project.assigned_users.all()]
+
+    def project(self, project):
+        data = self.projects.get(project.pk)
+        if data is None:
+            data = self.projects[project.pk] = {
+                'id': project.pk,
+                'assigned_users': self.project_users(project),
+                'name': project.name,
+                'description': project.description,
+                'created_at': self.datetime(project.created_at),
+                'updated_at': self.datetime(project.updated_at),
+                'created_by': project.created_by_id,
+            }
+        return data
+
+    def task(self, task, project, assigned_to):
+        return {
+            'id': task.pk,
+            'title': task.title,
+            'description': task.description,
+            'due_date': task.due_date.isoformat(),
+            'priority': task.priority,
+            'status': task.status,
+            'project': project,
+            'assigned_to': assigned_to,
+            'updated_at': self.datetime(task.updated_at),
+            'comment_count': task.comment_count,
+            'last_comment_at': self.datetime(task.last_comment_at),
+        }
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return [
+                self.task(task, self.project(task.project), [self.user(user) for user in task.assigned_to.all()])
+                for task in self.instance
+            ]
+
+
+class NormalizedTaskSerializer(FastTaskSerializer):
+    """
+    Tasks whose `project` and `assigned_to` are ids, plus every referenced
+    project and user once, keyed by id:
+    {"tasks": [...], "projects": {id: project}, "users": {id: user}}.
+    Projects list their `assigned_users` as ids too.
+    """
+
+    def project_users(self, project):
+        return [self.user(user)['id'] for user in project.assigned_users.all()]
+
+    @property
+    def data(self):
+        with timed_serialization():
+            tasks = [
+                self.task(task, self.project(task.project)['id'], [self.user(user)['id'] for user in task.assigned_to.all()])
+                for task in self.instance
+            ]
+        return {'tasks': tasks, 'projects': self.projects, 'users': self.users}
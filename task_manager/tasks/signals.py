@@ -0,0 +1,221 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import access, changelog, counters, events, jobs, rollups, search
+from .authentication import user_status_cache
+from .caching import invalidate, project_scopes, task_scopes, user_scopes
+from .models import Comment, Project, Task, User
+from .revocation import blacklist_index
+
+# Sent by the bulk task operations (tasks/bulk.py), whose bulk statements
+# bypass post_save/m2m_changed. Arguments: task_ids, project_ids, user_ids
+# (assignees added or removed) and created.
+tasks_bulk_changed = Signal()
+
+# Sent by the bulk user import (tasks/provisioning.py) for each batch.
+# Arguments: user_ids and memberships, the (user_id, project_id) rows added
+# to the project membership table.
+users_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    # The dashboard rollups move the task's counters from the stored state
+    instance._rollup_state = rollups.stored_task_state(instance.pk) if instance.pk else None
+
+
+@receiver([post_save, post_delete], sender=Task)
+def task_changed(sender, instance, **kwargs):
+    # A task moved to another project leaves the old project's lists too
+    before = getattr(instance, '_rollup_state', None)
+    invalidate(*task_scopes({instance.project_id, before[0]} if before else [instance.project_id]))
+    if 'created' in kwargs:
+        action = 'created' if kwargs['created'] else 'updated'
+        rollups.task_saved(instance, getattr(instance, '_rollup_state', None))
+        changelog.record('task', [instance.pk])
+        search.index_later('task', instance)
+        events.publish(events.task_topics([instance.pk]), events.task_event(instance, action))
+    else:
+        changelog.record('task', [instance.pk], 'delete')
+        search.unindex_later('task', instance.pk)
+        events.publish(instance._event_topics, events.task_event(instance, 'deleted'))
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate(*project_scopes([instance.pk]))
+    if 'created' in kwargs:
+        action = 'created' if kwargs['created'] else 'updated'
+        access.project_saved(instance, kwargs['created'])
+        changelog.record('project', [instance.pk])
+        search.index_later('project', instance)
+        events.publish(events.project_topics(instance), events.project_event(instance, action))
+    else:
+        changelog.record('project', [instance.pk], 'delete')
+        search.unindex_later('project', instance.pk)
+        events.publish(instance._event_topics, events.project_event(instance, 'deleted'))
+
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Project)
+def remember_event_audience(sender, instance, **kwargs):
+    # Assignees and members are gone by post_delete
+    if sender is Task:
+        instance._event_topics = events.task_topics([instance.pk])
+        rollups.task_deleted(instance, Task.assigned_to.through.objects.filter(task_id=instance.pk)
+                             .values_list('user_id', flat=True))
+    else:
+        instance._event_topics = events.project_topics(instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Covers UserManagementViewSet.update/destroy (deactivation is a save)
+    user_status_cache.invalidate(instance.pk)
+    invalidate('users', *user_scopes([instance.pk]))
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return  # every login saves last_login; sync clients do not need it
+    changelog.record('user', [instance.pk], 'upsert' if 'created' in kwargs else 'delete')
+
+
+def comment_project_id(comment):
+    # CommentViewSet saves comments with their task loaded
+    if Comment.task.is_cached(comment):
+        return comment.task.project_id
+    return Task.objects.filter(pk=comment.task_id).values_list('project_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    project_id = comment_project_id(instance)
+    if created:
+        counters.comment_added(instance.task_id, instance.created_at)
+        rollups.comment_changed(instance, project_id, 1)
+    comment_changed(instance, project_id)
+    changelog.record('comment', [instance.pk])
+    search.index_later('comment', instance)
+    events.publish(events.task_topics([instance.task_id]), events.comment_event(instance, 'created' if created else 'updated'))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    project_id = comment_project_id(instance)
+    counters.comment_removed(instance.task_id)
+    rollups.comment_changed(instance, project_id, -1)
+    comment_changed(instance, project_id)
+    changelog.record('comment', [instance.pk], 'delete')
+    search.unindex_later('comment', instance.pk)
+    events.publish(events.task_topics([instance.task_id]), events.comment_event(instance, 'deleted'))
+
+
+def comment_changed(instance, project_id):
+    # Task rows carry comment_count, so task lists go stale along with the comments
+    project_ids = [] if project_id is None else [project_id]
+    invalidate('comments', f'task-comments:{instance.task_id}', *task_scopes(project_ids))
+    changelog.record('task', [instance.task_id])
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def task_assignees_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        if action == 'pre_clear':
+            pk_set = set(instance.assigned_to.values_list('pk', flat=True))
+        rollups.assignees_changed({instance.pk: instance.status}, pk_set, 1 if action == 'post_add' else -1)
+        if action == 'post_add':
+            access.grant_tasks(pk_set, [instance.pk])
+        else:
+            access.revoke_tasks(pk_set, [instance.pk])
+        invalidate(*task_scopes([instance.project_id]), *user_scopes(pk_set))
+        changelog.record('task', [instance.pk])
+        if action != 'post_add':
+            changelog.record_revokes('task', [instance.pk], pk_set)
+        # Unassigned users are told too, so their clients can drop the task
+        events.publish(events.task_topics([instance.pk], pk_set), events.task_event(instance, 'updated'))
+        return
+    # user.tasks_assigned.add(...): pk_set holds task ids, or nothing on clear
+    tasks = Task.objects.filter(assigned_to=instance) if action == 'pre_clear' else Task.objects.filter(pk__in=pk_set)
+    task_statuses = dict(tasks.values_list('pk', 'status'))
+    task_ids = list(task_statuses)
+    rollups.assignees_changed(task_statuses, [instance.pk], 1 if action == 'post_add' else -1)
+    if action == 'post_add':
+        access.grant_tasks([instance.pk], task_ids)
+    else:
+        access.revoke_tasks([instance.pk], task_ids)
+    invalidate(*task_scopes(set(tasks.values_list('project_id', flat=True))), *user_scopes([instance.pk]))
+    changelog.record('task', task_ids)
+    if action != 'post_add':
+        changelog.record_revokes('task', task_ids, [instance.pk])
+    events.publish_bulk(task_ids, created=False, user_ids=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.assigned_users.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        if action == 'pre_clear':
+            pk_set = set(instance.assigned_users.values_list('pk', flat=True))
+        if action == 'post_add':
+            access.grant_projects(pk_set, [instance.pk])
+        else:
+            access.revoke_projects(pk_set, [instance.pk])
+        invalidate(*project_scopes([instance.pk]), *user_scopes(pk_set))
+        changelog.record('project', [instance.pk])
+        if action != 'post_add':
+            changelog.record_revokes('project', [instance.pk], pk_set)
+        events.publish(events.project_topics(instance, pk_set), events.project_event(instance, 'updated'))
+        return
+    # user.assigned_projects.add(...): pk_set holds project ids
+    if action == 'pre_clear':
+        pk_set = set(instance.assigned_projects.values_list('pk', flat=True))
+    if action == 'post_add':
+        access.grant_projects([instance.pk], pk_set)
+    else:
+        access.revoke_projects([instance.pk], pk_set)
+    invalidate(*project_scopes(pk_set), *user_scopes([instance.pk]))
+    changelog.record('project', pk_set)
+    if action != 'post_add':
+        changelog.record_revokes('project', pk_set, [instance.pk])
+    for project_id in pk_set:
+        events.publish(
+            [events.ADMINS_TOPIC, events.user_topic(instance.pk)],
+            {'type': 'project', 'action': 'updated', 'id': project_id},
+        )
+
+
+@receiver(tasks_bulk_changed)
+def tasks_changed_in_bulk(sender, task_ids, project_ids, user_ids, created, **kwargs):
+    invalidate(*task_scopes(project_ids), *user_scopes(user_ids))
+    # Recounting is slow for big batches and may lag; who sees what may not
+    jobs.defer(rollups.tasks_changed_in_bulk, list(task_ids), list(project_ids), list(user_ids))
+    access.tasks_changed_in_bulk(task_ids)
+    changelog.record('task', task_ids)
+    if created:
+        jobs.defer(search.reindex, 'task', list(task_ids))
+    else:
+        # Assignees were possibly removed; users who still see a task ignore it
+        changelog.record_revokes('task', task_ids, user_ids)
+    events.publish_bulk(task_ids, created, user_ids)
+
+
+@receiver(users_bulk_created)
+def users_created_in_bulk(sender, user_ids, memberships, **kwargs):
+    project_ids = {project_id for _, project_id in memberships}
+    access.members_added(memberships)
+    invalidate('users', *user_scopes(user_ids), *project_scopes(project_ids))
+    changelog.record('user', user_ids)
+    changelog.record('project', project_ids)
+    if not events.has_subscribers():
+        return
+    for project in Project.objects.filter(pk__in=project_ids):
+        events.publish(events.project_topics(project), events.project_event(project, 'updated'))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    # Token refresh rotation, logout and the admin all blacklist through here
+    if created:
+        blacklist_index.added(instance.token.jti)
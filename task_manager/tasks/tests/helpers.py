@@ -0,0 +1,53 @@
+import datetime
+
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from tasks.authentication import user_status_cache
+from tasks.logins import login_buckets
+from tasks.models import Project, Task, User
+from tasks.revocation import blacklist_index
+
+PASSWORD = 'test-password'
+
+
+class APITestCase(TestCase):
+    """
+    TestCase that starts every test with empty caches. The response cache,
+    the ETag versions and the per-process indexes outlive the transaction
+    each test is rolled back in.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+        user_status_cache.clear()
+        login_buckets.clear()
+        blacklist_index.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+def make_user(username, is_admin=False):
+    return User.objects.create_user(username, f'{username}@example.com', PASSWORD, is_admin=is_admin)
+
+
+def make_project(creator, members=(), name='Project'):
+    project = Project.objects.create(name=name, description='A project', created_by=creator)
+    project.assigned_users.add(*members)
+    return project
+
+
+def make_task(project, assignees=(), title='Task', **fields):
+    fields.setdefault('due_date', datetime.date(2025, 1, 1))
+    fields.setdefault('priority', 'low')
+    fields.setdefault('status', 'ToDo')
+    fields.setdefault('description', 'A task')
+    task = Task.objects.create(project=project, title=title, **fields)
+    task.assigned_to.add(*assignees)
+    return task
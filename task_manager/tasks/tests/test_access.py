@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from tasks import access, bulk
+from tasks.models import ProjectAccess, TaskAccess
+from tasks.visibility import visible_projects, visible_tasks
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+NO_DRIFT = {'projects': {'missing': set(), 'stale': set()}, 'tasks': {'missing': set(), 'stale': set()}}
+
+
+class AccessTableTests(APITestCase):
+    """
+    The visibility tables follow memberships, creators and assignments
+    through every kind of write, and rebuild() repairs them when not.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.other = make_user('other')
+        self.project = make_project(self.admin, members=[self.member])
+
+    def assert_no_drift(self):
+        self.assertEqual(access.drift(), NO_DRIFT)
+
+    def test_memberships(self):
+        self.assertEqual(list(visible_projects(self.member)), [self.project])
+        self.project.assigned_users.add(self.other)
+        self.other.assigned_projects.remove(self.project)
+        self.member.assigned_projects.clear()
+        self.assertEqual(list(visible_projects(self.member)), [])
+        self.other.assigned_projects.add(self.project)
+        self.project.assigned_users.clear()
+        self.assert_no_drift()
+
+        self.project.created_by = self.member
+        self.project.save()
+        self.assertEqual(list(visible_projects(self.member)), [self.project])
+        self.assert_no_drift()
+
+    def test_assignments(self):
+        task = make_task(self.project, assignees=[self.member])
+        self.assertEqual(list(visible_tasks(self.member)), [task])
+        task.assigned_to.add(self.other)
+        self.other.tasks_assigned.remove(task)
+        self.member.tasks_assigned.clear()
+        self.assertEqual(list(visible_tasks(self.member)), [])
+        self.other.tasks_assigned.add(task)
+        task.assigned_to.clear()
+        self.assert_no_drift()
+
+        task.assigned_to.add(self.member)
+        task.delete()
+        self.project.delete()
+        self.assert_no_drift()
+
+    def test_bulk_writes(self):
+        tasks = [make_task(self.project, assignees=[self.member], title=f'Task {n}') for n in range(3)]
+        ids = [task.pk for task in tasks]
+        bulk.bulk_reassign(self.admin, ids, [self.other.pk])
+        self.assertEqual(list(visible_tasks(self.member)), [])
+        self.assertEqual(sorted(task.pk for task in visible_tasks(self.other)), ids)
+        bulk.bulk_reassign(self.admin, ids[:1], [self.member.pk], mode='add')
+        self.assert_no_drift()
+
+    def test_rebuild_repairs_drift(self):
+        task = make_task(self.project, assignees=[self.member])
+        TaskAccess.objects.filter(task=task).delete()
+        ProjectAccess.objects.create(user=self.other, project=self.project, reason=ProjectAccess.MEMBER)
+        drift = access.drift()
+        self.assertEqual(drift['tasks']['missing'], {(self.member.pk, task.pk)})
+        self.assertEqual(drift['projects']['stale'], {(self.other.pk, self.project.pk, ProjectAccess.MEMBER)})
+
+        out = StringIO()
+        call_command('rebuild_access_index', '--check', stdout=out)
+        self.assertIn('2 rows drifted.', out.getvalue())
+        call_command('rebuild_access_index', stdout=StringIO())
+        self.assert_no_drift()
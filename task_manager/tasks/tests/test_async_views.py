@@ -0,0 +1,50 @@
+import json
+
+from tasks.models import Comment
+from tasks.perf.harness import bearer_token
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class AsyncViewTests(APITestCase):
+    """
+    The /api/async/ endpoints answer exactly like their sync counterparts.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.project = make_project(self.admin, members=[self.member])
+        self.task = make_task(self.project, assignees=[self.member], title='Own', status='InProgress')
+        make_task(self.project, title='Other')
+        Comment.objects.create(task=self.task, user=self.member, text='Hello')
+
+    def urls(self):
+        return [
+            'tasks/',
+            f'tasks/by-project/?project_id={self.project.pk}',
+            'tasks/by-user/?status=InProgress',
+            f'tasks/by-user/?user_id={self.member.pk}',
+            f'comments/?task={self.task.pk}',
+            f'comments/count/?task_id={self.task.pk}',
+        ]
+
+    async def test_same_responses_as_sync(self):
+        for user in (self.admin, self.member):
+            headers = {'Authorization': f'Bearer {bearer_token(user)}'}
+            for url in self.urls():
+                with self.subTest(url=url, user=user.username):
+                    sync = await self.async_client.get(f'/api/{url}', headers=headers)
+                    response = await self.async_client.get(f'/api/async/{url}', headers=headers)
+                    self.assertEqual((response.status_code, sync.status_code), (200, 200))
+                    self.assertEqual(json.loads(response.content), json.loads(sync.content))
+
+    async def test_errors(self):
+        headers = {'Authorization': f'Bearer {bearer_token(self.admin)}'}
+        self.assertEqual((await self.async_client.get('/api/async/tasks/')).status_code, 401)
+        self.assertEqual((await self.async_client.post('/api/async/tasks/', headers=headers)).status_code, 405)
+        response = await self.async_client.get('/api/async/tasks/by-project/', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get('/api/async/tasks/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
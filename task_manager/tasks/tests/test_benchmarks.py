@@ -0,0 +1,42 @@
+from tasks import rollups, search
+from tasks.models import User
+from tasks.perf import datagen, suite
+
+from .helpers import APITestCase
+
+
+class BenchmarkSuiteTests(APITestCase):
+    """
+    Every scripted scenario gets the status it expects, and a baseline
+    comparison flags extra queries and real slowdowns but not noise.
+    """
+
+    def test_every_scenario_succeeds(self):
+        ids = datagen.generate(users=10, projects=3, tasks=100, comments_per_task=1)
+        search.rebuild()
+        rollups.recompute()
+        member = User.objects.filter(is_admin=False, tasks_assigned__isnull=False).order_by('pk').first()
+        users = {'admin': User.objects.get(pk=ids['users'][0]), 'member': member}
+        results = suite.run_suite(ids, users, iterations=2)
+        self.assertEqual({name: result['errors'] for name, result in results.items() if 'errors' in result}, {})
+        self.assertIn('login', results)
+        self.assertIn('tasks-bulk-reassign', results)
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_login_is_not_throttled(self):
+        ids = datagen.generate(users=3, projects=1, tasks=5, comments_per_task=1)
+        users = {'admin': User.objects.get(pk=ids['users'][0]), 'member': User.objects.get(pk=ids['users'][1])}
+        # More logins of one account than LOGIN['BURST'] allows
+        results = suite.run_suite(ids, users, iterations=15, only=['login'])
+        self.assertNotIn('errors', results['login'])
+
+    def test_compare(self):
+        def run(p50, queries):
+            return {'results': {'tasks-list': {'p50_ms': p50, 'queries': queries}}}
+
+        self.assertEqual(suite.compare(run(10.0, 3), run(10.5, 3)), [])
+        self.assertEqual(suite.compare(run(0.2, 3), run(0.9, 3)), [])
+        self.assertEqual(suite.compare(run(10.0, 3), run(20.0, 3)), ['tasks-list: p50 10.00 -> 20.00 ms'])
+        self.assertEqual(suite.compare(run(10.0, 3), run(10.0, 4)), ['tasks-list: 3 -> 4 queries'])
+        self.assertEqual(suite.compare(run(10.0, 3), {'results': {}}), [])
@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tasks.models import Task
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class BulkTaskTests(APITestCase):
+    """
+    The bulk task actions check permissions per item, write in one
+    transaction and report a result per item.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.outsider = make_user('outsider')
+        self.mine = make_project(self.admin, members=[self.member], name='Mine')
+        self.theirs = make_project(self.admin, name='Theirs')
+        self.client = self.client_for(self.member)
+
+    def post(self, action, data, client=None):
+        return (client or self.client).post(f'/api/tasks/{action}/', data, format='json')
+
+    def payload(self, project, **fields):
+        return {'title': 'New', 'description': 'Bulk', 'due_date': '2025-03-01', 'priority': 'high',
+                'status': 'ToDo', 'project': project.pk, **fields}
+
+    def test_create_reports_each_item(self):
+        response = self.post('bulk-create', {'tasks': [
+            self.payload(self.mine, assigned_to=[self.member.pk]),
+            self.payload(self.theirs),
+            self.payload(self.mine, status='Nope'),
+            self.payload(self.mine, assigned_to=[10 ** 6]),
+            'not an object',
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (1, 4))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['created'] + ['error'] * 4)
+        task = Task.objects.get(pk=results[0]['id'])
+        self.assertEqual(list(task.assigned_to.all()), [self.member])
+        # The new task is visible to its assignee at once
+        self.assertEqual(self.client.get(f'/api/tasks/{task.pk}/').status_code, 200)
+
+    def test_status_checks_each_task(self):
+        mine, theirs = make_task(self.mine), make_task(self.theirs)
+        response = self.post('bulk-status', {'ids': [mine.pk, theirs.pk, 10 ** 6], 'status': 'Completed'})
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'error', 'error'])
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual((mine.status, theirs.status), ('Completed', 'ToDo'))
+
+    def test_reassign_modes(self):
+        task = make_task(self.mine, assignees=[self.admin])
+
+        def assignees():
+            return set(task.assigned_to.values_list('pk', flat=True))
+
+        self.post('bulk-reassign', {'ids': [task.pk], 'assigned_to': [self.member.pk], 'mode': 'add'})
+        self.assertEqual(assignees(), {self.admin.pk, self.member.pk})
+        self.post('bulk-reassign', {'ids': [task.pk], 'assigned_to': [self.admin.pk], 'mode': 'remove'})
+        self.assertEqual(assignees(), {self.member.pk})
+        self.post('bulk-reassign', {'ids': [task.pk], 'assigned_to': [self.outsider.pk]})
+        self.assertEqual(assignees(), {self.outsider.pk})
+        self.assertEqual(self.client_for(self.outsider).get(f'/api/tasks/{task.pk}/').status_code, 200)
+
+    def test_invalid_requests(self):
+        task = make_task(self.mine)
+        for action, data in (
+            ('bulk-create', {'tasks': []}),
+            ('bulk-status', {'ids': [task.pk], 'status': 'Nope'}),
+            ('bulk-status', {'ids': ['x'], 'status': 'Completed'}),
+            ('bulk-reassign', {'ids': [task.pk], 'assigned_to': [10 ** 6]}),
+            ('bulk-reassign', {'ids': [task.pk], 'assigned_to': [], 'mode': 'swap'}),
+        ):
+            with self.subTest(action=action, data=data):
+                self.assertEqual(self.post(action, data).status_code, 400)
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        tasks = [make_task(self.mine, title=f'Task {n}') for n in range(50)]
+        with CaptureQueriesContext(connection) as small:
+            self.post('bulk-status', {'ids': [task.pk for task in tasks[:2]], 'status': 'InProgress'})
+        with self.assertNumQueries(len(small)):
+            self.post('bulk-status', {'ids': [task.pk for task in tasks], 'status': 'Completed'})
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from tasks import rollups
+from tasks.coalescing import WriteCoalescer
+from tasks.models import Comment
+
+from .helpers import make_project, make_task, make_user
+
+
+class CoalescingTests(TransactionTestCase):
+    """
+    Writes queued together commit in one transaction of the writer thread,
+    and a failing write only fails its own caller. A transaction test case,
+    since the writer thread has a connection of its own.
+    """
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def submit_in_thread(self, coalescer, write, outcomes, key):
+        def submit():
+            try:
+                outcomes[key] = coalescer.submit(write)
+            except Exception as exc:
+                outcomes[key] = exc
+        thread = threading.Thread(target=submit)
+        thread.start()
+        return thread
+
+    def test_queued_writes_share_a_transaction(self):
+        coalescer = WriteCoalescer('test')
+        started, release = threading.Event(), threading.Event()
+        log, outcomes = [], {}
+
+        def write(n, fail=False):
+            def run():
+                if n == 0:
+                    started.set()
+                    release.wait(5)
+                log.append(('write', n, threading.current_thread().name))
+                transaction.on_commit(lambda: log.append(('commit', n)))
+                if fail:
+                    raise ValueError(n)
+                return n
+            return run
+
+        threads = [self.submit_in_thread(coalescer, write(0), outcomes, 0)]
+        self.assertTrue(started.wait(5))
+        threads += [self.submit_in_thread(coalescer, write(n, fail=n == 2), outcomes, n) for n in (1, 2, 3)]
+        deadline = time.monotonic() + 5
+        while coalescer._queue.qsize() < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual([outcomes[n] for n in (0, 1, 3)], [0, 1, 3])
+        self.assertIsInstance(outcomes[2], ValueError)
+        self.assertEqual({entry[2] for entry in log if entry[0] == 'write'}, {'test-writer'})
+        self.assertEqual([entry[:2] for entry in log], [
+            ('write', 0), ('commit', 0),
+            ('write', 1), ('write', 2), ('write', 3), ('commit', 1), ('commit', 3),
+        ])
+
+    def test_comment_create(self):
+        admin = make_user('admin', is_admin=True)
+        member = make_user('member')
+        task = make_task(make_project(admin, members=[member]), assignees=[member])
+        client = APIClient()
+        client.force_authenticate(member)
+        with override_settings(WRITE_COALESCING={'ENABLED': True}):
+            response = client.post('/api/comments/', {'task_id': task.pk, 'text': 'Hello'}, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(client.get(f'/api/comments/count/?task_id={task.pk}').data['comment_count'], 1)
+        self.assertEqual(Comment.objects.get(task=task).text, 'Hello')
+        task.refresh_from_db()
+        self.assertEqual(task.comment_count, 1)
+        self.assertEqual(rollups.drift(), {})
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from tasks.models import Comment, Task
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class CommentCounterTests(APITestCase):
+    """
+    Task.comment_count and last_comment_at follow comment inserts and
+    deletes, and the reconcile command repairs them when they drift.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        project = make_project(self.admin)
+        self.task = make_task(project)
+        self.other = make_task(project, title='Other')
+        self.client = self.client_for(self.admin)
+
+    def comment(self, task, text='Hello'):
+        return Comment.objects.create(task=task, user=self.admin, text=text)
+
+    def counters(self, task):
+        return Task.objects.values_list('comment_count', 'last_comment_at').get(pk=task.pk)
+
+    def test_insert_and_delete(self):
+        first = self.comment(self.task)
+        second = self.comment(self.task)
+        self.assertEqual(self.counters(self.task), (2, second.created_at))
+        second.delete()
+        self.assertEqual(self.counters(self.task), (1, first.created_at))
+        first.delete()
+        self.assertEqual(self.counters(self.task), (0, None))
+
+    def test_count_endpoint_reads_the_counter(self):
+        self.comment(self.task)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/comments/count/?task_id={self.task.pk}')
+        self.assertEqual(response.data['comment_count'], 1)
+
+    def test_bulk_counts(self):
+        self.comment(self.task)
+        self.comment(self.task)
+        response = self.client.get(f'/api/comments/counts/?task_ids={self.task.pk},{self.other.pk}')
+        self.assertEqual(response.status_code, 200)
+        counts = {row['task_id']: row['comment_count'] for row in response.data}
+        self.assertEqual(counts, {self.task.pk: 2, self.other.pk: 0})
+
+    def test_bulk_counts_rejects_bad_ids(self):
+        for query in ('task_ids=1,x', 'task_ids=', 'task_ids=' + ','.join(map(str, range(1, 1002)))):
+            with self.subTest(query=query[:20]):
+                self.assertEqual(self.client.get(f'/api/comments/counts/?{query}').status_code, 400)
+
+    def test_reconcile_repairs_drift(self):
+        comment = self.comment(self.task)
+        Task.objects.filter(pk=self.task.pk).update(comment_count=7, last_comment_at=None)
+        Task.objects.filter(pk=self.other.pk).update(comment_count=3)
+        out = StringIO()
+        call_command('reconcile_comment_counts', batch_size=1, stdout=out)
+        self.assertIn('Checked 2 tasks, repaired 2.', out.getvalue())
+        self.assertEqual(self.counters(self.task), (1, comment.created_at))
+        self.assertEqual(self.counters(self.other), (0, None))
@@ -0,0 +1,69 @@
+from tasks.models import Comment
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class ConditionalGetTests(APITestCase):
+    """
+    Reads carry a strong ETag; a matching If-None-Match gets a 304 before
+    any query runs, until something the response shows changes.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.project = make_project(self.admin, name='First')
+        self.other = make_project(self.admin, name='Second')
+        self.task = make_task(self.project)
+        self.comment = Comment.objects.create(task=self.task, user=self.admin, text='Hello')
+        self.client = self.client_for(self.admin)
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_list_and_detail_endpoints(self):
+        for url in ('/api/tasks/', f'/api/tasks/{self.task.pk}/',
+                    '/api/projects/', f'/api/projects/{self.project.pk}/',
+                    f'/api/comments/?task={self.task.pk}', f'/api/comments/{self.comment.pk}/'):
+            with self.subTest(url=url):
+                self.assert_revalidates(url)
+
+    def test_change_gives_a_new_tag(self):
+        url = f'/api/tasks/by-project/?project_id={self.project.pk}'
+        etag = self.assert_revalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'InProgress'
+            self.task.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_projects_keep_their_tag(self):
+        url = f'/api/tasks/by-project/?project_id={self.other.pk}'
+        etag = self.assert_revalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'Completed'
+            self.task.save()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_tags_are_per_user(self):
+        member = make_user('member')
+        self.project.assigned_users.add(member)
+        url = f'/api/projects/{self.project.pk}/'
+        etag = self.assert_revalidates(url)
+        response = self.client_for(member).get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_updated_at_moves_on_save(self):
+        before = self.task.updated_at
+        self.task.title = 'Renamed'
+        self.task.save()
+        self.assertGreater(self.task.updated_at, before)
+        self.assertIsNotNone(self.project.updated_at)
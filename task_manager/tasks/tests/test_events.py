@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+
+from tasks import events
+from tasks.events import Broker, get_broker, user_topic
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class EventTests(APITestCase):
+    """
+    Writes reach the subscribers who can see the object, and cost no
+    audience query while nobody is subscribed.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.outsider = make_user('outsider')
+        self.project = make_project(self.admin, members=[self.member])
+        self.task = make_task(self.project, assignees=[self.member])
+
+    def subscribe_elsewhere(self, topics):
+        """
+        A subscription whose event loop is gone, which is enough for the
+        broker to count it.
+        """
+        async def subscribe():
+            return get_broker().subscribe(topics)
+        subscription = asyncio.run(subscribe())
+        self.addCleanup(subscription.close)
+        return subscription
+
+    def test_broker_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Broker()
+
+    def test_no_audience_query_without_subscribers(self):
+        self.assertFalse(get_broker().has_subscribers())
+        with self.assertNumQueries(0):
+            self.assertEqual(events.task_topics([self.task.pk]), [])
+            self.assertEqual(events.project_topics(self.project), [])
+            events.publish_bulk([self.task.pk], created=False)
+
+    def test_audience_with_subscribers(self):
+        self.subscribe_elsewhere([user_topic(self.outsider.pk)])
+        with self.assertNumQueries(1):
+            topics = events.task_topics([self.task.pk])
+        self.assertEqual(sorted(topics), sorted([events.ADMINS_TOPIC, user_topic(self.member.pk)]))
+        self.assertEqual(
+            sorted(events.project_topics(self.project)),
+            sorted([events.ADMINS_TOPIC, user_topic(self.member.pk), user_topic(self.admin.pk)]),
+        )
+
+    async def test_write_reaches_the_assignee_only(self):
+        broker = get_broker()
+        member = broker.subscribe([user_topic(self.member.pk)])
+        outsider = broker.subscribe([user_topic(self.outsider.pk)])
+        try:
+            await sync_to_async(self.save_task)()
+            message = await member.get(1)
+            self.assertIn('event: task\n', message)
+            data = json.loads(message.rsplit('data: ', 1)[1])
+            self.assertEqual((data['action'], data['id'], data['status']), ('updated', self.task.pk, 'Completed'))
+            self.assertIsNone(await outsider.get(0.05))
+        finally:
+            member.close()
+            outsider.close()
+        self.assertFalse(broker.has_subscribers())
+
+    def save_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'Completed'
+            self.task.save()
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from tasks import exports
+from tasks.models import Comment
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class ExportTests(APITestCase):
+    """
+    GET /api/tasks/export/ streams a project's tasks as NDJSON or CSV, and
+    rejects a bad request before the stream starts. Exports written to a
+    file never see a half-written one, even from two runs at once.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.project = make_project(self.admin, members=[self.member])
+        self.own = make_task(self.project, assignees=[self.member], title='Own')
+        self.other = make_task(self.project, title='Other')
+        Comment.objects.create(task=self.own, user=self.admin, text='First')
+        Comment.objects.create(task=self.own, user=self.member, text='Second')
+
+    def export(self, user, query):
+        response = self.client_for(user).get(f'/api/tasks/export/?project_id={self.project.pk}&{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        records = [json.loads(line) for line in self.export(self.admin, '').splitlines()]
+        self.assertEqual([record['title'] for record in records], ['Own', 'Other'])
+        self.assertEqual([comment['text'] for comment in records[0]['comments']], ['First', 'Second'])
+        self.assertEqual(records[0]['assigned_to'], [{'id': self.member.pk, 'username': 'member'}])
+        self.assertEqual(records[0]['comment_count'], 2)
+
+    def test_csv_without_comments(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(self.admin, 'export_format=csv&comments=false'))))
+        self.assertEqual([row['title'] for row in rows], ['Own', 'Other'])
+        self.assertEqual((rows[0]['assigned_to'], rows[0]['comments']), ('member', '[]'))
+
+    def test_members_export_their_own_tasks(self):
+        records = [json.loads(line) for line in self.export(self.member, '').splitlines()]
+        self.assertEqual([record['id'] for record in records], [self.own.pk])
+
+    def test_bad_requests_fail_before_streaming(self):
+        client = self.client_for(self.admin)
+        for query in ('', 'project_id=abc', f'project_id={self.project.pk}&export_format=xml'):
+            with self.subTest(query=query):
+                response = client.get(f'/api/tasks/export/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.streaming)
+
+    def export_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return directory
+
+    def test_file_export_runs_do_not_share_a_file(self):
+        directory = self.export_directory()
+        path = os.path.join(directory, 'export.ndjson')
+        stream_tasks = exports.stream_tasks
+
+        def overlapping(*args, **kwargs):
+            # A second run of the job (requeued as stale) starts and finishes
+            # while the first one is half way through
+            rows = stream_tasks(*args, **kwargs)
+            yield next(rows)
+            if not overlapping.started:
+                overlapping.started = True
+                self.assertEqual(exports.write_export(self.project.pk, path), 2)
+            yield from rows
+        overlapping.started = False
+
+        with mock.patch.object(exports, 'stream_tasks', overlapping):
+            self.assertEqual(exports.write_export(self.project.pk, path), 2)
+        self.assertEqual(os.listdir(directory), ['export.ndjson'])
+        with open(path) as f:
+            self.assertEqual([json.loads(line)['title'] for line in f], ['Own', 'Other'])
+
+    def test_failed_file_export_leaves_the_old_file(self):
+        directory = self.export_directory()
+        path = os.path.join(directory, 'export.ndjson')
+        with open(path, 'w') as f:
+            f.write('previous\n')
+
+        def failing(*args, **kwargs):
+            yield '{}\n'
+            raise RuntimeError('database went away')
+
+        with mock.patch.object(exports, 'stream_tasks', failing), self.assertRaises(RuntimeError):
+            exports.write_export(self.project.pk, path)
+        self.assertEqual(os.listdir(directory), ['export.ndjson'])
+        with open(path) as f:
+            self.assertEqual(f.read(), 'previous\n')
@@ -0,0 +1,44 @@
+import re
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from tasks.perf.harness import bearer_token
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+DB_TIMING = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@override_settings(
+    INSTRUMENTATION={'ENABLED': True, 'LOG_REQUESTS': False},
+    RESPONSE_CACHE={'ENABLED': False, 'ETAGS': False},
+)
+class InstrumentationTests(APITestCase):
+    """
+    Server-Timing counts the queries of a request wherever they ran,
+    including the sync_to_async threads of the ASGI handler.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.project = make_project(self.admin)
+        make_task(self.project)
+        self.headers = {'Authorization': f'Bearer {bearer_token(self.admin)}'}
+
+    def queries(self, response):
+        self.assertEqual(response.status_code, 200)
+        return int(DB_TIMING.search(response['Server-Timing']).group(1))
+
+    def test_sync_request(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/tasks/', headers=self.headers)
+        self.assertEqual(self.queries(response), len(captured))
+
+    async def test_asgi_requests(self):
+        for url in ('/api/tasks/', '/api/async/tasks/'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, headers=self.headers)
+                self.assertGreater(self.queries(response), 0)
@@ -0,0 +1,53 @@
+import time
+
+from django.test import TransactionTestCase, override_settings
+
+from tasks import jobs
+from tasks.models import Job
+
+RAN = []
+
+
+@jobs.job()
+def record(value):
+    RAN.append(value)
+
+
+@jobs.job()
+def broken():
+    raise ValueError('broken job')
+
+
+@override_settings(JOBS={'ENABLED': True, 'RETRY_DELAY': 0, 'STALE_AFTER': 0.2, 'HEARTBEAT_INTERVAL': 0.02})
+class JobTests(TransactionTestCase):
+    """
+    Claimed jobs run once and are retried on failure; a job is only taken
+    back from its worker once its heartbeat stopped for STALE_AFTER. A
+    transaction test case, since the heartbeat has a connection of its own.
+    """
+
+    def setUp(self):
+        RAN.clear()
+
+    def test_run_and_retry(self):
+        jobs.defer(record, 'a')
+        jobs.defer(broken)
+        self.assertEqual(jobs.execute(jobs.claim('worker')), 'ok')
+        self.assertEqual(RAN, ['a'])
+        self.assertEqual(jobs.execute(jobs.claim('worker')), 'retry')
+        job = Job.objects.get(name=broken.job_name)
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('broken job', job.last_error)
+
+    def test_heartbeat_keeps_a_long_job(self):
+        jobs.defer(record, 'a')
+        job = jobs.claim('worker')
+        with jobs.heartbeat(job):
+            time.sleep(0.5)  # longer than STALE_AFTER
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        time.sleep(0.3)  # the worker died: no heartbeat
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.claimed_by), (Job.QUEUED, ''))
+        self.assertIn('worker stopped responding', job.last_error)
@@ -0,0 +1,37 @@
+from django.test import override_settings
+
+from .helpers import PASSWORD, APITestCase, make_user
+
+
+@override_settings(LOGIN={'BURST': 3, 'RATE': 1 / 60})
+class LoginThrottleTests(APITestCase):
+    """
+    Each account gets BURST login attempts, right or wrong, refilled at
+    RATE per second, whatever address they come from.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('member')
+        make_user('other')
+
+    def login(self, username, password=PASSWORD):
+        return self.client.post('/api/login/', {'username': username, 'password': password}, format='json')
+
+    def test_burst_then_throttled(self):
+        self.assertEqual(self.login('member').status_code, 200)
+        self.assertEqual(self.login('member', 'wrong').status_code, 401)
+        self.assertEqual(self.login('member').status_code, 200)
+        response = self.login('member')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), 60)
+        self.assertEqual(self.login('other').status_code, 200)
+
+    def test_unknown_accounts_are_throttled_too(self):
+        statuses = [self.login('nobody').status_code for _ in range(4)]
+        self.assertEqual(statuses, [401, 401, 401, 429])
+
+    def test_refill(self):
+        with override_settings(LOGIN={'BURST': 1, 'RATE': 1000}):
+            self.assertEqual(self.login('member').status_code, 200)
+            self.assertEqual(self.login('member').status_code, 200)
@@ -0,0 +1,33 @@
+from django.test import override_settings
+
+from .helpers import APITestCase
+
+
+class MetricsEndpointTests(APITestCase):
+    """
+    GET /metrics is only published with a scrape token, which it then
+    requires, or with DEBUG on.
+    """
+
+    def test_hidden_without_token(self):
+        with override_settings(DEBUG=False, METRICS={'TOKEN': None}):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_open_with_debug(self):
+        with override_settings(DEBUG=True, METRICS={'TOKEN': None}):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE http_requests_total counter', response.content.decode())
+
+    def test_token_required(self):
+        with override_settings(DEBUG=True, METRICS={'TOKEN': 'scrape-secret'}):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            wrong = self.client.get('/metrics', headers={'Authorization': 'Bearer nope'})
+            self.assertEqual(wrong.status_code, 401)
+            response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_disabled(self):
+        with override_settings(DEBUG=True, METRICS={'ENABLED': False, 'TOKEN': 'scrape-secret'}):
+            response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,59 @@
+import datetime
+
+from tasks.models import Task
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        project = make_project(self.admin)
+        # Repeated due dates, so pages must break ties on id
+        for n in range(25):
+            make_task(project, title=f'Task {n}', due_date=datetime.date(2025, 1, 1 + n % 4))
+        self.client = self.client_for(self.admin)
+        self.expected = list(Task.objects.order_by('due_date', 'id').values_list('id', flat=True))
+
+    def walk(self, url, link):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(task['id'] for task in response.data['results'])
+            url = response.data[link]
+            pages += 1
+        return ids, pages
+
+    def test_forward_pages_cover_every_task_once_in_order(self):
+        ids, pages = self.walk('/api/tasks/?page_size=4', 'next')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 7)
+
+    def test_previous_links_walk_back_to_the_first_page(self):
+        url = '/api/tasks/?page_size=4'
+        while True:
+            response = self.client.get(url)
+            if not response.data['next']:
+                break
+            url = response.data['next']
+        seen = [task['id'] for task in response.data['results']]
+        previous = response.data['previous']
+        while previous:
+            response = self.client.get(previous)
+            seen[:0] = [task['id'] for task in response.data['results']]
+            previous = response.data['previous']
+        self.assertEqual(seen, self.expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/tasks/?cursor=not-a-cursor').status_code, 404)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/tasks/?page_size=100000')
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIsNone(response.data['next'])
+
+    def test_paginate_false_returns_the_plain_list(self):
+        response = self.client.get('/api/tasks/?paginate=false')
+        self.assertEqual(sorted(task['id'] for task in response.data), sorted(self.expected))
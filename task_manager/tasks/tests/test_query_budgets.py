@@ -0,0 +1,40 @@
+from tasks.models import Comment, User
+from tasks.perf import datagen
+from tasks.perf.harness import QUERY_BUDGETS, read_endpoints
+from tasks.visibility import visible_projects, visible_tasks
+
+from .helpers import APITestCase
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every read endpoint runs the same number of queries for 50 tasks as for
+    500, for an admin and for a project member.
+    """
+
+    def assert_within_budget(self, tasks):
+        ids = datagen.generate(users=20, projects=5, tasks=tasks, comments_per_task=3, users_per_project=10)
+        admin = User.objects.get(pk=ids['users'][0])
+        member = next(user for user in User.objects.filter(pk__in=ids['users'][1:]).order_by('id')
+                      if visible_tasks(user).exists())
+        for user in (admin, member):
+            # Objects the user can see, so detail endpoints do the full work
+            task = visible_tasks(user).order_by('id').first()
+            endpoints = read_endpoints({
+                'users': ids['users'],
+                'projects': [visible_projects(user).order_by('id').values_list('id', flat=True).first()],
+                'tasks': [task.pk],
+                'comments': [Comment.objects.filter(task=task).order_by('id').values_list('id', flat=True).first()],
+            })
+            client = self.client_for(user)
+            for name, url in endpoints.items():
+                with self.subTest(endpoint=name, admin=user.is_admin):
+                    with self.assertNumQueries(QUERY_BUDGETS[name]):
+                        response = client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_small_dataset(self):
+        self.assert_within_budget(50)
+
+    def test_large_dataset(self):
+        self.assert_within_budget(500)
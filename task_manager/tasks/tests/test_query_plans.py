@@ -0,0 +1,39 @@
+from django.db import connection
+
+from tasks.models import User
+from tasks.perf import datagen
+from tasks.perf.plans import check_endpoints, explain, full_scans
+
+from .helpers import APITestCase
+
+
+class QueryPlanTests(APITestCase):
+    """
+    No read endpoint reads a table from start to end, for an admin and for
+    a project member, whatever the size of the dataset.
+    """
+
+    def assert_no_full_scans(self, tasks):
+        ids = datagen.generate(users=20, projects=5, tasks=tasks, comments_per_task=2, users_per_project=10)
+        for role, pk in (('admin', ids['users'][0]), ('member', ids['users'][1])):
+            client = self.client_for(User.objects.get(pk=pk))
+            for name, sql, plan, scans in check_endpoints(client, role, ids):
+                with self.subTest(endpoint=name, role=role, sql=sql):
+                    self.assertEqual(scans, set(), '\n'.join(plan))
+
+    def test_small_dataset(self):
+        self.assert_no_full_scans(20)
+
+    def test_larger_dataset(self):
+        self.assert_no_full_scans(1000)
+
+    def test_reports_unindexed_filter(self):
+        sql = 'SELECT "tasks_task"."id" FROM "tasks_task" WHERE "tasks_task"."title" = \'x\' LIMIT 20'
+        self.assertEqual(full_scans(sql, explain(sql)), {'tasks_task'})
+
+    def test_primary_key_walk_is_not_a_scan(self):
+        sql = 'SELECT "tasks_user"."email" FROM "tasks_user" ORDER BY "tasks_user"."id" ASC LIMIT 51'
+        self.assertEqual(full_scans(sql, explain(sql)), set())
+        if connection.vendor == 'sqlite':
+            unordered = 'SELECT "tasks_user"."email" FROM "tasks_user" LIMIT 51'
+            self.assertEqual(full_scans(unordered, explain(unordered)), {'tasks_user'})
@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from task_manager.databases import database_settings
+
+from .helpers import make_project, make_task, make_user
+
+# The alias DATABASE_REPLICA_URLS would define, added before the test runner
+# sets up the databases, so that TEST['MIRROR'] points it at the test
+# database through a connection of its own
+if 'replica' not in connections.settings:
+    connections.settings['replica'] = {
+        **connections.settings['default'], 'TEST': {**connections.settings['default']['TEST'], 'MIRROR': 'default'},
+    }
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """
+    DATABASE_URL and DATABASE_REPLICA_URLS become `default` plus replica
+    aliases that mirror it under the test runner.
+    """
+
+    def test_replica_aliases(self):
+        environ = {
+            'DATABASE_URL': 'sqlite:///primary.sqlite3',
+            'DATABASE_REPLICA_URLS': 'sqlite:////srv/one.sqlite3, sqlite:///two.sqlite3',
+        }
+        with mock.patch.dict(os.environ, environ):
+            databases = database_settings(Path('/app'))
+        self.assertEqual(list(databases), ['default', 'replica', 'replica_2'])
+        self.assertEqual(databases['default']['NAME'], '/app/primary.sqlite3')
+        self.assertEqual(databases['replica']['NAME'], '/srv/one.sqlite3')
+        self.assertEqual(databases['replica_2']['TEST'], {'MIRROR': 'default'})
+
+    def test_unsupported_url(self):
+        with mock.patch.dict(os.environ, {'DATABASE_URL': 'your-database-url'}):
+            with self.assertRaisesMessage(ValueError, "Unsupported database URL scheme: ''"):
+                database_settings(Path('/app'))
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': ['replica'], 'STICKY_SECONDS': 10})
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    With a second SQLite connection mirroring the test database as the
+    replica, list reads go to it until the user writes, and then to the
+    primary for STICKY_SECONDS.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin', is_admin=True)
+        self.project = make_project(self.admin)
+        make_task(self.project)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def replica_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = getattr(self.client, method)(path, data, format='json')
+        self.assertLess(response.status_code, 400)
+        return len(queries)
+
+    def test_reads_then_sticks_to_the_primary(self):
+        self.assertGreater(self.replica_queries('get', '/api/tasks/'), 0)
+        self.assertGreater(self.replica_queries('get', f'/api/projects/{self.project.pk}/'), 0)
+
+        created = self.replica_queries('post', '/api/tasks/', {
+            'title': 'New', 'description': 'Written to the primary', 'due_date': '2025-01-01',
+            'priority': 'low', 'status': 'ToDo', 'project': self.project.pk, 'assigned_to': [self.admin.pk],
+        })
+        self.assertEqual(created, 0)
+        self.assertEqual(self.replica_queries('get', '/api/tasks/'), 0)
+
+        cache.clear()  # STICKY_SECONDS went by
+        self.assertGreater(self.replica_queries('get', '/api/tasks/'), 0)
+
+    def test_other_actions_use_the_primary(self):
+        self.assertEqual(self.replica_queries('get', '/api/dashboard/stats/'), 0)
@@ -0,0 +1,73 @@
+from tasks.models import Comment
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class ResponseCacheTests(APITestCase):
+    """
+    Cached responses are served until a write to something they show, and
+    then never again.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.first = make_project(self.admin, name='First')
+        self.second = make_project(self.admin, name='Second')
+        self.task = make_task(self.first)
+        self.client = self.client_for(self.admin)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def by_project(self, project):
+        return self.get(f'/api/tasks/by-project/?project_id={project.pk}')
+
+    def test_second_read_is_a_hit(self):
+        self.assertEqual(self.by_project(self.first)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.by_project(self.first)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_save_invalidates_the_project(self):
+        self.by_project(self.first)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = 'Renamed'
+            self.task.save()
+        response = self.by_project(self.first)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['title'], 'Renamed')
+
+    def test_moving_a_task_invalidates_both_projects(self):
+        self.assertEqual(len(self.by_project(self.first).data), 1)
+        self.assertEqual(len(self.by_project(self.second).data), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.project = self.second
+            self.task.save()
+        old, new = self.by_project(self.first), self.by_project(self.second)
+        self.assertEqual((old['X-Cache'], new['X-Cache']), ('MISS', 'MISS'))
+        self.assertEqual(len(old.data), 0)
+        self.assertEqual(len(new.data), 1)
+
+    def test_comment_invalidates_the_count(self):
+        url = f'/api/comments/count/?task_id={self.task.pk}'
+        self.assertEqual(self.get(url).data['comment_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(task=self.task, user=self.admin, text='Hello')
+        self.assertEqual(self.get(url).data['comment_count'], 1)
+
+    def test_etag_revalidation(self):
+        etag = self.by_project(self.first)['ETag']
+        self.assertEqual(self.get(f'/api/tasks/by-project/?project_id={self.first.pk}',
+                                  If_None_Match=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        self.assertEqual(self.get(f'/api/tasks/by-project/?project_id={self.first.pk}',
+                                  If_None_Match=etag).status_code, 200)
+
+    def test_responses_are_per_user(self):
+        member = make_user('member')
+        self.first.assigned_users.add(member)
+        self.by_project(self.first)
+        response = self.client_for(member).get(f'/api/tasks/by-project/?project_id={self.first.pk}')
+        self.assertEqual(response['X-Cache'], 'MISS')
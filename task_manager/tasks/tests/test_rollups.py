@@ -0,0 +1,73 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tasks import bulk, rollups
+from tasks.models import Comment
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class RollupTests(APITestCase):
+    """
+    The dashboard counters follow every kind of write and always match
+    what the source tables say.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.first = make_project(self.admin, members=[self.member], name='First')
+        self.second = make_project(self.admin, name='Second')
+
+    def assert_no_drift(self):
+        self.assertEqual(rollups.drift(), {})
+        for user in (self.admin, self.member):
+            self.assertEqual(rollups.dashboard_stats(user), rollups.live_stats(user))
+
+    def test_single_row_writes(self):
+        task = make_task(self.first, assignees=[self.member])
+        comment = Comment.objects.create(task=task, user=self.member, text='Hello')
+        self.assert_no_drift()
+
+        task.status = 'Completed'
+        task.priority = 'high'
+        task.save()
+        self.assert_no_drift()
+
+        task.project = self.second
+        task.save()
+        self.assert_no_drift()
+
+        task.assigned_to.remove(self.member)
+        self.member.tasks_assigned.add(task)
+        comment.delete()
+        self.assert_no_drift()
+
+        Comment.objects.create(task=task, user=self.admin, text='Again')
+        task.delete()
+        self.assert_no_drift()
+
+    def test_bulk_writes(self):
+        tasks = [make_task(self.first, title=f'Task {n}') for n in range(3)]
+        bulk.bulk_update_status(self.admin, [task.pk for task in tasks], 'InProgress')
+        bulk.bulk_reassign(self.admin, [task.pk for task in tasks], [self.member.pk])
+        self.assert_no_drift()
+
+    def test_recompute_repairs(self):
+        make_task(self.first, assignees=[self.member])
+        rollups.apply({('status', self.first.pk, 0, 'ToDo'): 5})
+        self.assertNotEqual(rollups.drift(), {})
+        rollups.recompute()
+        self.assert_no_drift()
+
+    def test_comment_reads_the_project_once(self):
+        task = make_task(self.first, assignees=[self.member])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.member).post(
+                '/api/comments/', {'text': 'Hello', 'task_id': task.pk}, format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+        task_reads = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'FROM "tasks_task"' in query['sql']]
+        self.assertEqual(len(task_reads), 1, task_reads)
+        self.assert_no_drift()
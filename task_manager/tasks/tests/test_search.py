@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from tasks.models import Comment, SearchDocument
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class SearchTests(APITestCase):
+    """
+    GET /api/search/ ranks prefix matches of every word, within what the
+    user may read, and the index follows the rows it covers.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.project = make_project(self.admin, members=[self.member], name='Billing')
+        self.other = make_project(self.admin, name='Hidden')
+        self.in_title = make_task(self.project, assignees=[self.member], title='Invoice export')
+        self.in_body = make_task(self.project, assignees=[self.member], title='Cleanup',
+                                 description='Remove the old invoice templates')
+        self.hidden = make_task(self.other, title='Invoice audit')
+        self.comment = Comment.objects.create(task=self.in_body, user=self.member, text='Invoices look fine now')
+
+    def search(self, query, user=None, **params):
+        response = self.client_for(user or self.admin).get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(hit['type'], hit['id']) for hit in response.data['results']]
+
+    def test_title_hits_rank_first(self):
+        hits = self.search('invoice', type='task')
+        self.assertEqual(hits[0], ('task', self.in_title.pk))
+        self.assertEqual(set(hits), {('task', self.in_title.pk), ('task', self.in_body.pk), ('task', self.hidden.pk)})
+
+    def test_prefix_and_all_terms(self):
+        self.assertIn(('comment', self.comment.pk), self.search('invo'))
+        self.assertEqual(self.search('invoice export'), [('task', self.in_title.pk)])
+        self.assertEqual(self.search('invoice nothing'), [])
+
+    def test_only_what_the_user_can_read(self):
+        hits = self.search('invoice', user=self.member)
+        self.assertNotIn(('task', self.hidden.pk), hits)
+        self.assertIn(('comment', self.comment.pk), hits)
+        self.assertEqual(self.search('hidden', user=self.member), [])
+
+    def test_index_follows_writes(self):
+        self.in_title.title = 'Receipt export'
+        self.in_title.save()
+        self.assertNotIn(('task', self.in_title.pk), self.search('invoice'))
+        self.assertEqual(self.search('receipt'), [('task', self.in_title.pk)])
+        comment_id = self.comment.pk
+        self.comment.delete()
+        self.assertNotIn(('comment', comment_id), self.search('invoices'))
+
+    def test_rebuild(self):
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 6 documents.', out.getvalue())
+        self.assertEqual(self.search('invoice export'), [('task', self.in_title.pk)])
+
+    def test_invalid_parameters(self):
+        client = self.client_for(self.admin)
+        for params in ({'q': '  '}, {'q': 'invoice', 'type': 'user'}, {'q': 'invoice', 'limit': 'x'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/search/', params).status_code, 400)
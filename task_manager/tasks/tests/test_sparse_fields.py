@@ -0,0 +1,68 @@
+from rest_framework.test import APIRequestFactory
+
+from tasks.serializers import FastTaskSerializer, TaskSerializer
+from tasks.models import Task
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class SparseFieldTests(APITestCase):
+    """
+    `fields`, `expand` and `normalize` shape task reads; without them the
+    fast serializer renders exactly what TaskSerializer would.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.project = make_project(self.admin, members=[self.member])
+        self.tasks = [make_task(self.project, assignees=[self.admin, self.member], title=f'Task {n}') for n in range(3)]
+        self.client = self.client_for(self.admin)
+
+    def results(self, query):
+        response = self.client.get(f'/api/tasks/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_fast_serializer_matches_drf(self):
+        tasks = list(TaskSerializer.setup_eager_loading(Task.objects.order_by('id')))
+        request = APIRequestFactory().get('/api/tasks/')
+        self.assertEqual(
+            FastTaskSerializer(tasks, many=True).data,
+            TaskSerializer(tasks, many=True, context={'request': request}).data,
+        )
+
+    def test_fields(self):
+        rows = self.results('fields=id,title,project.name')['results']
+        self.assertEqual(rows[0], {'id': self.tasks[0].pk, 'title': 'Task 0', 'project': {'name': 'Project'}})
+
+    def test_nested_fields(self):
+        row = self.results('fields=id,assigned_to.username')['results'][0]
+        self.assertEqual(row, {'id': self.tasks[0].pk, 'assigned_to': [{'username': 'admin'}, {'username': 'member'}]})
+
+    def test_expand(self):
+        row = self.results('fields=id,project,assigned_to&expand=')['results'][0]
+        self.assertEqual(row, {'id': self.tasks[0].pk, 'project': self.project.pk,
+                               'assigned_to': [self.admin.pk, self.member.pk]})
+        row = self.results('fields=project,assigned_to&expand=project')['results'][0]
+        self.assertEqual(row['project']['id'], self.project.pk)
+        self.assertEqual(row['assigned_to'], [self.admin.pk, self.member.pk])
+
+    def test_unknown_fields_are_ignored(self):
+        self.assertEqual(self.results('fields=id,nope')['results'][0], {'id': self.tasks[0].pk})
+
+    def test_normalize(self):
+        data = self.results('normalize=true')
+        self.assertNotIn('results', data)
+        self.assertEqual(len(data['tasks']), 3)
+        self.assertEqual(data['tasks'][0]['project'], self.project.pk)
+        self.assertEqual(data['tasks'][0]['assigned_to'], [self.admin.pk, self.member.pk])
+        self.assertEqual(set(map(int, data['projects'])), {self.project.pk})
+        self.assertEqual(set(map(int, data['users'])), {self.admin.pk, self.member.pk})
+
+    def test_writes_ignore_fields(self):
+        task = self.tasks[0]
+        response = self.client.patch(f'/api/tasks/{task.pk}/?fields=id', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
@@ -0,0 +1,61 @@
+from django.test import override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from tasks.authentication import ClaimsUser, StatelessJWTAuthentication
+from tasks.perf.harness import bearer_token
+
+from .helpers import APITestCase, make_project, make_user
+
+STATELESS = {'ENABLED': True, 'STATUS_TTL': 30}
+
+
+class StatelessJWTTests(APITestCase):
+    """
+    With STATELESS_JWT enabled, reads authenticate from the token claims and
+    the status cache; writes and deactivated users still see the database.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('member')
+        self.header = f'Bearer {bearer_token(self.user)}'
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, method='get'):
+        request = getattr(self.factory, method)('/api/projects/', HTTP_AUTHORIZATION=self.header)
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    @override_settings(STATELESS_JWT=STATELESS)
+    def test_reads_skip_the_user_lookup(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.pk, user.is_admin), (self.user.pk, False))
+
+    @override_settings(STATELESS_JWT=STATELESS)
+    def test_writes_load_the_user(self):
+        user = self.authenticate('post')
+        self.assertNotIsInstance(user, ClaimsUser)
+        self.assertEqual(user, self.user)
+
+    def test_disabled_loads_the_user(self):
+        self.assertNotIsInstance(self.authenticate(), ClaimsUser)
+
+    @override_settings(STATELESS_JWT=STATELESS)
+    def test_deactivation_takes_effect_at_once(self):
+        make_project(make_user('creator', is_admin=True), members=[self.user])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.header)
+        self.assertEqual(client.get('/api/projects/').status_code, 200)
+
+        admin = self.client_for(make_user('admin', is_admin=True))
+        self.assertEqual(admin.delete(f'/api/users/{self.user.pk}/').status_code, 200)
+        self.assertEqual(client.get('/api/projects/').status_code, 401)
+
+    @override_settings(STATELESS_JWT=STATELESS)
+    def test_promotion_is_read_from_the_status_cache(self):
+        self.authenticate()
+        self.user.is_admin = True
+        self.user.save()
+        self.assertTrue(self.authenticate().is_admin)
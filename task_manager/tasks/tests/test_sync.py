@@ -0,0 +1,111 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from tasks.models import ChangeLogEntry, Task
+from tasks.views import AtomicWritesMixin
+
+from .helpers import APITestCase, make_project, make_task, make_user
+
+
+class SyncTests(APITestCase):
+    """
+    GET /api/sync/ returns what changed after a cursor, never skipping an
+    entry that commits after the cursor moved past its id.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        self.member = make_user('member')
+        self.project = make_project(self.admin, members=[self.member])
+        self.client = self.client_for(self.member)
+
+    def sync(self, cursor=None, **params):
+        if cursor is not None:
+            params['cursor'] = cursor
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_reset_then_changes(self):
+        reset = self.sync()
+        self.assertTrue(reset['reset'])
+        task = make_task(self.project, assignees=[self.member], title='New')
+        data = self.sync(reset['cursor'])
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['title'] for row in data['tasks']], ['New'])
+        self.assertEqual(self.sync(data['cursor'])['tasks'], [])
+
+        task.assigned_to.remove(self.member)
+        self.assertEqual(self.sync(data['cursor'])['tombstones']['tasks'], [task.pk])
+
+    def test_deletes_become_tombstones(self):
+        task = make_task(self.project, assignees=[self.member])
+        task_id = task.pk
+        cursor = self.sync()['cursor']
+        task.delete()
+        self.assertEqual(self.sync(cursor)['tombstones']['tasks'], [task_id])
+
+    def test_pages(self):
+        cursor = self.sync()['cursor']
+        tasks = [make_task(self.project, assignees=[self.member], title=f'Task {n}') for n in range(3)]
+        seen = []
+        while True:
+            data = self.sync(cursor, limit=2)
+            seen.extend(row['id'] for row in data['tasks'])
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        self.assertEqual(set(seen), {task.pk for task in tasks})
+
+    def test_entries_follow_transaction_order(self):
+        # As on Postgres when a lower id commits after a higher one: the
+        # later transaction's entry comes after the cursor whatever its id
+        cursor = self.sync()['cursor']
+        first = make_task(self.project, assignees=[self.member], title='First')
+        second = make_task(self.project, assignees=[self.member], title='Second')
+        ChangeLogEntry.objects.filter(kind='task', object_id=first.pk).update(txid=2)
+        ChangeLogEntry.objects.filter(kind='task', object_id=second.pk).update(txid=1)
+        ChangeLogEntry.objects.filter(id__lte=cursor).update(txid=1)
+
+        data = self.sync(cursor, limit=ChangeLogEntry.objects.filter(id__gt=cursor, txid=1).count())
+        self.assertEqual([row['title'] for row in data['tasks']], ['Second'])
+        data = self.sync(data['cursor'])
+        self.assertEqual([row['title'] for row in data['tasks']], ['First'])
+        self.assertLess(data['cursor'], ChangeLogEntry.objects.latest('id').pk)
+
+    def test_pruned_cursor_resets(self):
+        make_task(self.project, assignees=[self.member])
+        cursor = self.sync()['cursor']
+        make_task(self.project, assignees=[self.member])
+        ChangeLogEntry.objects.filter(id__lte=cursor).delete()
+        self.assertTrue(self.sync(cursor)['reset'])
+
+    def test_invalid_parameters(self):
+        for params in ({'cursor': 'x'}, {'cursor': 0, 'limit': 0}):
+            self.assertEqual(self.client.get('/api/sync/', params).status_code, 400)
+
+
+class FailingWrite(AtomicWritesMixin, APIView):
+    def post(self, request):
+        make_task(Task.objects.first().project, title='Lost')
+        raise ValidationError('Rejected after writing')
+
+
+class AtomicWritesTests(APITestCase):
+    """
+    A write answered with an error status leaves nothing behind, even when
+    DRF turned the exception into a response.
+    """
+
+    def test_error_response_rolls_back(self):
+        admin = make_user('admin', is_admin=True)
+        make_task(make_project(admin))
+        entries = ChangeLogEntry.objects.count()
+        request = APIRequestFactory().post('/')
+        force_authenticate(request, admin)
+        response = FailingWrite.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(title='Lost').exists())
+        self.assertEqual(ChangeLogEntry.objects.count(), entries)
@@ -0,0 +1,89 @@
+import json
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from tasks import jobs
+from tasks.models import User
+
+from .helpers import APITestCase, make_project, make_user
+
+CSV = 'text/csv'
+NDJSON = 'application/x-ndjson'
+
+
+@override_settings(PROVISIONING={'MAX_REQUEST_ROWS': 3})
+class UserImportTests(APITestCase):
+    """
+    Small imports run within the request; larger ones are refused, unless
+    the job queue is on, in which case a worker imports them and the report
+    is fetched by import id.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_user('admin', is_admin=True)
+        make_user('taken')
+        self.project = make_project(self.admin)
+        self.client = self.client_for(self.admin)
+
+    def post(self, body, content_type=NDJSON, client=None):
+        return (client or self.client).generic('POST', '/api/users/import/', body.encode(), content_type)
+
+    def ndjson(self, *usernames, **fields):
+        return ''.join(json.dumps({'username': name, 'password': 'import-password', **fields}) + '\n'
+                       for name in usernames)
+
+    def report(self, response):
+        content = b''.join(response.streaming_content).decode()
+        response.close()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_inline_import(self):
+        body = f'username,password,projects\nnew,import-password,{self.project.pk}\ntaken,import-password,\n'
+        lines = self.report(self.post(body, CSV))
+        self.assertEqual([line.get('status') for line in lines[:2]], ['created', 'error'])
+        self.assertEqual(lines[2], {'summary': {'created': 1, 'failed': 1}})
+        self.assertEqual(list(User.objects.get(username='new').assigned_projects.all()), [self.project])
+
+        lines = self.report(self.post(self.ndjson('other', projects=[9999])))
+        self.assertEqual(lines[0]['status'], 'error')
+        self.assertFalse(User.objects.filter(username='other').exists())
+
+    def test_too_many_rows_without_the_queue(self):
+        response = self.post(self.ndjson('a', 'b', 'c', 'd'))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(User.objects.filter(username='a').exists())
+
+    def test_queued_import(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(JOBS={'ENABLED': True}, PROVISIONING={'MAX_REQUEST_ROWS': 3, 'IMPORT_DIR': directory}):
+            response = self.post(self.ndjson('a', 'b', 'c', 'd', 'taken'))
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['rows'], 5)
+            report_url = response.data['report']
+            self.assertIn(response.data['import_id'], report_url)
+            self.assertEqual(self.client.get(report_url).status_code, 202)
+            self.assertFalse(User.objects.filter(username='a').exists())
+
+            self.assertEqual(jobs.execute(jobs.claim('worker')), 'ok')
+            response = self.client.get(report_url)
+            self.assertEqual(response.status_code, 200)
+            lines = self.report(response)
+        self.assertEqual(lines[-1], {'summary': {'created': 4, 'failed': 1}})
+        self.assertEqual(User.objects.filter(username__in='abcd').count(), 4)
+
+    def test_unknown_import(self):
+        self.assertEqual(self.client.get('/api/users/import/' + '0' * 32 + '/').status_code, 404)
+
+    def test_unreadable_body(self):
+        self.assertEqual(self.post('name,password\nnew,pw\n', CSV).status_code, 400)
+        self.assertEqual(self.post('username\nnew\n', 'text/plain').status_code, 400)
+        self.assertEqual(self.client.generic('POST', '/api/users/import/', b'\xff\xfe', NDJSON).status_code, 400)
+
+    def test_admin_only(self):
+        member = self.client_for(make_user('member'))
+        self.assertEqual(self.post(self.ndjson('new'), client=member).status_code, 403)
+        self.assertEqual(member.get('/api/users/import/' + '0' * 32 + '/').status_code, 403)
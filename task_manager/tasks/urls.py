@@ -1,7 +1,7 @@
 from django.urls import path, include
+from . import async_views
 from rest_framework.routers import DefaultRouter
-from .views import CommentViewSet, CustomTokenObtainPairView, RegisterView, LogoutView, TaskViewSet, ProjectViewSet, UserManagementViewSet, UserProfileView, UserViewSet
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .views import CommentViewSet, CustomTokenObtainPairView, CustomTokenRefreshView, RegisterView, LogoutView, DashboardStatsView, ResponseCacheStatsView, SearchView, SyncView, TaskViewSet, ProjectViewSet, UserManagementViewSet, UserProfileView, UserViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserManagementViewSet, basename='users')
@@ -14,6 +14,16 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='cache-stats'),
+    path('async/tasks/', async_views.task_list, name='async-tasks-list'),
+    path('async/tasks/by-project/', async_views.tasks_by_project, name='async-tasks-by-project'),
+    path('async/tasks/by-user/', async_views.tasks_by_user, name='async-tasks-by-user'),
+    path('async/comments/', async_views.comment_list, name='async-comments-list'),
+    path('async/comments/count/', async_views.comment_count, name='async-comments-count'),
+    path('events/', async_views.change_feed, name='events'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
 ]
@@ -1,24 +1,81 @@
+import shutil
+import tempfile
 from tokenize import Comment
 from rest_framework import generics, viewsets, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from . import bulk, changelog, coalescing, exports, jobs, metrics, provisioning, rollups, routing, search
+from .authentication import StatelessJWTAuthentication
+from .caching import cache_response, response_cache
 from .models import Task, Project, User, Comment
-from .serializers import CommentSerializer, CustomTokenObtainPairSerializer, TaskSerializer, ProjectSerializer, RegisterSerializer, UserSerializer
+from .logins import AccountLoginThrottle
+from .revocation import RefreshToken
+from .pagination import CommentPagination, TaskPagination, UserPagination
+from .serializers import CommentSerializer, CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer, FastTaskSerializer, NormalizedTaskSerializer, TaskSerializer, ProjectSerializer, RegisterSerializer, UserSerializer
+from .visibility import created_project, is_project_member, is_task_assignee, visible_projects, visible_tasks
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.decorators import action
+from rest_framework.reverse import reverse
 from rest_framework import status
 
 
-class UserManagementViewSet(viewsets.ModelViewSet):
+class OptimizedQuerysetMixin:
+    """
+    Eager-loads whatever the viewset's serializer tree reads, so list and
+    retrieve run a constant number of queries regardless of the row count.
+    """
+
+    def optimize_queryset(self, queryset):
+        return self.get_serializer_class().setup_eager_loading(queryset)
+
+
+class ReplicaReadsMixin:
+    """
+    Serves `replica_actions` from a read replica when one is configured and
+    the user has not written recently (see tasks/routing.py).
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # authenticates
+        if self.action in self.replica_actions and request.method in SAFE_METHODS:
+            routing.read_from_replica(request.user)
+
+
+class AtomicWritesMixin:
+    """
+    Runs each write request in one transaction, so the change-log entries
+    written by the signal receivers commit or roll back with the change.
+    """
+
+    def atomic_request(self, request):
+        return request.method not in SAFE_METHODS
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.atomic_request(request):
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code >= 400:
+                # DRF turned the exception into a response, so atomic() saw none
+                transaction.set_rollback(True)
+            return response
+
+
+class UserManagementViewSet(AtomicWritesMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet to handle adding, updating, and deactivating users.
     """
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    pagination_class = UserPagination
 
     def get_queryset(self):
         """
@@ -27,8 +84,8 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         """
         all_users = self.request.query_params.get('all', 'false').lower() == 'true'
         if all_users:
-            return User.objects.all()
-        return User.objects.filter(is_active=True)
+            return self.optimize_queryset(User.objects.all())
+        return self.optimize_queryset(User.objects.filter(is_active=True))
 
     def create(self, request, *args, **kwargs):
         """
@@ -61,6 +118,80 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    def atomic_request(self, request):
+        # The import commits batch by batch, after the view has returned
+        if self.action_map.get(request.method.lower()) == 'import_users':
+            return False
+        return super().atomic_request(request)
+
+    # Bytes of an import body kept in memory before spilling to a temporary file
+    IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_users(self, request):
+        """
+        Create users in bulk from a CSV or NDJSON body (Admin only).
+        - Columns / keys: `username`, `password`, `email`, `is_admin` and `projects`
+          (project ids, separated by semicolons in CSV).
+        - The format comes from `?import_format=csv|ndjson`, or else the Content-Type.
+        - With the job queue on, queues the import and answers 202 with the
+          `import_id` and the `report` URL to fetch once it is done.
+        - Otherwise imports at most PROVISIONING['MAX_REQUEST_ROWS'] rows (413
+          past that) and streams an NDJSON report back: one line per row,
+          then a summary line.
+        """
+        if not request.user.is_admin:
+            return Response({"error": "Only admins can import users."}, status=status.HTTP_403_FORBIDDEN)
+        content_type = request.content_type.split(';')[0].strip()
+        import_format = request.query_params.get('import_format') or next(
+            (name for name, known in provisioning.FORMATS.items() if content_type == known), None
+        )
+        # Spooled first: a client still sending the body would not read the
+        # report, and a full socket on both sides would stall the import
+        body = tempfile.SpooledTemporaryFile(max_size=self.IMPORT_SPOOL_SIZE)
+        shutil.copyfileobj(request._request, body)
+        body.seek(0)
+        try:
+            count = provisioning.count_rows(body, import_format)
+        except provisioning.ProvisioningError as exc:
+            body.close()
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if jobs.get_setting('ENABLED'):
+            with body:
+                import_id = provisioning.queue_import(body, import_format)
+            report = reverse('users-import-report', kwargs={'import_id': import_id}, request=request)
+            return Response({"import_id": import_id, "rows": count, "report": report}, status=status.HTTP_202_ACCEPTED)
+        limit = provisioning.get_setting('MAX_REQUEST_ROWS')
+        if count > limit:
+            body.close()
+            return Response(
+                {"error": f"At most {limit} rows per request without the job queue; "
+                          "use the import_users command for larger imports."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        return StreamingHttpResponse(
+            provisioning.stream_report(
+                provisioning.read_rows(body, import_format), provisioning.get_setting('HASH_PROCESSES'),
+                on_close=body.close,
+            ),
+            content_type=provisioning.FORMATS['ndjson'],
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<import_id>[0-9a-f]{32})', url_name='import-report')
+    def import_report(self, request, import_id=None):
+        """
+        The NDJSON report of a queued import (Admin only), 202 while it runs.
+        """
+        if not request.user.is_admin:
+            return Response({"error": "Only admins can read import reports."}, status=status.HTTP_403_FORBIDDEN)
+        state, path = provisioning.import_status(import_id)
+        if state is None:
+            return Response({"error": "Import not found"}, status=status.HTTP_404_NOT_FOUND)
+        if state == 'pending':
+            return Response({"status": "pending"}, status=status.HTTP_202_ACCEPTED)
+        return FileResponse(open(path, 'rb'), content_type=provisioning.FORMATS['ndjson'])
+
     def destroy(self, request, pk=None):
         """
         Deactivate (soft delete) a user instead of deleting.
@@ -92,6 +223,10 @@ class RegisterView(generics.CreateAPIView):
     
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [AccountLoginThrottle]
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
     
 class UserProfileView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -111,20 +246,129 @@ class LogoutView(generics.GenericAPIView):
         try:
             refresh_token = request.data.get("refresh")
             if not refresh_token:
+                metrics.TOKEN_BLACKLIST.inc(operation='blacklist', result='missing')
                 return Response({"error": "Refresh token is required."}, status=400)
 
             token = RefreshToken(refresh_token)
             token.blacklist()
 
+            metrics.TOKEN_BLACKLIST.inc(operation='blacklist', result='ok')
             return Response({"message": "Logout successful."}, status=200)
 
         except Exception:
+            metrics.TOKEN_BLACKLIST.inc(operation='blacklist', result='invalid')
             return Response({"error": "Invalid token."}, status=400)
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ResponseCacheStatsView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Hit and miss counters of the API response cache in this process (admins only).
+        """
+        if not request.user.is_admin:
+            return Response({"error": "Only admins can view cache statistics."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(response_cache.stats())
+
+class SyncView(APIView):
+    """
+    Changes since a cursor, for clients that keep a local copy.
+    - Without `cursor` (or with one whose entries were pruned) the response has
+      `reset: true` and the current cursor: load everything, then sync from it.
+    - Otherwise returns the changed tasks, projects, comments and users the
+      user can see, plus `tombstones` of ids to drop. Repeat while `has_more`.
+    """
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', changelog.DEFAULT_LIMIT)), changelog.MAX_LIMIT)
+            cursor = request.query_params.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return Response({"error": "cursor and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if cursor is None or changelog.cursor_expired(cursor):
+            return Response({"cursor": changelog.latest_cursor(), "has_more": False, "reset": True}, status=status.HTTP_200_OK)
+        return Response(changelog.changes_since(request.user, cursor, limit), status=status.HTTP_200_OK)
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over tasks, projects and comments.
+    - `q` is required; every word matches as a prefix and all must match.
+    - `type` optionally restricts results, e.g. `type=task,comment`.
+    - `limit` (default 20, at most 100) and `offset` page through the hits.
+    - Only returns what the user could read through the viewsets.
+    """
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not search.parse_terms(query):
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind] or list(search.KINDS)
+        if not set(kinds) <= set(search.KINDS):
+            return Response({"error": "type must be any of task, project, comment"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', search.DEFAULT_LIMIT)), 1), search.MAX_LIMIT)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"error": "limit and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits = search.search(request.user, query, kinds, limit, offset)
+        results = [
+            {
+                "type": hit['kind'],
+                "id": hit['object_id'],
+                "task_id": hit['task_id'],
+                "project_id": hit['project_id'],
+                "title": hit['title'],
+                "snippet": hit['snippet'],
+                "rank": hit['rank'],
+            }
+            for hit in hits
+        ]
+        return Response({"query": query, "results": results}, status=status.HTTP_200_OK)
+
+
+class DashboardStatsView(APIView):
+    """
+    Dashboard numbers for the projects the user can see, read from the
+    DashboardRollup counters rather than aggregated per request.
+    - Task counts per project by status and priority, and overdue open tasks.
+    - Workload per assignee (every user for admins, otherwise only their own).
+    - Comments per day over the last `days` days (default 30, at most 365).
+    """
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_cache_scopes(self):
+        # Overdue counts change with the date even when no row does, and
+        # rollups recomputed by the job queue change without a row changing
+        return ['tasks', 'projects', 'comments', 'users', 'dashboard', f'date:{timezone.localdate()}']
+
+    @cache_response
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', rollups.DEFAULT_ACTIVITY_DAYS))
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= 365:
+            return Response({"error": "days must be between 1 and 365"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rollups.dashboard_stats(request.user, days), status=status.HTTP_200_OK)
+
+
+class ProjectViewSet(ReplicaReadsMixin, AtomicWritesMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -132,10 +376,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
         - Admin users can see all projects.
         - Regular users can only see projects they are assigned to or created by them.
         """
-        user = self.request.user
-        if user.is_admin:
-            return Project.objects.all()
-        return Project.objects.filter(assigned_users=user) | Project.objects.filter(created_by=user)
+        return self.optimize_queryset(visible_projects(self.request.user))
+
+    def get_cache_scopes(self):
+        return ['projects', 'users']
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         """
@@ -212,9 +464,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
         instance.delete()
         return Response({"message": "Project deleted successfully."}, status=status.HTTP_200_OK)
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ReplicaReadsMixin, AtomicWritesMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
-    authentication_classes = [JWTAuthentication]
+    pagination_class = TaskPagination
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -222,10 +475,36 @@ class TaskViewSet(viewsets.ModelViewSet):
         - Admin users can see all tasks.
         - Regular users can only see tasks assigned to them.
         """
-        user = self.request.user
-        if user.is_admin:
-            return Task.objects.all()
-        return Task.objects.filter(assigned_to=user)
+        return self.optimize_queryset(visible_tasks(self.request.user))
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        - Task lists are rendered by FastTaskSerializer unless `fields` or
+          `expand` ask for a sparse fieldset.
+        - `?normalize=true` returns tasks with id references plus the projects
+          and users they reference, each once (fields/expand do not apply).
+        """
+        if kwargs.get('many') and self.request.method == 'GET':
+            params = self.request.query_params
+            if params.get('normalize', '').lower() == 'true':
+                return NormalizedTaskSerializer(*args, **kwargs)
+            if 'fields' not in params and 'expand' not in params:
+                return FastTaskSerializer(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_cache_scopes(self):
+        if self.action == 'get_tasks_by_project':
+            project_id = self.request.query_params.get('project_id')
+            return [f'project:{project_id}', 'users'] if project_id else None
+        return ['tasks', 'projects', 'users']
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
@@ -250,7 +529,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
 
-        if not request.user.is_admin and request.user not in instance.project.assigned_users.all():
+        if not request.user.is_admin and not is_project_member(request.user, instance.project_id):
             return Response({"error": "Only admins or project managers can update tasks."}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(instance, data=request.data, partial=True)
@@ -271,7 +550,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
 
-        if not request.user.is_admin and request.user != instance.project.created_by:
+        if not request.user.is_admin and not created_project(request.user, instance.project_id):
             return Response({"error": "Only admins or the project creator can delete tasks."}, status=status.HTTP_403_FORBIDDEN)
 
         if Comment.objects.filter(task=instance).exists():
@@ -283,7 +562,54 @@ class TaskViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response({"message": "Task deleted successfully."}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """
+        Create many tasks in one request.
+        - Body: `{"tasks": [<task payload>, ...]}`, each payload like `POST /api/tasks/`.
+        - Admins can create tasks in any project, other users only in projects they are assigned to.
+        - Returns a result per payload, in order.
+        """
+        return self.bulk_response(bulk.bulk_create_tasks, request.user, request.data.get("tasks"))
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Move many tasks to one status.
+        - Body: `{"ids": [...], "status": "Completed"}`.
+        - Same permission as updating a single task, checked per task.
+        """
+        return self.bulk_response(bulk.bulk_update_status, request.user, request.data.get("ids"), request.data.get("status"))
+
+    @action(detail=False, methods=['post'], url_path='bulk-reassign')
+    def bulk_reassign(self, request):
+        """
+        Change the assignees of many tasks.
+        - Body: `{"ids": [...], "assigned_to": [...], "mode": "set" | "add" | "remove"}` (mode defaults to "set").
+        - Same permission as updating a single task, checked per task.
+        """
+        return self.bulk_response(
+            bulk.bulk_reassign,
+            request.user,
+            request.data.get("ids"),
+            request.data.get("assigned_to"),
+            request.data.get("mode", "set"),
+        )
+
+    def bulk_response(self, operation, *args):
+        try:
+            results = operation(*args)
+        except bulk.BulkError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        failed = sum(1 for result in results if result["status"] == "error")
+        return Response(
+            {"succeeded": len(results) - failed, "failed": failed, "results": results},
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=False, methods=['get'], url_path='by-project')
+    @cache_response
     def get_tasks_by_project(self, request):
         """
         Get tasks by project ID.
@@ -294,19 +620,42 @@ class TaskViewSet(viewsets.ModelViewSet):
         if not project_id:
             return Response({"error": "Project ID is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = request.user
-
-        if user.is_admin:
-            tasks = Task.objects.filter(project_id=project_id)
-        else:
-            tasks = Task.objects.filter(project_id=project_id, assigned_to=user)
-
-        tasks = tasks.select_related('project').prefetch_related('assigned_to')
+        tasks = self.optimize_queryset(visible_tasks(request.user).filter(project_id=project_id))
 
         serializer = self.get_serializer(tasks, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream every task of a project with its assignees and comments.
+        - Requires `project_id`; `export_format` is `ndjson` (default) or `csv`.
+        - `comments=false` leaves comments out.
+        - Same visibility as by-project: admins get all tasks, other users their own.
+        """
+        project_id = request.query_params.get('project_id')
+        if not project_id:
+            return Response({"error": "Project ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+        # Checked before streaming starts: a bad id would only fail mid-body, after the 200
+        try:
+            project_id = int(project_id)
+        except ValueError:
+            return Response({"error": "Project ID must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in exports.FORMATS:
+            return Response({"error": "export_format must be 'ndjson' or 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+        include_comments = request.query_params.get('comments', 'true').lower() != 'false'
+
+        response = StreamingHttpResponse(
+            exports.stream_tasks(project_id, export_format, user=request.user, include_comments=include_comments),
+            content_type=exports.FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="project-{project_id}-tasks.{export_format}"'
+        return response
+
     @action(detail=False, methods=['get'], url_path='by-user')
+    @cache_response
     def get_tasks_by_user(self, request):
         """
         Get tasks based on the logged-in user with optional filters.
@@ -314,12 +663,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         - Regular users: Can only view their own tasks.
         - Filters: Status, Due Date, and User ID.
         """
-        user = request.user
-
-        if user.is_admin:
-            tasks = Task.objects.all()
-        else:
-            tasks = Task.objects.filter(assigned_to=user)
+        tasks = visible_tasks(request.user)
 
         # Apply optional filters
         status_filter = request.query_params.get('status')
@@ -332,20 +676,28 @@ class TaskViewSet(viewsets.ModelViewSet):
             tasks = tasks.filter(due_date=due_date)
         if user_id:
             try:
-                tasks = tasks.filter(user_id=int(user_id.strip('/')))
+                tasks = tasks.filter(assigned_to=int(user_id.strip('/')))
             except ValueError:
                 return Response({"error": "Invalid user ID format"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Optimize query performance
-        tasks = tasks.select_related('project').prefetch_related('assigned_to')
+        tasks = self.optimize_queryset(tasks)
+
+        page = self.paginate_queryset(tasks)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(tasks, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     
-class CommentViewSet(viewsets.ModelViewSet):
+MAX_COUNT_TASK_IDS = 1000
+
+class CommentViewSet(ReplicaReadsMixin, AtomicWritesMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    authentication_classes = [JWTAuthentication]
+    pagination_class = CommentPagination
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
@@ -354,7 +706,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         - If a `task` query param is provided, filter comments for that task.
         """
         user = self.request.user
-        queryset = Comment.objects.select_related('task', 'user')
+        queryset = self.optimize_queryset(Comment.objects.all())
 
         task_id = self.request.query_params.get("task")
         if task_id:
@@ -362,7 +714,34 @@ class CommentViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def atomic_request(self, request):
+        # Coalesced comments commit in the writer thread's transaction, which
+        # a transaction held here would keep waiting for the write lock.
+        if self.action_map.get(request.method.lower()) == 'create' and coalescing.get_setting('ENABLED'):
+            return False
+        return super().atomic_request(request)
+
+    def get_cache_scopes(self):
+        if self.action == 'get_comment_count':
+            task_id = self.request.query_params.get('task_id')
+            return [f'task-comments:{task_id}'] if task_id else None
+        task_id = self.request.query_params.get('task')
+        if self.action == 'list' and task_id:
+            return [f'task-comments:{task_id}', 'users']
+        if self.action == 'get_comment_counts':
+            return ['comments']
+        return ['comments', 'users']
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=["GET"], url_path="count")
+    @cache_response
     def get_comment_count(self, request):
         """
         - Returns the total number of comments for a given task.
@@ -373,26 +752,52 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not task_id:
             return Response({"error": "task_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        count = Comment.objects.filter(task_id=task_id).count()
+        # Served from the counter kept on Task instead of COUNT(*) over comments
+        count = Task.objects.filter(pk=task_id).values_list('comment_count', flat=True).first() or 0
 
         return Response({"task_id": task_id, "comment_count": count}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["GET"], url_path="counts")
+    @cache_response
+    def get_comment_counts(self, request):
+        """
+        - Returns comment counters for many tasks in one request.
+        - Requires `task_ids` as a comma-separated query parameter (up to 1000 ids).
+        """
+        raw_ids = request.query_params.get("task_ids", "")
+        try:
+            task_ids = {int(task_id) for task_id in raw_ids.split(",") if task_id.strip()}
+        except ValueError:
+            return Response({"error": "task_ids must be a comma-separated list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not task_ids:
+            return Response({"error": "task_ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(task_ids) > MAX_COUNT_TASK_IDS:
+            return Response({"error": f"At most {MAX_COUNT_TASK_IDS} task ids per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = Task.objects.filter(pk__in=task_ids).values('id', 'comment_count', 'last_comment_at')
+        counts = [
+            {"task_id": row['id'], "comment_count": row['comment_count'], "last_comment_at": row['last_comment_at']}
+            for row in rows
+        ]
+        return Response(counts, status=status.HTTP_200_OK)
+
     def perform_create(self, serializer):
         """
         - Assigns the logged-in user to the comment.
         - Ensures only task assignees or admins can comment.
         """
-        task_id = self.request.data.get("task_id")
+        # Loaded by the serializer's task_id field; saved as `task` so the
+        # signal receivers read its project without another query
+        task = serializer.validated_data.pop('task_id')
 
-        try:
-            task = Task.objects.get(id=task_id)
-        except Task.DoesNotExist:
-            return Response({"error": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        if not (self.request.user.is_admin or task.assigned_to.filter(id=self.request.user.id).exists()):
+        if not (self.request.user.is_admin or is_task_assignee(self.request.user, task.id)):
             return Response({"error": "Only the task assignee or an admin can comment."}, status=status.HTTP_403_FORBIDDEN)
 
-        serializer.save(user=self.request.user, task_id=task.id)
+        if coalescing.get_setting('ENABLED'):
+            coalescing.comment_writes.submit(lambda: serializer.save(user=self.request.user, task=task))
+        else:
+            serializer.save(user=self.request.user, task=task)
         
     def update(self, request, *args, **kwargs):
         """
@@ -0,0 +1,66 @@
+"""
+Which rows each user may read, shared by the viewsets, the async views, the
+exports and the sync endpoint so the rules live in one place.
+
+Project and task visibility and the membership checks read the
+ProjectAccess and TaskAccess tables (maintained by tasks/access.py), so each
+is one lookup on a (user, ...) index: an IN (subquery) for lists and an
+EXISTS for a single object.
+"""
+from .models import Comment, Project, ProjectAccess, Task, TaskAccess, User
+
+
+def visible_projects(user):
+    """
+    - Admin users can see all projects.
+    - Regular users can only see projects they are assigned to or created by them.
+    """
+    if user.is_admin:
+        return Project.objects.all()
+    return Project.objects.filter(id__in=ProjectAccess.objects.filter(user_id=user.pk).values('project_id'))
+
+
+def visible_tasks(user):
+    """
+    - Admin users can see all tasks.
+    - Regular users can only see tasks assigned to them.
+    """
+    if user.is_admin:
+        return Task.objects.all()
+    return Task.objects.filter(id__in=TaskAccess.objects.filter(user_id=user.pk).values('task_id'))
+
+
+def visible_comments(user):
+    """
+    Every authenticated user can read every comment.
+    """
+    return Comment.objects.all()
+
+
+def visible_users(user):
+    """
+    Active users, as listed by default by UserManagementViewSet.
+    """
+    return User.objects.filter(is_active=True)
+
+
+def is_project_member(user, project_id):
+    return ProjectAccess.objects.filter(user_id=user.pk, project_id=project_id, reason=ProjectAccess.MEMBER).exists()
+
+
+def created_project(user, project_id):
+    return ProjectAccess.objects.filter(user_id=user.pk, project_id=project_id, reason=ProjectAccess.CREATOR).exists()
+
+
+def is_task_assignee(user, task_id):
+    return TaskAccess.objects.filter(user_id=user.pk, task_id=task_id).exists()
+
+
+def member_project_ids(user, project_ids):
+    """
+    The projects among `project_ids` that `user` is a member of.
+    """
+    return set(
+        ProjectAccess.objects.filter(user_id=user.pk, project_id__in=project_ids, reason=ProjectAccess.MEMBER)
+        .values_list('project_id', flat=True)
+    )